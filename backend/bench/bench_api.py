@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Drive every API route against a synthetic catalog and report latency,
+throughput and peak memory as JSON
+
+Usage: python bench/bench_api.py [--cocktails 10000] [--users 1000] [--requests 200]
+                                 [--seed 0] [--output results.json] [--baseline old.json]
+
+A catalog of ``--cocktails`` recipes shaped like cocktails_database.json is
+written to a JSON file and loaded with load_cocktails.py, then ``--users``
+users get bar shelves and favorites.  Each route in routes/cocktail.py and
+routes/user.py is requested ``--requests`` times through the Flask test
+client (stopping early after ``--max-seconds`` per route); the results hold
+p50/p95/p99 latency, requests per second and the process's peak RSS, plus
+the commit and environment they were taken on.  ``--baseline`` prints the
+change against an earlier results file.  Everything runs offline in a
+throwaway database.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from common import create_app
+from synthetic import iter_cocktails, iter_users, ingredient_vocabulary, write_catalog
+
+from load_cocktails import load_cocktails
+from src.models.user import db, User
+from src.models.cocktail import Cocktail, UserBarShelf, UserFavorite
+from src.services.canonical import get_canonical_lookup, sync_canonical_ingredients
+from src.services.favorites import add_favorites
+from src.services.catalog_snapshot import snapshot_root
+from src.services.similarity import similarity_root
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER_BATCH_SIZE = 5000
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted ``samples``"""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))]
+
+
+def git_revision():
+    """(commit, dirty) of the working tree, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def load_users(users, vocabulary, cocktail_ids, seed):
+    """Insert users, their shelves and favorites in batches"""
+    lookup = get_canonical_lookup()
+    user_rows, shelf_rows, favorite_rows = [], [], []
+
+    def flush():
+        db.session.execute(User.__table__.insert(), user_rows)
+        if shelf_rows:
+            db.session.execute(UserBarShelf.__table__.insert(), shelf_rows)
+        if favorite_rows:
+            db.session.execute(UserFavorite.__table__.insert(), favorite_rows)
+        user_rows.clear()
+        shelf_rows.clear()
+        favorite_rows.clear()
+
+    for user, shelf, favorites in iter_users(users, vocabulary, cocktail_ids, seed=seed):
+        user_rows.append(user)
+        shelf_rows.extend(
+            {'user_id': user['id'], 'ingredient_name': name, 'canonical_id': lookup.resolve(name), 'quantity': ''}
+            for name in shelf
+        )
+        favorite_rows.extend({'user_id': user['id'], 'cocktail_id': c} for c in favorites)
+        if len(user_rows) >= USER_BATCH_SIZE:
+            flush()
+    if user_rows:
+        flush()
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+
+class Workload:
+    """Sample data the route requests draw from, seeded for repeatable runs"""
+
+    def __init__(self, users, cocktail_ids, seed):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.cocktail_ids = cocktail_ids
+        first = db.session.get(Cocktail, cocktail_ids[0])
+        self.category, self.glass = first.category, first.glass
+        self.next_name = 0
+
+    def user(self):
+        return self.rng.randint(1, self.users)
+
+    def cocktail(self):
+        return self.rng.choice(self.cocktail_ids)
+
+    def unique(self, prefix):
+        self.next_name += 1
+        return f"{prefix}{self.next_name}"
+
+    def shelf_row(self):
+        """Create a shelf row outside the timed request, for the DELETE route"""
+        row = UserBarShelf(user_id=self.user(), ingredient_name=self.unique('Bench Bitters '))
+        db.session.add(row)
+        db.session.commit()
+        return row.user_id, row.id
+
+    def favorite_row(self):
+        """Create a favorite outside the timed request, for the DELETE route"""
+        user_id, cocktail_id = self.user(), self.cocktail()
+        add_favorites(user_id, [cocktail_id])
+        db.session.commit()
+        return user_id, cocktail_id
+
+    def new_user(self):
+        """Create a user outside the timed request, for the DELETE route"""
+        name = self.unique('bench-delete-')
+        user = User(username=name, email=f"{name}@example.com")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+# name -> (endpoint, function(workload) -> (method, url, json body)).  Calls
+# that need a row to act on create it before the timed request.
+ROUTES = {
+    'cocktails page': ('cocktail.get_cocktails', lambda w: ('GET', '/api/cocktails?page=2&per_page=50', None)),
+    'cocktails deep page': ('cocktail.get_cocktails', lambda w: ('GET', '/api/cocktails?page=100&per_page=50', None)),
+    'cocktails cursor': ('cocktail.get_cocktails', lambda w: ('GET', '/api/cocktails?cursor=&per_page=50', None)),
+    'cocktails category': ('cocktail.get_cocktails', lambda w: ('GET', f'/api/cocktails?category={w.category}', None)),
+    'cocktails glass': ('cocktail.get_cocktails', lambda w: ('GET', f'/api/cocktails?glass={w.glass}', None)),
+    'cocktails ingredient': ('cocktail.get_cocktails', lambda w: ('GET', '/api/cocktails?ingredient=Vodka', None)),
+    'cocktails search': ('cocktail.get_cocktails', lambda w: ('GET', '/api/cocktails?search=lime', None)),
+    'cocktails facets': ('cocktail.get_cocktails', lambda w: (
+        'GET', f'/api/cocktails?glass={w.glass}&facets=category,alcoholic,glass,ingredient', None
+    )),
+    'cocktail by id': ('cocktail.get_cocktail', lambda w: ('GET', f'/api/cocktails/{w.cocktail()}', None)),
+    'similar': ('cocktail.get_similar_cocktails', lambda w: ('GET', f'/api/cocktails/{w.cocktail()}/similar', None)),
+    'export since': ('cocktail.export_cocktails', lambda w: ('GET', '/api/cocktails/export?since=2025-12-01', None)),
+    'random': ('cocktail.get_random_cocktail', lambda w: ('GET', '/api/cocktails/random', None)),
+    'random n=10': ('cocktail.get_random_cocktail', lambda w: ('GET', '/api/cocktails/random?n=10', None)),
+    'featured': ('cocktail.get_featured_cocktails', lambda w: ('GET', '/api/cocktails/featured', None)),
+    'seasonal': ('cocktail.get_seasonal_cocktails', lambda w: ('GET', '/api/cocktails/seasonal', None)),
+    'metadata': ('cocktail.get_metadata', lambda w: ('GET', '/api/metadata', None)),
+    'bar shelf': ('cocktail.get_user_bar_shelf', lambda w: ('GET', f'/api/users/{w.user()}/bar-shelf', None)),
+    'bar shelf add': ('cocktail.add_to_bar_shelf', lambda w: (
+        'POST', f'/api/users/{w.user()}/bar-shelf', {'ingredient_name': 'Angostura bitters', 'quantity': '1'})),
+    'bar shelf batch': ('cocktail.update_bar_shelf', lambda w: (
+        'POST', f'/api/users/{w.user()}/bar-shelf/batch', {'add': ['Gin', 'Tonic water'], 'remove': ['Rum']})),
+    'bar shelf remove': ('cocktail.remove_from_bar_shelf', lambda w: (
+        'DELETE', '/api/users/{}/bar-shelf/{}'.format(*w.shelf_row()), None)),
+    'user cocktails': ('cocktail.get_user_cocktails', lambda w: ('GET', f'/api/users/{w.user()}/cocktails', None)),
+    'user cocktail create': ('cocktail.create_user_cocktail', lambda w: (
+        'POST', f'/api/users/{w.user()}/cocktails',
+        {'name': w.unique('Bench Sour '), 'ingredients': [{'name': 'Gin', 'measure': '2 oz'}]})),
+    'favorites': ('cocktail.get_user_favorites', lambda w: ('GET', f'/api/users/{w.user()}/favorites', None)),
+    'favorite add': ('cocktail.add_favorite', lambda w: (
+        'POST', f'/api/users/{w.user()}/favorites', {'cocktail_id': w.cocktail()})),
+    'favorites batch': ('cocktail.update_favorites', lambda w: (
+        'POST', f'/api/users/{w.user()}/favorites/batch',
+        {'add': [w.cocktail() for _ in range(5)], 'remove': [w.cocktail()]})),
+    'favorite remove': ('cocktail.remove_favorite', lambda w: (
+        'DELETE', '/api/users/{}/favorites/{}'.format(*w.favorite_row()), None)),
+    'user export': ('cocktail.export_user_data', lambda w: ('GET', f'/api/users/{w.user()}/export', None)),
+    'makeable': ('cocktail.get_makeable_cocktails', lambda w: ('GET', f'/api/users/{w.user()}/makeable', None)),
+    'makeable favorites': ('cocktail.get_makeable_cocktails', lambda w: (
+        'GET', f'/api/users/{w.user()}/makeable?scope=favorites', None)),
+    'almost makeable': ('cocktail.get_almost_makeable_cocktails', lambda w: (
+        'GET', f'/api/users/{w.user()}/almost-makeable?max_missing=2', None)),
+    'shopping list': ('cocktail.get_shopping_list', lambda w: ('GET', f'/api/users/{w.user()}/shopping-list', None)),
+    'shopping optimize': ('cocktail.optimize_shopping_list', lambda w: (
+        'GET', f'/api/users/{w.user()}/shopping-list/optimize?budget=3', None)),
+    'users list': ('user.get_users', lambda w: ('GET', '/api/users', None)),
+    'user create': ('user.create_user', lambda w: (
+        'POST', '/api/users', {'username': w.unique('bench-'), 'email': w.unique('bench-') + '@example.com'})),
+    'user get': ('user.get_user', lambda w: ('GET', f'/api/users/{w.user()}', None)),
+    'user update': ('user.update_user', lambda w: ('PUT', f'/api/users/{w.user()}', {'email': w.unique('e') + '@example.com'})),
+    'user delete': ('user.delete_user', lambda w: ('DELETE', f'/api/users/{w.new_user()}', None)),
+}
+
+
+def uncovered_endpoints(app):
+    """API endpoints no entry of ROUTES exercises"""
+    covered = {endpoint for endpoint, _ in ROUTES.values()}
+    return sorted(
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint.split('.')[0] in ('cocktail', 'user') and rule.endpoint not in covered
+    )
+
+
+def run_route(client, workload, request_for, count, max_seconds):
+    """Time ``count`` requests (fewer if ``max_seconds`` runs out)"""
+    samples, errors = [], 0
+    busy = 0.0
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(count):
+        method, url, body = request_for(workload)
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        busy += elapsed
+        samples.append(elapsed * 1000)
+        errors += response.status_code >= 400
+        if time.perf_counter() > deadline:
+            break
+    samples.sort()
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': percentile(samples, 0.50),
+        'p95_ms': percentile(samples, 0.95),
+        'p99_ms': percentile(samples, 0.99),
+        'max_ms': samples[-1] if samples else None,
+        'mean_ms': sum(samples) / len(samples) if samples else None,
+        'throughput_rps': len(samples) / busy if busy else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def run(args):
+    commit, dirty = git_revision()
+    results = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'config': {
+            'cocktails': args.cocktails,
+            'users': args.users,
+            'requests': args.requests,
+            'max_seconds': args.max_seconds,
+            'seed': args.seed,
+        },
+        'setup': {},
+        'routes': {},
+    }
+    fd, catalog_path = tempfile.mkstemp(suffix='.json', prefix='bench-catalog-')
+    os.close(fd)
+    app = create_app()
+    try:
+        started = time.perf_counter()
+        write_catalog(catalog_path, iter_cocktails(args.cocktails, args.seed))
+        results['setup']['generate_s'] = round(time.perf_counter() - started, 2)
+
+        with app.app_context():
+            started = time.perf_counter()
+            # The loader reports progress on stdout, which carries the JSON results
+            with contextlib.redirect_stdout(sys.stderr):
+                summary = load_cocktails(catalog_path, mode='replace')
+            sync_canonical_ingredients()
+            results['setup']['load_s'] = round(time.perf_counter() - started, 2)
+            results['setup']['loaded'] = summary['inserted']
+
+            cocktail_ids = db.session.execute(db.select(Cocktail.id)).scalars().all()
+            started = time.perf_counter()
+            load_users(args.users, ingredient_vocabulary(331, args.seed), cocktail_ids, args.seed)
+            results['setup']['users_s'] = round(time.perf_counter() - started, 2)
+            results['setup']['database_mb'] = round(os.path.getsize(app.config['BENCH_DATABASE_PATH']) / 2 ** 20, 1)
+            results['setup']['peak_rss_mb'] = round(peak_rss_mb(), 1)
+
+            workload = Workload(args.users, cocktail_ids, args.seed)
+            client = app.test_client()
+            results['uncovered'] = uncovered_endpoints(app)
+            for name, (endpoint, request_for) in ROUTES.items():
+                if args.only and not any(term in name for term in args.only):
+                    continue
+                # First request pays for cold caches; report it separately
+                method, url, body = request_for(workload)
+                started = time.perf_counter()
+                client.open(url, method=method, json=body).get_data()
+                cold_ms = (time.perf_counter() - started) * 1000
+                stats = run_route(client, workload, request_for, args.requests, args.max_seconds)
+                stats['cold_ms'] = cold_ms
+                stats['endpoint'] = endpoint
+                results['routes'][name] = stats
+                print(
+                    f"{name:<22} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                    f"p99 {stats['p99_ms']:8.2f} ms  {stats['throughput_rps']:8.1f} req/s  "
+                    f"cold {cold_ms:8.1f} ms  rss {stats['peak_rss_mb']:7.1f} MB"
+                    + (f"  {stats['errors']} errors" if stats['errors'] else ''),
+                    file=sys.stderr
+                )
+        results['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    finally:
+        with app.app_context():
+            shutil.rmtree(similarity_root(), ignore_errors=True)
+            shutil.rmtree(snapshot_root(), ignore_errors=True)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
+        os.remove(catalog_path)
+    return results
+
+
+def compare(results, baseline):
+    """Print p50/p95 changes against an earlier results file"""
+    print(f"\nagainst {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):",
+          file=sys.stderr)
+    for name, stats in results['routes'].items():
+        old = baseline.get('routes', {}).get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p95_ms'):
+            if old.get(key):
+                changes.append(f"{key[:3]} {(stats[key] / old[key] - 1) * 100:+6.1f}%")
+        print(f"{name:<22} " + '  '.join(changes), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every API route on a synthetic catalog")
+    parser.add_argument('--cocktails', type=int, default=10_000, help="catalog size (default: %(default)s)")
+    parser.add_argument('--users', type=int, default=1000, help="users with shelves (default: %(default)s)")
+    parser.add_argument('--requests', type=int, default=200, help="timed requests per route (default: %(default)s)")
+    parser.add_argument('--max-seconds', type=float, default=10.0,
+                        help="stop a route's loop after this long (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: %(default)s)")
+    parser.add_argument('--only', nargs='*', help="run routes whose name contains any of these")
+    parser.add_argument('--output', help="write the JSON results here instead of stdout")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    if results['uncovered']:
+        print(f"not benchmarked: {', '.join(results['uncovered'])}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+    encoded = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(encoded + '\n')
+    else:
+        print(encoded)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Time /cocktails/export against paging through /cocktails with offsets,
+and check that the export's memory stays flat as the catalog grows
+
+Peak memory is the tracemalloc peak while the streamed body is read chunk
+by chunk, so it covers the app's allocations, not the interpreter's.
+
+Usage: python bench/bench_export.py [size ...]
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+
+from common import create_app, load_catalog
+from synthetic import iter_cocktails
+
+from src.models.user import db
+from src.services.export import EXPORT_BATCH_SIZE
+from src.services.catalog_snapshot import snapshot_root
+from src.services.similarity import similarity_root
+
+DEFAULT_SIZES = [10_000, 100_000]
+PER_PAGE = 100
+# Offset paging gets slow quickly; only compare it up to this size
+MAX_PAGED_SIZE = 100_000
+
+
+def stream(client, url, headers=None):
+    """Read a streamed response chunk by chunk; return (seconds, bytes, first chunk)"""
+    started = time.perf_counter()
+    response = client.get(url, headers=headers, buffered=False)
+    size = 0
+    first = None
+    for chunk in response.response:
+        if first is None:
+            first = chunk
+        size += len(chunk)
+    response.close()
+    return time.perf_counter() - started, size, first
+
+
+def page_through(client):
+    """The old way: offset pages of the list until they run out"""
+    started = time.perf_counter()
+    rows = 0
+    page = 1
+    while True:
+        body = client.get(f'/api/cocktails?page={page}&per_page={PER_PAGE}').get_json()
+        rows += len(body['cocktails'])
+        if page >= body['pages']:
+            return time.perf_counter() - started, rows
+        page += 1
+
+
+def load_in_batches(size, batch=50_000):
+    cocktails = iter_cocktails(size)
+    while True:
+        chunk = [c for _, c in zip(range(batch), cocktails)]
+        if not chunk:
+            return
+        load_catalog(chunk)
+
+
+def run(size):
+    app = create_app()
+    try:
+        with app.app_context():
+            load_in_batches(size)
+        client = app.test_client()
+
+        seconds, plain_bytes, first = stream(client, '/api/cocktails/export')
+        assert json.loads(first.split(b'\n', 1)[0])['id']
+        gzip_seconds, gzip_bytes, _ = stream(client, '/api/cocktails/export', {'Accept-Encoding': 'gzip'})
+        response = client.get('/api/cocktails/export?fields=id', headers={'Accept-Encoding': 'gzip'})
+        assert len(gzip.decompress(response.get_data()).splitlines()) == size
+        since_seconds, _, _ = stream(client, '/api/cocktails/export?since=2025-06-01')
+
+        tracemalloc.start()
+        stream(client, '/api/cocktails/export', {'Accept-Encoding': 'gzip'})
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{size:>8} cocktails | export {seconds:6.2f} s ({size / seconds:8.0f} rows/s, "
+            f"{plain_bytes / 2 ** 20:6.1f} MB) | gzip {gzip_seconds:6.2f} s ({gzip_bytes / 2 ** 20:5.1f} MB) | "
+            f"since {since_seconds * 1000:7.1f} ms | peak heap {peak / 2 ** 20:5.1f} MB "
+            f"({EXPORT_BATCH_SIZE}-row batches)"
+        )
+        if size <= MAX_PAGED_SIZE:
+            paged_seconds, rows = page_through(client)
+            assert rows == size
+            print(f"{'':>8}           | offset paging {paged_seconds:6.2f} s "
+                  f"({size // PER_PAGE} requests of {PER_PAGE})")
+    finally:
+        with app.app_context():
+            shutil.rmtree(similarity_root(), ignore_errors=True)
+            shutil.rmtree(snapshot_root(), ignore_errors=True)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        run(size)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Check /cocktails?facets=... against GROUP BY queries, and time both as the
+number of ingredient values grows
+
+The catalog size stays fixed while the ingredient vocabulary grows, so the
+facet counts' latency should stay flat; the GROUP BY baseline runs one
+query per facet, as the counts would be computed in SQL.
+
+Usage: python bench/bench_facets.py [vocabulary size ...]
+"""
+
+import os
+import shutil
+import sys
+
+from common import create_app, load_catalog, measure
+from synthetic import iter_cocktails
+
+from src.models.user import db
+from src.services.catalog_snapshot import snapshot_root
+from src.services.response_cache import response_cache
+from src.services.similarity import similarity_root
+
+DEFAULT_VOCABULARIES = [300, 3_000, 30_000]
+CATALOG_SIZE = 50_000
+FACETS = 'category,alcoholic,glass,ingredient'
+
+_COLUMN_COUNTS = (
+    "SELECT {facet}, count(*) FROM cocktail WHERE coalesce({facet}, '') != '' {where} GROUP BY {facet}"
+)
+_INGREDIENT_COUNTS = (
+    "SELECT i.name, count(DISTINCT ci.cocktail_id) FROM cocktail_ingredient ci "
+    "JOIN ingredient i ON i.id = coalesce(ci.canonical_id, ci.ingredient_id) "
+    "JOIN cocktail ON cocktail.id = ci.cocktail_id WHERE 1 {where} GROUP BY i.id"
+)
+
+
+def grouped_counts(glass):
+    """Per-facet counts for a glass filter, with each facet ignoring its own filter"""
+    counts = {}
+    for facet in ('category', 'alcoholic', 'glass'):
+        where = '' if facet == 'glass' else 'AND glass = :glass'
+        counts[facet] = dict(db.session.execute(
+            db.text(_COLUMN_COUNTS.format(facet=facet, where=where)), {'glass': glass}
+        ).all())
+    counts['ingredient'] = dict(db.session.execute(
+        db.text(_INGREDIENT_COUNTS.format(where='AND cocktail.glass = :glass')), {'glass': glass}
+    ).all())
+    return counts
+
+
+def load_in_batches(vocabulary_size, batch=50_000):
+    cocktails = iter_cocktails(CATALOG_SIZE, vocabulary_size=vocabulary_size)
+    while True:
+        chunk = [c for _, c in zip(range(batch), cocktails)]
+        if not chunk:
+            return
+        load_catalog(chunk)
+
+
+def run(vocabulary_size):
+    app = create_app()
+    try:
+        with app.app_context():
+            load_in_batches(vocabulary_size)
+            glass = db.session.execute(db.text("SELECT glass FROM cocktail LIMIT 1")).scalar()
+            client = app.test_client()
+            url = f'/api/cocktails?glass={glass}&per_page=20&facets={FACETS}'
+            body = client.get(url).get_json()
+            assert body['facets'] == grouped_counts(glass)
+            assert body['facets']['glass'][glass] == body['total']
+
+            def uncached():
+                response_cache.clear()
+                return client.get(url)
+
+            endpoint = measure(uncached)
+            plain = measure(lambda: (response_cache.clear(), client.get(url.split('&facets')[0])))
+            grouped = measure(lambda: grouped_counts(glass), repeat=5, warmup=1)
+            values = sum(len(v) for v in body['facets'].values())
+        print(
+            f"{vocabulary_size:>7} ingredients ({values:>6} facet values) | "
+            f"list p50 {plain[0]:6.2f} ms | with facets p50 {endpoint[0]:6.2f} ms p95 {endpoint[1]:6.2f} ms | "
+            f"GROUP BY per facet p50 {grouped[0]:8.2f} ms"
+        )
+    finally:
+        with app.app_context():
+            shutil.rmtree(similarity_root(), ignore_errors=True)
+            shutil.rmtree(snapshot_root(), ignore_errors=True)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
+
+
+if __name__ == '__main__':
+    vocabularies = [int(arg) for arg in sys.argv[1:]] or DEFAULT_VOCABULARIES
+    for vocabulary_size in vocabularies:
+        run(vocabulary_size)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compare /users/<id>/makeable against the old full-table scan, and time
+/users/<id>/almost-makeable on the same catalogs
+
+Usage: python bench/bench_makeable.py [size ...]
+"""
+
+import os
+import shutil
+import sys
+
+from common import create_app, load_catalog, load_shelf, measure
+from synthetic import generate_cocktails, ingredient_vocabulary, generate_shelf
+
+from src.models.user import db
+from src.models.cocktail import Cocktail, UserBarShelf
+from src.services.canonical import canonical_key, shelf_ingredient_ids
+from src.services.catalog_snapshot import snapshot_root
+from src.services.ingredient_index import IngredientIndex, get_ingredient_index, invalidate_ingredient_index
+
+DEFAULT_SIZES = [700, 10_000, 100_000]
+USER_ID = 1
+SHELF_SIZE = 25
+
+
+def legacy_makeable(user_id):
+    """The pre-index implementation: decode every recipe and subset-check it"""
+    shelf = {i.ingredient_name.lower() for i in UserBarShelf.query.filter_by(user_id=user_id)}
+    return [
+        c.id for c in Cocktail.query.all()
+        if {ing['name'].lower() for ing in c.ingredients}.issubset(shelf)
+    ]
+
+
+def reference_makeable(user_id):
+    """The full scan again, matching on canonical keys like the index does"""
+    shelf = {canonical_key(i.ingredient_name) for i in UserBarShelf.query.filter_by(user_id=user_id)}
+    return [
+        c.id for c in Cocktail.query.all()
+        if {canonical_key(ing['name']) for ing in c.ingredients}.issubset(shelf)
+    ]
+
+
+def indexed_makeable(user_id):
+    return get_ingredient_index().makeable(shelf_ingredient_ids(user_id))
+
+
+def almost_makeable(user_id, max_missing=1):
+    shelf = shelf_ingredient_ids(user_id)
+    index = get_ingredient_index()
+    positions, _ = index.almost_makeable(shelf, max_missing)
+    index.missing_ingredients(positions[:50], shelf)
+    return positions
+
+
+def reference_almost_makeable(user_id, max_missing=1):
+    """Nested-loop reference used to check the indexed ranking"""
+    shelf = {canonical_key(i.ingredient_name) for i in UserBarShelf.query.filter_by(user_id=user_id)}
+    found = []
+    for c in Cocktail.query.all():
+        missing = {canonical_key(ing['name']) for ing in c.ingredients} - shelf
+        if 0 < len(missing) <= max_missing:
+            found.append(c.id)
+    return found
+
+
+def run(size):
+    app = create_app()
+    try:
+        with app.app_context():
+            cocktails = generate_cocktails(size)
+            load_catalog(cocktails)
+            load_shelf(USER_ID, generate_shelf(ingredient_vocabulary(331), SHELF_SIZE))
+            invalidate_ingredient_index()
+
+            assert sorted(reference_makeable(USER_ID)) == sorted(indexed_makeable(USER_ID))
+            build_ms, _ = measure(IngredientIndex.build, repeat=3, warmup=0)
+            repeat = 5 if size >= 100_000 else 20
+            legacy = measure(lambda: legacy_makeable(USER_ID), repeat=repeat, warmup=1)
+            indexed = measure(lambda: indexed_makeable(USER_ID), repeat=repeat)
+            client = app.test_client()
+            endpoint = measure(lambda: client.get(f'/api/users/{USER_ID}/makeable'), repeat=repeat)
+            matches = len(indexed_makeable(USER_ID))
+
+            index = get_ingredient_index()
+            assert sorted(index.cocktail_ids[p] for p in almost_makeable(USER_ID)) == \
+                sorted(reference_almost_makeable(USER_ID))
+            almost = measure(lambda: almost_makeable(USER_ID), repeat=repeat)
+            almost_endpoint = measure(lambda: client.get(f'/api/users/{USER_ID}/almost-makeable'), repeat=repeat)
+            one_away = len(almost_makeable(USER_ID))
+        print(
+            f"{size:>8} cocktails  {matches:>5} makeable | "
+            f"full scan p50 {legacy[0]:9.2f} ms | index p50 {indexed[0]:7.3f} ms "
+            f"p95 {indexed[1]:7.3f} ms | endpoint p50 {endpoint[0]:8.2f} ms | "
+            f"index build {build_ms:8.1f} ms"
+        )
+        print(
+            f"{'':>8}            {one_away:>5} one away | "
+            f"almost-makeable query p50 {almost[0]:7.3f} ms p95 {almost[1]:7.3f} ms | "
+            f"endpoint p50 {almost_endpoint[0]:8.2f} ms"
+        )
+    finally:
+        with app.app_context():
+            shutil.rmtree(snapshot_root(), ignore_errors=True)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        run(size)
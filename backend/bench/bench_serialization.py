@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: to_dict + jsonify against the splicing serializer
+
+Usage: python bench/bench_serialization.py [page size ...]
+"""
+
+import json
+import os
+import sys
+
+from common import create_app, load_catalog, measure
+
+from flask import jsonify
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services import serialization
+from src.services.serialization import cocktail_columns, encode_cocktails, json_response
+
+DEFAULT_PAGE_SIZES = [50, 100]
+LIST_FIELDS = ('id', 'name', 'category', 'glass', 'image')
+
+
+def legacy(page_size):
+    cocktails = Cocktail.query.limit(page_size).all()
+    return jsonify({'cocktails': [c.to_dict() for c in cocktails]}).get_data()
+
+
+def spliced(page_size, fields=None):
+    rows = db.session.query(*cocktail_columns(fields)).limit(page_size).all()
+    return json_response({}, cocktails=encode_cocktails(rows, fields)).get_data()
+
+
+def encode_only_legacy(cocktails):
+    return jsonify({'cocktails': [c.to_dict() for c in cocktails]}).get_data()
+
+
+def encode_only_spliced(rows):
+    return json_response({}, cocktails=encode_cocktails(rows)).get_data()
+
+
+def run(page_size):
+    with app.test_request_context():
+        assert json.loads(legacy(page_size)) == json.loads(spliced(page_size))
+        cocktails = Cocktail.query.limit(page_size).all()
+        rows = db.session.query(*cocktail_columns()).limit(page_size).all()
+        results = {
+            'query + to_dict + jsonify': measure(lambda: legacy(page_size), repeat=200),
+            'query + splice': measure(lambda: spliced(page_size), repeat=200),
+            f'query + splice, fields={",".join(LIST_FIELDS)}': measure(lambda: spliced(page_size, LIST_FIELDS), repeat=200),
+            'encode only: to_dict + jsonify': measure(lambda: encode_only_legacy(cocktails), repeat=200),
+            'encode only: splice': measure(lambda: encode_only_spliced(rows), repeat=200),
+        }
+        orjson = serialization.orjson
+        serialization.orjson = None
+        try:
+            results['encode only: splice (stdlib json)'] = measure(lambda: encode_only_spliced(rows), repeat=200)
+        finally:
+            serialization.orjson = orjson
+        full_bytes = len(spliced(page_size))
+        sparse_bytes = len(spliced(page_size, LIST_FIELDS))
+
+    print(f"page of {page_size} cocktails (orjson {'available' if orjson else 'missing'})")
+    for label, (p50, p95) in results.items():
+        print(f"  {label:<55} p50 {p50:7.3f} ms  p95 {p95:7.3f} ms")
+    print(f"  response size: full {full_bytes} bytes, sparse {sparse_bytes} bytes")
+
+
+if __name__ == '__main__':
+    app = create_app()
+    try:
+        with app.app_context():
+            with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cocktails_database.json'), 'r', encoding='utf-8') as f:
+                load_catalog(json.load(f))
+        for size in [int(arg) for arg in sys.argv[1:]] or DEFAULT_PAGE_SIZES:
+            run(size)
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
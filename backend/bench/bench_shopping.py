@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Time the greedy shopping planner and /users/<id>/shopping-list/optimize on
+large catalogs (tests/test_shopping.py checks its plans against brute force)
+
+Usage: python bench/bench_shopping.py [size ...]
+"""
+
+import os
+import shutil
+import sys
+
+from common import create_app, load_catalog, load_shelf, measure
+from synthetic import generate_cocktails, ingredient_vocabulary, generate_shelf
+
+from src.models.user import db
+from src.services.catalog_snapshot import snapshot_root
+from src.services.ingredient_index import get_ingredient_index
+from src.services.shopping import plan_purchases
+from src.services.similarity import similarity_root
+
+DEFAULT_SIZES = [700, 10_000, 100_000]
+USER_ID = 1
+SHELF_SIZE = 25
+BUDGETS = [1, 3, 5]
+
+
+def run(size):
+    app = create_app()
+    try:
+        with app.app_context():
+            load_catalog(generate_cocktails(size))
+            shelf = generate_shelf(ingredient_vocabulary(331), SHELF_SIZE)
+            load_shelf(USER_ID, shelf)
+            shelf = {name.lower() for name in shelf}
+            index = get_ingredient_index()
+            client = app.test_client()
+            for budget in BUDGETS:
+                plan = plan_purchases(index, shelf, budget)
+                planner = measure(lambda: plan_purchases(index, shelf, budget), repeat=10)
+                endpoint = measure(
+                    lambda: client.get(f'/api/users/{USER_ID}/shopping-list/optimize?budget={budget}'),
+                    repeat=10
+                )
+                print(
+                    f"{size:>8} cocktails  budget {budget}: unlocks {len(plan.unlocked):>6} | "
+                    f"planner p50 {planner[0]:7.2f} ms p95 {planner[1]:7.2f} ms | "
+                    f"endpoint p50 {endpoint[0]:7.2f} ms"
+                )
+    finally:
+        with app.app_context():
+            shutil.rmtree(similarity_root(), ignore_errors=True)
+            shutil.rmtree(snapshot_root(), ignore_errors=True)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES:
+        run(size)
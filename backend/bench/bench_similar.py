@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Check /cocktails/<id>/similar against a brute-force cosine over every
+recipe, and time the model build, a warm query and the endpoint
+
+Usage: python bench/bench_similar.py [size ...]
+"""
+
+import math
+import os
+import shutil
+import sys
+from collections import Counter
+
+from common import create_app, load_catalog, measure
+from synthetic import generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.canonical import get_canonical_lookup
+from src.services.catalog_snapshot import snapshot_root
+from src.services.similarity import TAG_WEIGHT, SimilarityModel, get_similarity_model, similarity_root
+
+DEFAULT_SIZES = [700, 10_000, 100_000]
+QUERIES = 20
+K = 10
+
+
+def reference_vectors():
+    """Normalized {feature: weight} per cocktail, computed row by row"""
+    lookup = get_canonical_lookup()
+    features = {}
+    for c in Cocktail.query.all():
+        names = {('i', lookup.resolve(ing['name'])) for ing in c.ingredients if ing.get('name')}
+        # Tags are matched case-insensitively, like the tag table stores them
+        names.update(('t', tag.lower()) for tag in c.tags)
+        features[c.id] = names
+    frequency = Counter(f for names in features.values() for f in names)
+    count = len(features)
+
+    vectors = {}
+    for cocktail_id, names in features.items():
+        vector = {}
+        for f in names:
+            weight = math.log((1 + count) / (1 + frequency[f])) + 1
+            vector[f] = weight * (TAG_WEIGHT if f[0] == 't' else 1)
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1
+        vectors[cocktail_id] = {f: w / norm for f, w in vector.items()}
+    return vectors
+
+
+def reference_scores(vectors, cocktail_id):
+    query = vectors[cocktail_id]
+    return {
+        other: sum(w * vector.get(f, 0) for f, w in query.items())
+        for other, vector in vectors.items() if other != cocktail_id
+    }
+
+
+def check(model, vectors, cocktail_ids):
+    """Every model top-k score must match the reference and nothing better may be missing"""
+    for cocktail_id in cocktail_ids:
+        scores = reference_scores(vectors, cocktail_id)
+        similar = model.similar(model.position(cocktail_id), K)
+        for p, score in similar:
+            assert abs(scores[str(model.cocktail_ids[p])] - score) < 1e-4, cocktail_id
+        expected = sorted((s for s in scores.values() if s > 0), reverse=True)[:K]
+        assert len(similar) == len(expected), cocktail_id
+        assert all(abs(a - s) < 1e-4 for a, (_, s) in zip(expected, similar)), cocktail_id
+
+
+def run(size):
+    app = create_app()
+    try:
+        with app.app_context():
+            load_catalog(generate_cocktails(size))
+            cocktail_ids = db.session.execute(
+                db.select(Cocktail.id).order_by(Cocktail.id).limit(QUERIES)
+            ).scalars().all()
+
+            build_ms, _ = measure(SimilarityModel.build, repeat=3, warmup=0)
+            model = get_similarity_model()
+            check(model, reference_vectors(), cocktail_ids[:5])
+
+            position = model.position(cocktail_ids[0])
+            query = measure(lambda: model.similar(position, K), repeat=50)
+            client = app.test_client()
+            urls = iter([f'/api/cocktails/{c}/similar?k={K}' for c in cocktail_ids] * 100)
+            # Distinct cocktails so the response cache doesn't answer
+            endpoint = measure(lambda: client.get(next(urls)), repeat=QUERIES - 2)
+            cached = measure(lambda: client.get(f'/api/cocktails/{cocktail_ids[0]}/similar?k={K}'), repeat=50)
+            on_disk = sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(similarity_root()) for name in names
+            )
+        print(
+            f"{size:>8} cocktails | build {build_ms:8.1f} ms | top-{K} p50 {query[0]:7.3f} ms "
+            f"p95 {query[1]:7.3f} ms | endpoint p50 {endpoint[0]:7.2f} ms p95 {endpoint[1]:7.2f} ms | "
+            f"cached p50 {cached[0]:6.2f} ms | {on_disk / 2 ** 20:6.1f} MB mapped"
+        )
+    finally:
+        with app.app_context():
+            shutil.rmtree(similarity_root(), ignore_errors=True)
+            shutil.rmtree(snapshot_root(), ignore_errors=True)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        run(size)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Compare the memory a forked worker needs to serve the catalog from ORM
+objects against the memory-mapped catalog snapshot, and time list pages
+served from the snapshot against the SQL query they replaced
+
+Memory is each worker's growth in Rss and in private (not shared with the
+other workers) pages, from /proc/self/smaps_rollup, after it has touched
+every cocktail: the ORM worker loads them all and parses their ingredients,
+the snapshot worker maps the snapshot the parent built before forking (as
+gunicorn's preload_app does) and encodes every row.
+
+Usage: python bench/bench_snapshot.py [size ...]
+"""
+
+import json
+import os
+import shutil
+import sys
+
+from common import create_app, load_catalog, measure
+from synthetic import iter_cocktails
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.catalog_snapshot import get_catalog_snapshot, snapshot_root
+from src.services.response_cache import response_cache
+from src.services.serialization import cocktail_columns, encode_cocktail, encode_cocktails
+from src.services.similarity import similarity_root
+
+DEFAULT_SIZES = [10_000, 100_000]
+WORKERS = 2
+PER_PAGE = 50
+
+
+def memory_kb():
+    """(Rss, private) kB of this process"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values['Rss'], values['Private_Clean'] + values['Private_Dirty']
+
+
+def hold_orm():
+    cocktails = Cocktail.query.all()
+    for c in cocktails:
+        c.ingredients, c.tags
+    return cocktails
+
+
+def hold_snapshot():
+    snapshot = get_catalog_snapshot()
+    positions = snapshot.all_positions
+    # Page by page, as the list route would serve them
+    for start in range(0, len(positions), PER_PAGE):
+        snapshot.encode_positions(positions[start:start + PER_PAGE])
+    return snapshot
+
+
+def worker_growth(app, hold):
+    """Fork WORKERS children that each run ``hold``; return their mean (Rss, private) growth in MB"""
+    children = []
+    for _ in range(WORKERS):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            with app.app_context():
+                before = memory_kb()
+                held = hold()
+                after = memory_kb()
+            os.write(write, json.dumps([a - b for a, b in zip(after, before)]).encode())
+            del held
+            os._exit(0)
+        os.close(write)
+        children.append((pid, read))
+    growth = []
+    for pid, read in children:
+        with os.fdopen(read) as f:
+            growth.append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    return [sum(g[i] for g in growth) / len(growth) / 1024 for i in range(2)]
+
+
+def sql_page(category, page):
+    """The list query the snapshot replaced: count, then an offset page"""
+    query = db.session.query(*cocktail_columns()).filter(Cocktail.category == category)
+    total = query.count()
+    rows = query.order_by(Cocktail.name, Cocktail.id).offset((page - 1) * PER_PAGE).limit(PER_PAGE).all()
+    return total, encode_cocktails(rows)
+
+
+def uncached(client, url):
+    response_cache.clear()
+    return client.get(url)
+
+
+def load_in_batches(size, batch=50_000):
+    cocktails = iter_cocktails(size)
+    while True:
+        chunk = [c for _, c in zip(range(batch), cocktails)]
+        if not chunk:
+            return
+        load_catalog(chunk)
+
+
+def run(size):
+    app = create_app()
+    try:
+        with app.app_context():
+            load_in_batches(size)
+            snapshot = get_catalog_snapshot()
+            # Every row encodes exactly as the ORM path did
+            rows = db.session.execute(db.select(*cocktail_columns())).all()
+            for row in rows[::max(len(rows) // 500, 1)]:
+                assert snapshot.encode(snapshot.position(row.id)) == encode_cocktail(row)
+            category = rows[0].category
+            page = max(len(snapshot.facet('category', category)) // PER_PAGE // 2, 1)
+            total, body = sql_page(category, page)
+            assert total == len(snapshot.facet('category', category))
+            client = app.test_client()
+            response = uncached(client, f'/api/cocktails?category={category}&page={page}&per_page={PER_PAGE}')
+            assert json.loads(body) == response.get_json()['cocktails']
+
+            sql = measure(lambda: sql_page(category, page))
+            listed = measure(lambda: uncached(
+                client, f'/api/cocktails?category={category}&page={page}&per_page={PER_PAGE}'
+            ))
+            by_id = measure(lambda: uncached(client, f'/api/cocktails/{rows[-1].id}'))
+            hold_snapshot()
+            mapped = sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(snapshot_root()) for name in names
+            )
+            db.session.remove()
+            db.engine.dispose()
+
+        orm_rss, orm_private = worker_growth(app, hold_orm)
+        snapshot_rss, snapshot_private = worker_growth(app, hold_snapshot)
+        print(
+            f"{size:>8} cocktails | per worker: ORM rss +{orm_rss:7.1f} MB private +{orm_private:7.1f} MB | "
+            f"snapshot rss +{snapshot_rss:6.1f} MB private +{snapshot_private:6.1f} MB "
+            f"({mapped / 2 ** 20:.1f} MB mapped)"
+        )
+        print(
+            f"{'':>8}           | category page {page}: SQL p50 {sql[0]:7.2f} ms | "
+            f"snapshot endpoint p50 {listed[0]:6.2f} ms p95 {listed[1]:6.2f} ms | "
+            f"by id p50 {by_id[0]:5.2f} ms"
+        )
+    finally:
+        with app.app_context():
+            shutil.rmtree(similarity_root(), ignore_errors=True)
+            shutil.rmtree(snapshot_root(), ignore_errors=True)
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(app.config['BENCH_DATABASE_PATH'])
+
+
+if __name__ == '__main__':
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit('bench_snapshot.py reads /proc/self/smaps_rollup (Linux only)')
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        run(size)
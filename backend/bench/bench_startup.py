@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Time from starting a process to its first served request, for each way
+src/main.py can find its database
+
+The seed database is built the way the image builds it (load_cocktails.py,
+then users added), and every boot imports src.main in a new interpreter
+and requests a page of /api/cocktails:
+
+* schema pass - the database is not stamped with the schema version, so the
+  boot runs db.create_all() and every schema step, as every boot used to;
+* stamped     - a copy of the stamped seed: the boot only checks the stamp;
+* seeded      - no database yet: the boot copies the seed into place first.
+
+Usage: python bench/bench_startup.py [--cocktails N] [--users N] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_api import load_users
+from common import create_app
+from synthetic import ingredient_vocabulary, iter_cocktails, write_catalog
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.prebuilt import DERIVED_SUFFIXES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child: seconds to import the app and to serve the first request
+CHILD = """
+import time
+started = time.perf_counter()
+from src.main import app
+imported = time.perf_counter()
+response = app.test_client().get('/api/cocktails?per_page=20')
+assert response.status_code == 200, response.status_code
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def build_seed(path, cocktails, users):
+    catalog_path = path + '.json'
+    write_catalog(catalog_path, iter_cocktails(cocktails))
+    subprocess.run(
+        [sys.executable, 'load_cocktails.py', catalog_path, '--database', path],
+        cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL
+    )
+    os.remove(catalog_path)
+    app = create_app(path)
+    with app.app_context():
+        cocktail_ids = db.session.execute(db.select(Cocktail.id)).scalars().all()
+        load_users(users, ingredient_vocabulary(331), cocktail_ids, 0)
+        db.session.remove()
+        db.engine.dispose()
+
+
+def copy_database(source, target):
+    shutil.copyfile(source, target)
+    for suffix in DERIVED_SUFFIXES:
+        if os.path.isdir(source + suffix):
+            shutil.copytree(source + suffix, target + suffix)
+
+
+def remove_database(path):
+    for name in (path, path + '-wal', path + '-shm'):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(name)
+    for suffix in DERIVED_SUFFIXES:
+        shutil.rmtree(path + suffix, ignore_errors=True)
+
+
+def boot(database, seed=None):
+    """(total, import, first request) seconds of one cold start"""
+    env = dict(os.environ, DATABASE_PATH=database)
+    if seed:
+        env['SEED_DATABASE_PATH'] = seed
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True, text=True
+    )
+    total = time.perf_counter() - started
+    imported, first = (float(value) for value in result.stdout.split())
+    return total, imported, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cocktails', type=int, default=20_000)
+    parser.add_argument('--users', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    seed = os.path.join(workdir, 'seed.db')
+    database = os.path.join(workdir, 'app.db')
+    try:
+        started = time.perf_counter()
+        build_seed(seed, args.cocktails, args.users)
+        print(f"seed: {args.cocktails} cocktails, {args.users} users, "
+              f"{os.path.getsize(seed) / 2 ** 20:.1f} MB, built in {time.perf_counter() - started:.1f} s")
+
+        def unstamped():
+            copy_database(seed, database)
+            with contextlib.closing(sqlite3.connect(database)) as connection:
+                connection.execute("PRAGMA user_version = 0")
+
+        scenarios = [
+            ('schema pass', unstamped, None),
+            ('stamped', lambda: copy_database(seed, database), None),
+            ('seeded', lambda: None, seed),
+        ]
+        for name, prepare, seed_path in scenarios:
+            runs = []
+            for _ in range(args.repeat):
+                prepare()
+                runs.append(boot(database, seed_path))
+                remove_database(database)
+            total, imported, first = (sorted(column)[len(runs) // 2] for column in zip(*runs))
+            print(f"{name:>12}: first response after {total * 1000:7.0f} ms "
+                  f"(import src.main {imported * 1000:6.0f} ms, first request {first * 1000:5.1f} ms)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
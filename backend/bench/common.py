@@ -0,0 +1,86 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Make ``src`` importable the same way src/main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db, User
+from src.models.cocktail import Cocktail, UserBarShelf
+from src.routes.user import user_bp
+from src.routes.cocktail import cocktail_bp
+from src.services.schema import prepare_database
+from src.services.canonical import get_canonical_lookup, sync_canonical_ingredients
+
+
+def create_app(database_path=None):
+    """Create an API-only app backed by a throwaway SQLite file"""
+    if database_path is None:
+        fd, database_path = tempfile.mkstemp(suffix='.db', prefix='bench-')
+        os.close(fd)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['BENCH_DATABASE_PATH'] = database_path
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(cocktail_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        prepare_database()
+    return app
+
+
+def load_catalog(cocktails):
+    """Insert generated cocktails with a single executemany"""
+    rows = [
+        {
+            'id': c['id'],
+            'name': c['name'],
+            'category': c.get('category'),
+            'alcoholic': c.get('alcoholic'),
+            'glass': c.get('glass'),
+            'instructions': c.get('instructions'),
+            'image': c.get('image'),
+            'ingredients_json': json.dumps(c['ingredients']) if c.get('ingredients') else None,
+            'video': c.get('video'),
+            'tags_json': json.dumps(c['tags']) if c.get('tags') else None,
+            'iba': c.get('iba'),
+            'date_modified': c.get('date_modified'),
+            'garnish': c.get('garnish'),
+        }
+        for c in cocktails
+    ]
+    db.session.execute(Cocktail.__table__.insert(), rows)
+    db.session.commit()
+    sync_canonical_ingredients()
+
+
+def load_shelf(user_id, ingredient_names):
+    """Create a user and stock their bar shelf"""
+    db.session.add(User(id=user_id, username=f"bench{user_id}", email=f"bench{user_id}@example.com"))
+    lookup = get_canonical_lookup()
+    db.session.add_all(
+        UserBarShelf(user_id=user_id, ingredient_name=name, canonical_id=lookup.resolve(name))
+        for name in ingredient_names
+    )
+    db.session.commit()
+
+
+def measure(fn, repeat=20, warmup=2):
+    """Return (median, p95) wall time of ``fn`` in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.95))]
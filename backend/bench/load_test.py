@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Closed-loop HTTP load test: requests/sec and latency for a running server
+
+Usage: python bench/load_test.py [--url http://127.0.0.1:5000] [--server dev|gunicorn]
+                                 [--concurrency 16] [--duration 10]
+
+With ``--server`` the script starts the server itself (the debug server via
+src/main.py, or gunicorn with gunicorn.conf.py) on ``--port`` and stops it
+afterwards; it serves the regular database, so run load_cocktails.py first.
+Each client thread keeps one HTTP/1.1 connection open and cycles through a
+mix of read endpoints.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REQUEST_MIX = [
+    '/api/cocktails?page=1&per_page=20',
+    '/api/cocktails?search=gin',
+    '/api/cocktails?category=Cocktail&per_page=20',
+    '/api/metadata',
+    '/api/cocktails/random',
+    '/api/cocktails/featured',
+    '/api/cocktails/{id}',
+]
+
+
+def start_server(kind, port, workers, threads):
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), WEB_THREADS=str(threads))
+    if kind == 'dev':
+        command = [sys.executable, os.path.join('src', 'main.py')]
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                   '--access-logfile', '/dev/null', 'src.main:app']
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process
+
+
+def stop_server(process):
+    # The debug reloader and gunicorn both fork; stop the whole process group
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def wait_until_ready(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=2)
+            connection.request('GET', '/api/metadata')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server on {host}:{port} did not become ready")
+
+
+def sample_ids(host, port):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    connection.request('GET', '/api/cocktails?per_page=50&fields=id&count=none')
+    body = json.loads(connection.getresponse().read())
+    return [c['id'] for c in body['cocktails']] or ['0']
+
+
+def client(host, port, paths, offset, stop_at, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    i = offset
+    while time.perf_counter() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(path)
+    connection.close()
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run(host, port, concurrency, duration):
+    ids = sample_ids(host, port)
+    paths = []
+    for n in range(len(ids)):
+        paths.extend(path.format(id=ids[n]) for path in REQUEST_MIX)
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=client, args=(host, port, paths, n * 7, stop_at, latencies, errors))
+        for n in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    if not latencies:
+        print(f"no successful requests ({len(errors)} errors)")
+        return
+    print(
+        f"{len(latencies)} requests in {elapsed:.1f}s with {concurrency} clients: "
+        f"{len(latencies) / elapsed:.0f} req/s, {len(errors)} errors"
+    )
+    print(
+        f"latency p50 {percentile(latencies, 0.50):.1f} ms  "
+        f"p95 {percentile(latencies, 0.95):.1f} ms  p99 {percentile(latencies, 0.99):.1f} ms"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default=None, help="base URL of a running server")
+    parser.add_argument('--server', choices=('dev', 'gunicorn'), default=None,
+                        help="start this server for the run instead of using --url")
+    parser.add_argument('--port', type=int, default=5050, help="port for --server (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn workers (default: %(default)s)")
+    parser.add_argument('--threads', type=int, default=4, help="threads per worker (default: %(default)s)")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.server:
+        host, port = '127.0.0.1', args.port
+        process = start_server(args.server, port, args.workers, args.threads)
+    else:
+        url = urlsplit(args.url or 'http://127.0.0.1:5000')
+        host, port = url.hostname, url.port or 80
+    try:
+        wait_until_ready(host, port)
+        label = args.server or f"{host}:{port}"
+        if args.server == 'gunicorn':
+            label += f" ({args.workers} workers x {args.threads} threads)"
+        print(label)
+        run(host, port, args.concurrency, args.duration)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Generate synthetic cocktail catalogs shaped like cocktails_database.json
+"""
+
+import json
+import os
+import random
+from collections import Counter
+from itertools import accumulate
+
+SOURCE_CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cocktails_database.json')
+
+# Ingredient counts per recipe, roughly as distributed in the real catalog
+INGREDIENT_COUNT_WEIGHTS = {2: 290, 3: 153, 4: 102, 5: 85, 6: 49, 7: 15, 8: 4, 9: 1, 11: 1}
+
+
+def _load_source():
+    with open(SOURCE_CATALOG, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ingredient_vocabulary(count, seed=0):
+    """Return ``count`` ingredient names, most common first
+
+    The real catalog's ingredients come first in order of how many recipes
+    use them; synthetic variants of those names pad the list out to ``count``.
+    """
+    usage = Counter(ing['name'] for c in _load_source() for ing in c['ingredients'])
+    real_names = [name for name, _ in usage.most_common()]
+    rng = random.Random(seed)
+    names = real_names[:count]
+    while len(names) < count:
+        names.append(f"{rng.choice(real_names)} Variant {len(names)}")
+    return names
+
+
+def iter_cocktails(count, seed=0, vocabulary_size=None):
+    """Yield ``count`` cocktail dicts using the loader's JSON schema
+
+    Ingredient popularity follows a Zipf-like curve so that a handful of base
+    spirits appear in a large share of recipes, as they do in the real data.
+    The vocabulary grows with the catalog unless ``vocabulary_size`` is given.
+    """
+    source = _load_source()
+    rng = random.Random(seed)
+    if vocabulary_size is None:
+        vocabulary_size = max(331, int(count ** 0.5 * 12))
+    vocabulary = ingredient_vocabulary(vocabulary_size, seed)
+    popularity = list(accumulate(1.0 / (rank + 1) ** 0.9 for rank in range(len(vocabulary))))
+    sizes = list(INGREDIENT_COUNT_WEIGHTS)
+    size_weights = list(INGREDIENT_COUNT_WEIGHTS.values())
+
+    for i in range(count):
+        template = source[i % len(source)]
+        size = rng.choices(sizes, size_weights)[0]
+        names = []
+        while len(names) < size:
+            for name in rng.choices(vocabulary, cum_weights=popularity, k=size - len(names)):
+                if name not in names:
+                    names.append(name)
+        cocktail = dict(template)
+        cocktail['id'] = f"s{i:07d}"
+        cocktail['name'] = f"{template['name']} #{i}"
+        cocktail['ingredients'] = [
+            {'name': name, 'measure': f"{rng.randint(1, 4)} oz"} for name in names
+        ]
+        cocktail['date_modified'] = f"20{rng.randint(15, 25):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00"
+        yield cocktail
+
+
+def generate_cocktails(count, seed=0, vocabulary_size=None):
+    """``iter_cocktails`` as a list"""
+    return list(iter_cocktails(count, seed, vocabulary_size))
+
+
+def generate_shelf(vocabulary, size, seed=0):
+    """Pick ``size`` names from the most common part of ``vocabulary``"""
+    rng = random.Random(seed)
+    common = vocabulary[:max(size * 3, 30)]
+    return rng.sample(common, min(size, len(common)))
+
+
+def write_catalog(path, cocktails):
+    """Stream ``cocktails`` to ``path`` as a JSON array, as load_cocktails.py expects"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for cocktail in cocktails:
+            if count:
+                f.write(',\n')
+            json.dump(cocktail, f, ensure_ascii=False)
+            count += 1
+        f.write(']')
+    return count
+
+
+def iter_users(count, vocabulary, cocktail_ids, shelf_size=25, favorites=5, seed=0):
+    """Yield ``(user, shelf names, favorite cocktail ids)`` for ``count`` users
+
+    Shelf sizes and favorite counts vary around the given means so that
+    per-user routes see a spread of workloads.
+    """
+    rng = random.Random(seed)
+    for user_id in range(1, count + 1):
+        user = {'id': user_id, 'username': f"user{user_id}", 'email': f"user{user_id}@example.com"}
+        shelf = generate_shelf(vocabulary, max(1, int(rng.gauss(shelf_size, shelf_size / 4))), seed=rng.random())
+        picks = rng.sample(cocktail_ids, min(len(cocktail_ids), rng.randint(0, favorites * 2)))
+        yield user, shelf, picks
@@ -0,0 +1,34 @@
+"""
+Gunicorn settings for serving the API and the built frontend
+
+Usage: gunicorn -c gunicorn.conf.py src.main:app
+
+Every value can be overridden from the environment:
+WEB_CONCURRENCY (worker processes), WEB_THREADS (threads per worker),
+PORT, WEB_TIMEOUT and WEB_MAX_REQUESTS.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Threaded workers: requests mostly wait on SQLite and socket I/O, and the
+# in-process caches are shared by all threads of a worker
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so a slow leak can't grow unbounded
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+# Create tables and triggers once in the master instead of racing in each worker
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
@@ -1,98 +1,249 @@
 #!/usr/bin/env python3
 """
 Load cocktail data from JSON file into the database
+
+Usage: python load_cocktails.py [cocktails.json] [--database app.db]
+                                [--mode sync|upsert|replace] [--batch-size N]
+
+The file is parsed as a stream, so catalogs larger than memory load fine.
+``sync`` (the default) inserts new cocktails, rewrites only the ones whose
+``date_modified`` changed and deletes cocktails no longer in the file;
+``upsert`` skips the deletes and ``replace`` reloads everything.  All writes
+go through Core ``executemany`` in a single transaction.
 """
 
+import argparse
 import os
 import sys
 import json
+import time
 
 # Add the src directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
 from src.models.user import db
 from src.models.cocktail import Cocktail
+from src.services.schema import prepare_database
+from src.services.canonical import sync_canonical_ingredients
+from src.services.catalog_snapshot import get_catalog_snapshot
+from src.services.similarity import get_similarity_model
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_JSON_PATH = os.path.join(BASE_DIR, 'cocktails_database.json')
+DEFAULT_DATABASE_PATH = os.path.join(BASE_DIR, 'src', 'database', 'app.db')
+
+LOAD_MODES = ('sync', 'upsert', 'replace')
+
+# Per-connection settings for the load transaction; trade crash durability
+# of this one bulk write for speed, the database file itself stays intact.
+# The connection is discarded afterwards so no later write runs with them
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+]
+
+COCKTAIL_COLUMNS = [column.name for column in Cocktail.__table__.columns]
 
-def create_app():
+def create_app(database_path=DEFAULT_DATABASE_PATH):
     """Create Flask app for database operations"""
     app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'src', 'database', 'app.db')}"
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     db.init_app(app)
     return app
 
-def load_cocktails_from_json():
-    """Load cocktails from JSON file into database"""
-    app = create_app()
-    
-    with app.app_context():
-        # Create tables
-        db.create_all()
-        
-        # Load cocktail data
-        json_path = '/home/ubuntu/cocktails_database.json'
-        if not os.path.exists(json_path):
-            print(f"Error: {json_path} not found")
-            return
-        
-        with open(json_path, 'r', encoding='utf-8') as f:
-            cocktails_data = json.load(f)
-        
-        print(f"Loading {len(cocktails_data)} cocktails...")
-        
-        # Clear existing cocktails
-        Cocktail.query.delete()
-        db.session.commit()
-        
-        # Load new cocktails
-        loaded_count = 0
-        for cocktail_data in cocktails_data:
+def iter_json_array(path, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array without reading it all at once"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not contain a JSON array")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
             try:
-                cocktail = Cocktail(
-                    id=cocktail_data.get('id', ''),
-                    name=cocktail_data.get('name', ''),
-                    category=cocktail_data.get('category', ''),
-                    alcoholic=cocktail_data.get('alcoholic', ''),
-                    glass=cocktail_data.get('glass', ''),
-                    instructions=cocktail_data.get('instructions', ''),
-                    image=cocktail_data.get('image', ''),
-                    video=cocktail_data.get('video', ''),
-                    iba=cocktail_data.get('iba', ''),
-                    date_modified=cocktail_data.get('date_modified', ''),
-                    garnish=cocktail_data.get('garnish', '')
-                )
-                
-                # Set ingredients and tags using properties
-                cocktail.ingredients = cocktail_data.get('ingredients', [])
-                cocktail.tags = cocktail_data.get('tags', [])
-                
-                db.session.add(cocktail)
-                loaded_count += 1
-                
-                # Commit in batches
-                if loaded_count % 100 == 0:
-                    db.session.commit()
-                    print(f"Loaded {loaded_count} cocktails...")
-                    
-            except Exception as e:
-                print(f"Error loading cocktail {cocktail_data.get('name', 'Unknown')}: {e}")
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
                 continue
-        
-        # Final commit
-        db.session.commit()
-        print(f"Successfully loaded {loaded_count} cocktails into database")
-        
+            yield item
+            buffer = buffer[end:]
+            if len(buffer) < chunk_size and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+
+def cocktail_row(cocktail_data):
+    """Map a JSON record onto cocktail table columns"""
+    ingredients = cocktail_data.get('ingredients') or []
+    tags = cocktail_data.get('tags') or []
+    return {
+        'id': str(cocktail_data['id']),
+        'name': cocktail_data.get('name', ''),
+        'category': cocktail_data.get('category', ''),
+        'alcoholic': cocktail_data.get('alcoholic', ''),
+        'glass': cocktail_data.get('glass', ''),
+        'instructions': cocktail_data.get('instructions', ''),
+        'image': cocktail_data.get('image', ''),
+        'ingredients_json': json.dumps(ingredients) if ingredients else None,
+        'video': cocktail_data.get('video', ''),
+        'tags_json': json.dumps(tags) if tags else None,
+        'iba': cocktail_data.get('iba', ''),
+        'date_modified': cocktail_data.get('date_modified', ''),
+        'garnish': cocktail_data.get('garnish', '')
+    }
+
+def _existing_versions(conn):
+    """Map id -> date_modified, or the full row when there is no date to compare"""
+    existing = dict(conn.execute(text("SELECT id, date_modified FROM cocktail")).all())
+    undated = conn.execute(text(
+        f"SELECT {', '.join(COCKTAIL_COLUMNS)} FROM cocktail "
+        f"WHERE date_modified IS NULL OR date_modified = ''"
+    ))
+    for row in undated.mappings():
+        existing[row['id']] = dict(row)
+    return existing
+
+def _is_unchanged(row, stored):
+    if isinstance(stored, dict):
+        return stored == row
+    return bool(row['date_modified']) and stored == row['date_modified']
+
+def load_cocktails(json_path, mode='sync', batch_size=5000):
+    """Load ``json_path`` into the cocktail table; returns a summary dict"""
+    upsert = insert(Cocktail.__table__)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=['id'],
+        set_={name: upsert.excluded[name] for name in COCKTAIL_COLUMNS if name != 'id'}
+    )
+    summary = {'read': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'skipped': 0}
+
+    with db.engine.connect() as conn:
+        try:
+            for pragma in BULK_LOAD_PRAGMAS:
+                conn.exec_driver_sql(pragma)
+            conn.commit()
+            with conn.begin():
+                if mode == 'replace':
+                    conn.execute(Cocktail.__table__.delete())
+                    existing = {}
+                else:
+                    existing = _existing_versions(conn)
+                seen = set()
+                batch = []
+                for cocktail_data in iter_json_array(json_path):
+                    summary['read'] += 1
+                    try:
+                        row = cocktail_row(cocktail_data)
+                    except (KeyError, TypeError, AttributeError) as e:
+                        print(f"Error loading cocktail {cocktail_data.get('name', 'Unknown') if isinstance(cocktail_data, dict) else cocktail_data!r}: {e}")
+                        summary['skipped'] += 1
+                        continue
+                    if row['id'] in seen:
+                        summary['skipped'] += 1
+                        continue
+                    seen.add(row['id'])
+                    stored = existing.get(row['id'])
+                    if stored is None:
+                        summary['inserted'] += 1
+                    elif _is_unchanged(row, stored):
+                        summary['unchanged'] += 1
+                        continue
+                    else:
+                        summary['updated'] += 1
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        conn.execute(upsert, batch)
+                        batch = []
+                        print(f"Loaded {summary['inserted'] + summary['updated']} cocktails...")
+                if batch:
+                    conn.execute(upsert, batch)
+
+                if mode == 'sync':
+                    removed = [{'id': cocktail_id} for cocktail_id in existing if cocktail_id not in seen]
+                    if removed:
+                        conn.execute(
+                            Cocktail.__table__.delete().where(Cocktail.id == db.bindparam('id')),
+                            removed
+                        )
+                    summary['deleted'] = len(removed)
+
+            if summary['inserted'] or summary['updated'] or summary['deleted']:
+                conn.exec_driver_sql("ANALYZE")
+                conn.commit()
+        finally:
+            # The pragmas stay with the connection: discard it instead of
+            # returning it to the pool with synchronous still off
+            conn.invalidate()
+    return summary
+
+def load_cocktails_from_json(json_path=DEFAULT_JSON_PATH, database_path=DEFAULT_DATABASE_PATH,
+                             mode='sync', batch_size=5000):
+    """Load cocktails from JSON file into database"""
+    if not os.path.exists(json_path):
+        print(f"Error: {json_path} not found")
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+    app = create_app(database_path)
+
+    with app.app_context():
+        # Create tables, and the triggers that keep derived tables in sync;
+        # the stamp lets the app boot from this file without redoing it
+        prepare_database()
+
+        started = time.perf_counter()
+        summary = load_cocktails(json_path, mode, batch_size)
+        # Group new ingredient spellings under their canonical ingredient
+        sync_canonical_ingredients()
+        # Save the similarity model and catalog snapshot next to the database
+        # so workers only map them
+        get_similarity_model()
+        get_catalog_snapshot()
+        elapsed = time.perf_counter() - started
+        print(
+            f"Read {summary['read']} cocktails in {elapsed:.2f}s ({mode}): "
+            f"{summary['inserted']} inserted, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {summary['deleted']} deleted, "
+            f"{summary['skipped']} skipped"
+        )
+
         # Verify the data
         total_in_db = Cocktail.query.count()
         print(f"Total cocktails in database: {total_in_db}")
-        
+
         # Show some sample cocktails
         samples = Cocktail.query.limit(5).all()
         print("\nSample cocktails:")
         for cocktail in samples:
             print(f"- {cocktail.name} ({cocktail.category})")
+    return summary
 
-if __name__ == "__main__":
-    load_cocktails_from_json()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load cocktails from a JSON array into the database")
+    parser.add_argument('json_path', nargs='?', default=DEFAULT_JSON_PATH,
+                        help="JSON file holding an array of cocktails (default: %(default)s)")
+    parser.add_argument('--database', default=DEFAULT_DATABASE_PATH,
+                        help="SQLite database file (default: %(default)s)")
+    parser.add_argument('--mode', choices=LOAD_MODES, default='sync',
+                        help="sync: upsert changed rows and delete missing ones; "
+                             "upsert: no deletes; replace: reload everything")
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help="rows per executemany call (default: %(default)s)")
+    args = parser.parse_args(argv)
+    summary = load_cocktails_from_json(args.json_path, args.database, args.mode, args.batch_size)
+    return 0 if summary is not None else 1
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,18 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.cocktail import cocktail_bp
+from src.services.instrumentation import init_instrumentation
+from src.services.catalog_snapshot import get_catalog_snapshot
+from src.services.menus import load_menus
+from src.services.prebuilt import seed_database
+from src.services.schema import prepare_database
+from src.services.static_assets import StaticManifest
+from src.services.sqlite_engine import configure_sqlite, engine_options
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -19,28 +26,35 @@ app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(cocktail_bp, url_prefix='/api')
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join(os.path.dirname(__file__), 'database', 'app.db'))
+app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{DATABASE_PATH}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# One pooled connection per request thread of this worker process
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(int(os.environ.get('WEB_THREADS', 4)))
 db.init_app(app)
 with app.app_context():
-    db.create_all()
+    # A fresh volume starts from the catalog prebuilt into the image
+    seed_database(DATABASE_PATH, os.environ.get('SEED_DATABASE_PATH'))
+    configure_sqlite(db.engine)
+    # Tables, triggers and derived data, unless the file is stamped with this schema
+    prepare_database()
+    # Fail at startup, not on first request, if a menu file is invalid
+    load_menus()
+    # Map (or build once) the catalog snapshot before gunicorn forks workers
+    get_catalog_snapshot()
+    # Query counts, SQL/serialization time, Server-Timing and /api/_metrics
+    init_instrumentation(app, db.engine)
+    # Don't hand connections opened here to forked workers (gunicorn preload_app)
+    db.engine.dispose()
+
+static_assets = StaticManifest(app.static_folder)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    if app.static_folder is None:
             return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
+    return static_assets.response(path)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=True)
@@ -17,6 +17,19 @@ class Cocktail(db.Model):
     date_modified = db.Column(db.String(50))
     garnish = db.Column(db.String(200))
     
+    __table_args__ = (
+        # Keyset pagination order for the cocktail list
+        db.Index('ix_cocktail_name_id', 'name', 'id'),
+        # List filters; trailing (name, id) keeps each filtered page in index order
+        db.Index('ix_cocktail_category_name', 'category', 'name', 'id'),
+        db.Index('ix_cocktail_alcoholic_name', 'alcoholic', 'name', 'id'),
+        db.Index('ix_cocktail_glass_name', 'glass', 'name', 'id'),
+        # Featured fallback (IBA cocktails)
+        db.Index('ix_cocktail_iba', 'iba'),
+        # Export order and its since= filter
+        db.Index('ix_cocktail_date_modified', 'date_modified', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Cocktail {self.name}>'
     
@@ -61,13 +74,87 @@ class Cocktail(db.Model):
             'garnish': self.garnish
         }
 
+class Ingredient(db.Model):
+    """Distinct ingredient names used by catalog and user cocktails"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    name_key = db.Column(db.String(200), nullable=False, unique=True)  # lower(trim(name))
+    # Ingredient this one matches as ("Fresh Lime Juice" -> "Lime juice"); NULL means itself
+    canonical_id = db.Column(db.Integer, db.ForeignKey('ingredient.id'))
+    
+    def __repr__(self):
+        return f'<Ingredient {self.name}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name
+        }
+
+class IngredientAlias(db.Model):
+    """Canonicalized spelling -> canonical ingredient, rebuilt from the catalog"""
+    alias_key = db.Column(db.String(200), primary_key=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredient.id'), nullable=False)
+
+class Tag(db.Model):
+    """Distinct tag names used by catalog and user cocktails"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    name_key = db.Column(db.String(100), nullable=False, unique=True)  # lower(trim(name))
+    
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
+class CocktailIngredient(db.Model):
+    """One ingredient line of a catalog cocktail, derived from ingredients_json"""
+    cocktail_id = db.Column(db.String(50), db.ForeignKey('cocktail.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredient.id'), nullable=False)
+    canonical_id = db.Column(db.Integer, db.ForeignKey('ingredient.id'))
+    measure = db.Column(db.String(100))
+    
+    ingredient = db.relationship('Ingredient', foreign_keys=[ingredient_id])
+    
+    __table_args__ = (
+        db.Index('ix_cocktail_ingredient_ingredient', 'ingredient_id', 'cocktail_id'),
+        db.Index('ix_cocktail_ingredient_canonical', 'canonical_id', 'cocktail_id'),
+    )
+
+class CocktailTag(db.Model):
+    """Tag assignment of a catalog cocktail, derived from tags_json"""
+    cocktail_id = db.Column(db.String(50), db.ForeignKey('cocktail.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_cocktail_tag_tag', 'tag_id', 'cocktail_id'),
+    )
+
+class CatalogState(db.Model):
+    """Single-row catalog version, bumped by triggers on every cocktail write"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.Integer)  # Unix time of the last bump
+    epoch = db.Column(db.String(32))  # random id of this database, set with the row
+
+class CatalogFacetCount(db.Model):
+    """Number of cocktails per category/glass/alcoholic/ingredient/tag value"""
+    facet = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(200), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 class UserBarShelf(db.Model):
     """Track ingredients available in user's bar"""
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     ingredient_name = db.Column(db.String(200), nullable=False)
+    canonical_id = db.Column(db.Integer, db.ForeignKey('ingredient.id'))  # resolved from ingredient_name
     quantity = db.Column(db.String(100))  # Optional quantity tracking
     date_added = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        # One row per spelling; the target of the bar-shelf upserts
+        db.Index('ux_user_bar_shelf_user_ingredient', 'user_id', 'ingredient_name', unique=True),
+    )
     
     def to_dict(self):
         return {
@@ -84,6 +171,11 @@ class UserFavorite(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     cocktail_id = db.Column(db.String(50), db.ForeignKey('cocktail.id'), nullable=False)
     date_added = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        # One row per favorite; the target of the favorite upserts
+        db.Index('ux_user_favorite_user_cocktail', 'user_id', 'cocktail_id', unique=True),
+    )
     
     def to_dict(self):
         return {
@@ -93,6 +185,11 @@ class UserFavorite(db.Model):
             'date_added': self.date_added.isoformat() if self.date_added else None
         }
 
+class UserFavoriteState(db.Model):
+    """Per-user favorites version, bumped by triggers on every favorite write"""
+    user_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 class UserCocktail(db.Model):
     """User's custom cocktail recipes"""
     id = db.Column(db.Integer, primary_key=True)
@@ -105,6 +202,10 @@ class UserCocktail(db.Model):
     tags_json = db.Column(db.Text)
     garnish = db.Column(db.String(200))
     date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index('ix_user_cocktail_user', 'user_id', 'id'),
+    )
     
     @property
     def ingredients(self):
@@ -140,3 +241,26 @@ class UserCocktail(db.Model):
             'date_created': self.date_created.isoformat() if self.date_created else None
         }
 
+
+class UserCocktailIngredient(db.Model):
+    """One ingredient line of a user cocktail, derived from ingredients_json"""
+    user_cocktail_id = db.Column(db.Integer, db.ForeignKey('user_cocktail.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredient.id'), nullable=False)
+    canonical_id = db.Column(db.Integer, db.ForeignKey('ingredient.id'))
+    measure = db.Column(db.String(100))
+    
+    ingredient = db.relationship('Ingredient', foreign_keys=[ingredient_id])
+    
+    __table_args__ = (
+        db.Index('ix_user_cocktail_ingredient_ingredient', 'ingredient_id', 'user_cocktail_id'),
+    )
+
+class UserCocktailTag(db.Model):
+    """Tag assignment of a user cocktail, derived from tags_json"""
+    user_cocktail_id = db.Column(db.Integer, db.ForeignKey('user_cocktail.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_user_cocktail_tag_tag', 'tag_id', 'user_cocktail_id'),
+    )
@@ -1,14 +1,138 @@
-from flask import Blueprint, request, jsonify
-from src.models.user import db
-from src.models.cocktail import Cocktail, UserBarShelf, UserFavorite, UserCocktail
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.models.user import db, User
+from src.models.cocktail import (
+    Cocktail, Ingredient, CocktailIngredient,
+    UserBarShelf, UserFavorite, UserCocktail
+)
+from src.services.bar_shelf import parse_quantity, parse_shelf_changes, apply_shelf_changes, upsert_shelf_items
+from src.services.canonical import get_canonical_lookup, shelf_ingredient_ids
+from src.services.ingredient_index import get_ingredient_index
+from src.services.search import match_expression, search_matches, search_highlights
+from src.services.catalog_metadata import get_metadata_snapshot
+from src.services.catalog_snapshot import get_catalog_snapshot
+from src.services.catalog_version import get_catalog_version
+from src.services.favorites import (
+    parse_favorite_changes, existing_cocktail_ids, add_favorites, remove_favorites,
+    favorite_ids, favorites_cache
+)
+from src.services.export import (
+    NDJSON_MIMETYPE, parse_since, iter_catalog_export, iter_user_export, gzip_chunks
+)
+from src.services.menus import get_menu
+from src.services.random_picker import get_random_pool
+from src.services.response_cache import cached_catalog_response
+from src.services.shopping import plan_purchases
+from src.services.similarity import get_similarity_model
+from src.services.serialization import (
+    dumps, parse_fields, cocktail_columns, encode_cocktails, json_response
+)
+from src.services.pagination import COUNT_MODES, encode_cursor, decode_cursor, count_rows
 from sqlalchemy import or_, and_
+import hashlib
 import json
+import numpy as np
 
 cocktail_bp = Blueprint('cocktail', __name__)
 
+MAX_MISSING_LIMIT = 5
+MAX_RESULTS_LIMIT = 200
+MAX_PER_PAGE = 100
+MAX_RANDOM_LIMIT = 50
+MAX_PURCHASE_BUDGET = 10
+MAX_SIMILAR_LIMIT = 50
+# scope= of the makeable and shopping views
+COCKTAIL_SCOPES = ('catalog', 'favorites')
+# facets= of the cocktail list: its filters, counted per value
+LIST_FACETS = ('category', 'alcoholic', 'glass', 'ingredient')
+
+# Substrings that mark an ingredient as seasonal
+SEASONAL_INGREDIENT_TERMS = ['cranberry', 'pumpkin', 'cinnamon', 'apple']
+
+def _encode_ids(cocktail_ids, fields=None, extras=None):
+    """Encode the given cocktails from the catalog snapshot, in the order of ``cocktail_ids``"""
+    return get_catalog_snapshot().encode_ids(cocktail_ids, fields, extras)
+
+def _int_arg(name, default, upper=None):
+    """Query argument ``name`` as an int of at least 1 (and at most ``upper``); raises ValueError"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    number = max(number, 1)
+    return number if upper is None else min(number, upper)
+
+def _parse_facets(value):
+    """Parse a ``facets=category,glass,...`` argument; raises ValueError for unknown names"""
+    facets = tuple(dict.fromkeys(f.strip() for f in (value or '').split(',') if f.strip()))
+    unknown = [f for f in facets if f not in LIST_FACETS]
+    if unknown:
+        raise ValueError(f"Unknown facet(s): {', '.join(unknown)}; choose from {', '.join(LIST_FACETS)}")
+    return facets
+
+def _facet_counts(snapshot, facets, filters, within=None):
+    """Matching cocktails per value of each facet, most common first
+
+    A facet is counted under every filter except its own, so the sidebar
+    keeps showing the alternatives to the value already picked.  ``filters``
+    maps each facet to its snapshot key (None when unfiltered, ``False``
+    when the value matches nothing); ``within`` narrows to search matches.
+    """
+    counts = {}
+    for facet in facets:
+        others = {f: key for f, key in filters.items() if f != facet}
+        values = {}
+        if False not in others.values():
+            positions = snapshot.filter(**others)
+            if within is not None:
+                positions = np.intersect1d(positions, within, assume_unique=True)
+            per_value = snapshot.facet_counts(facet, positions)
+            present = np.flatnonzero(per_value)
+            for slot in present[np.argsort(-per_value[present], kind='stable')]:
+                values[snapshot.facet_label(facet, int(slot))] = int(per_value[slot])
+        counts[facet] = values
+    return counts
+
+def _with_ingredients(ingredient_ids):
+    """Subquery of cocktail ids using any of the given ingredient ids"""
+    return db.session.query(CocktailIngredient.cocktail_id).filter(
+        CocktailIngredient.ingredient_id.in_(ingredient_ids)
+    )
+
+def _with_canonical_ingredient(canonical_id):
+    """Subquery of cocktail ids using any spelling of a canonical ingredient"""
+    return db.session.query(CocktailIngredient.cocktail_id).filter(
+        CocktailIngredient.canonical_id == canonical_id
+    )
+
+def _ndjson_response(chunks):
+    """Stream NDJSON chunks, gzipped when the client accepts it"""
+    compress = request.accept_encodings['gzip'] > 0
+    if compress:
+        chunks = gzip_chunks(chunks)
+    response = Response(stream_with_context(chunks), mimetype=NDJSON_MIMETYPE)
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-store'
+    # Let nginx pass lines through as they are produced
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @cocktail_bp.route('/cocktails', methods=['GET'])
+@cached_catalog_response
 def get_cocktails():
-    """Get all cocktails with optional filtering and search"""
+    """Get all cocktails with optional filtering and search
+
+    Results are ordered by (name, id), or by (search rank, id) when searching.
+    Pass ``cursor`` (empty for the first page, then each response's
+    ``next_cursor``) to page by key instead of ``page`` offsets.  ``count``
+    selects how ``total`` is computed: ``exact`` (default for page numbers),
+    ``estimate`` or ``none`` (default with a cursor).  ``facets`` (any of
+    category, alcoholic, glass, ingredient) adds per-value match counts.
+    """
     try:
         # Get query parameters
         search = request.args.get('search', '').strip()
@@ -16,138 +140,281 @@ def get_cocktails():
         alcoholic = request.args.get('alcoholic', '').strip()
         glass = request.args.get('glass', '').strip()
         ingredient = request.args.get('ingredient', '').strip()
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 50))
-        
-        # Build query
-        query = Cocktail.query
-        
-        # Apply filters
-        if search:
-            query = query.filter(
-                or_(
-                    Cocktail.name.ilike(f'%{search}%'),
-                    Cocktail.instructions.ilike(f'%{search}%'),
-                    Cocktail.ingredients_json.ilike(f'%{search}%')
-                )
+        cursor = request.args.get('cursor')
+        count_mode = request.args.get('count', 'exact' if cursor is None else 'none')
+        
+        try:
+            page = _int_arg('page', 1)
+            per_page = _int_arg('per_page', 50, MAX_PER_PAGE)
+            fields = parse_fields(request.args.get('fields'))
+            facets = _parse_facets(request.args.get('facets'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if count_mode not in COUNT_MODES:
+            return jsonify({'error': f"count must be one of {', '.join(COUNT_MODES)}"}), 400
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        if category == 'All Categories':
+            category = ''
+        # Match every spelling of the ingredient ("Lime juice" finds "Fresh lime juice")
+        canonical_id = get_canonical_lookup().resolve(ingredient) if ingredient else None
+        # Snapshot facet keys of the filters; an unknown ingredient matches nothing
+        filters = {
+            'category': category or None,
+            'alcoholic': alcoholic or None,
+            'glass': glass or None,
+            'ingredient': False if ingredient and canonical_id is None else canonical_id
+        }
+        snapshot = get_catalog_snapshot()
+        # Search matches the facet counts are confined to, None for the whole catalog
+        matched = None
+        
+        match = match_expression(search) if search else None
+        if not match:
+            # Without a search every filter is a facet of the catalog snapshot,
+            # whose rows are already in (name, id) order
+            if after is not None and not isinstance(after[0], str):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            if False in filters.values():
+                positions = snapshot.all_positions[:0]
+            else:
+                positions = snapshot.filter(**filters)
+            # Counting is free here, so estimates are exact too
+            total, total_exact = (None, False) if count_mode == 'none' else (len(positions), True)
+            
+            if after is not None:
+                start = int(np.searchsorted(positions, snapshot.rank_after(*after)))
+            else:
+                start = (page - 1) * per_page if cursor is None else 0
+            rows = positions[start:start + per_page + 1]
+            
+            next_cursor = None
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                next_cursor = encode_cursor(*snapshot.sort_key(int(rows[-1])))
+            cocktails = snapshot.encode_positions(rows, fields)
+        else:
+            # Build query
+            matches = search_matches(match)
+            query = Cocktail.query.join(
+                matches, Cocktail.id == matches.c.cocktail_id
             )
-        
-        if category and category != 'All Categories':
-            query = query.filter(Cocktail.category == category)
-        
-        if alcoholic:
-            query = query.filter(Cocktail.alcoholic == alcoholic)
-        
-        if glass:
-            query = query.filter(Cocktail.glass == glass)
-        
-        if ingredient:
-            query = query.filter(Cocktail.ingredients_json.ilike(f'%{ingredient}%'))
-        
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
-        cocktails = query.offset((page - 1) * per_page).limit(per_page).all()
-        
-        return jsonify({
-            'cocktails': [cocktail.to_dict() for cocktail in cocktails],
+            sort_column = matches.c.fts_rank
+            
+            if category:
+                query = query.filter(Cocktail.category == category)
+            
+            if alcoholic:
+                query = query.filter(Cocktail.alcoholic == alcoholic)
+            
+            if glass:
+                query = query.filter(Cocktail.glass == glass)
+            
+            if ingredient:
+                query = query.filter(Cocktail.id.in_(_with_canonical_ingredient(canonical_id)))
+            
+            # Get total count
+            total, total_exact = count_rows(query, count_mode)
+            
+            # Apply pagination, fetching one extra row to learn whether more follow
+            query = query.order_by(sort_column, Cocktail.id)
+            if after is not None:
+                query = query.filter(db.tuple_(sort_column, Cocktail.id) > db.tuple_(*after))
+            elif cursor is None:
+                query = query.offset((page - 1) * per_page)
+            query = query.with_entities(*cocktail_columns(fields), sort_column.label('sort_key'))
+            rows = query.limit(per_page + 1).all()
+            
+            next_cursor = None
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                next_cursor = encode_cursor(rows[-1].sort_key, rows[-1].id)
+            
+            highlights = search_highlights(match, [row.id for row in rows])
+            extras = {row.id: {'highlights': highlights.get(row.id)} for row in rows}
+            cocktails = encode_cocktails(rows, fields, extras)
+            if facets:
+                matched = np.sort(snapshot.positions_of(db.session.execute(
+                    db.select(Cocktail.id).join(
+                        matches, Cocktail.id == matches.c.cocktail_id
+                    )
+                ).scalars()))
+        
+        response = {
             'total': total,
-            'page': page,
+            'total_exact': total_exact,
             'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
-        })
+            'next_cursor': next_cursor
+        }
+        if cursor is None:
+            response['page'] = page
+            response['pages'] = (total + per_page - 1) // per_page if total is not None else None
+        if facets:
+            response['facets'] = _facet_counts(snapshot, facets, filters, matched)
+        return json_response(response, cocktails=cocktails)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @cocktail_bp.route('/cocktails/<cocktail_id>', methods=['GET'])
+@cached_catalog_response
 def get_cocktail(cocktail_id):
     """Get a specific cocktail by ID"""
     try:
-        cocktail = Cocktail.query.get_or_404(cocktail_id)
-        return jsonify(cocktail.to_dict())
+        snapshot = get_catalog_snapshot()
+        position = snapshot.position(cocktail_id)
+        if position is None:
+            return jsonify({'error': 'Cocktail not found'}), 404
+        return json_response(snapshot.encode(position))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/cocktails/<cocktail_id>/similar', methods=['GET'])
+@cached_catalog_response
+def get_similar_cocktails(cocktail_id):
+    """Get the ``k`` cocktails most similar by shared ingredients and tags
+
+    Each result carries its cosine ``similarity`` and the
+    ``shared_ingredients``/``shared_tags`` behind it.
+    """
+    try:
+        try:
+            k = _int_arg('k', 10, MAX_SIMILAR_LIMIT)
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        model = get_similarity_model()
+        position = model.position(cocktail_id)
+        if position is None:
+            return jsonify({'error': 'Cocktail not found'}), 404
+        
+        similar = model.similar(position, k)
+        similar_ids = [str(model.cocktail_ids[p]) for p, _ in similar]
+        extras = {}
+        for similar_id, (p, score) in zip(similar_ids, similar):
+            ingredients, tags = model.shared(position, p)
+            extras[similar_id] = {
+                'similarity': round(score, 4),
+                'shared_ingredients': ingredients,
+                'shared_tags': tags
+            }
+        cocktails = _encode_ids(similar_ids, fields, extras)
+        
+        return json_response({'cocktail_id': cocktail_id, 'k': k}, cocktails=cocktails)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/cocktails/export', methods=['GET'])
+def export_cocktails():
+    """Stream the catalog as NDJSON, one cocktail per line
+
+    Lines are ordered by (date_modified, id); ``since`` keeps the cocktails
+    modified at or after that time for incremental syncs.  ``fields``
+    works as on the list (``fields=id`` lists every id, to find deletions).
+    """
+    try:
+        try:
+            since = parse_since(request.args.get('since'))
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        response = _ndjson_response(iter_catalog_export(since, fields))
+        response.headers['X-Catalog-Version'] = str(get_catalog_version())
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @cocktail_bp.route('/cocktails/random', methods=['GET'])
 def get_random_cocktail():
-    """Get a random cocktail"""
+    """Get a random cocktail, or ``n`` distinct ones as ``{'cocktails': [...]}``
+
+    ``category`` and ``alcoholic`` narrow the draw.  Picks come from cached
+    id lists, so the cost does not depend on the catalog size.
+    """
     try:
-        cocktail = Cocktail.query.order_by(db.func.random()).first()
-        if cocktail:
-            return jsonify(cocktail.to_dict())
+        count = request.args.get('n')
+        category = request.args.get('category', '').strip()
+        if category == 'All Categories':
+            category = ''
+        alcoholic = request.args.get('alcoholic', '').strip()
+        
+        try:
+            n = _int_arg('n', 1, MAX_RANDOM_LIMIT)
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        cocktail_ids = get_random_pool().pick(n, category, alcoholic)
+        if count is not None:
+            return json_response({}, cocktails=_encode_ids(cocktail_ids, fields))
+        snapshot = get_catalog_snapshot()
+        positions = snapshot.positions_of(cocktail_ids)
+        if positions:
+            return json_response(snapshot.encode(positions[0], fields))
         return jsonify({'error': 'No cocktails found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @cocktail_bp.route('/cocktails/featured', methods=['GET'])
+@cached_catalog_response
 def get_featured_cocktails():
     """Get featured cocktails (signature cocktails)"""
     try:
-        featured = Cocktail.query.filter(
-            Cocktail.tags_json.ilike('%signature%')
-        ).all()
-        
-        if not featured:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        snapshot = get_catalog_snapshot()
+        featured = snapshot.facet('tag', 'signature')
+        
+        if not len(featured):
             # Fallback to IBA cocktails
-            featured = Cocktail.query.filter(
-                Cocktail.iba.isnot(None),
-                Cocktail.iba != ''
-            ).limit(10).all()
+            featured = snapshot.facet_union('iba', snapshot.facet_keys['iba'])[:10]
         
-        return jsonify([cocktail.to_dict() for cocktail in featured])
+        return json_response(snapshot.encode_positions(featured, fields))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @cocktail_bp.route('/cocktails/seasonal', methods=['GET'])
+@cached_catalog_response
 def get_seasonal_cocktails():
     """Get seasonal cocktails"""
     try:
-        # For now, return cocktails with seasonal ingredients or tags
-        seasonal = Cocktail.query.filter(
-            or_(
-                Cocktail.tags_json.ilike('%seasonal%'),
-                Cocktail.ingredients_json.ilike('%cranberry%'),
-                Cocktail.ingredients_json.ilike('%pumpkin%'),
-                Cocktail.ingredients_json.ilike('%cinnamon%'),
-                Cocktail.ingredients_json.ilike('%apple%')
-            )
-        ).limit(20).all()
-        
-        return jsonify([cocktail.to_dict() for cocktail in seasonal])
+        # Cocktails tagged seasonal or using a seasonal ingredient; the
+        # substring match only scans the small ingredient dictionary
+        seasonal_ingredients = db.session.query(Ingredient.id).filter(
+            or_(*[Ingredient.name_key.contains(term) for term in SEASONAL_INGREDIENT_TERMS])
+        )
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        snapshot = get_catalog_snapshot()
+        with_ingredient = db.session.execute(
+            _with_ingredients(seasonal_ingredients).distinct().statement
+        ).scalars()
+        seasonal = np.union1d(
+            snapshot.facet('tag', 'seasonal'), snapshot.positions_of(with_ingredient)
+        )[:20]
+        
+        return json_response(snapshot.encode_positions(seasonal, fields))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @cocktail_bp.route('/metadata', methods=['GET'])
 def get_metadata():
-    """Get cocktail metadata (categories, glasses, ingredients)"""
+    """Get cocktail metadata (categories, glasses, ingredients and their counts)"""
     try:
-        # Get unique categories
-        categories = db.session.query(Cocktail.category).distinct().filter(
-            Cocktail.category.isnot(None)
-        ).all()
-        categories = [cat[0] for cat in categories if cat[0]]
-        
-        # Get unique glasses
-        glasses = db.session.query(Cocktail.glass).distinct().filter(
-            Cocktail.glass.isnot(None)
-        ).all()
-        glasses = [glass[0] for glass in glasses if glass[0]]
-        
-        # Get ingredients from JSON (this is more complex, simplified for now)
-        ingredients = set()
-        cocktails = Cocktail.query.all()
-        for cocktail in cocktails:
-            for ingredient in cocktail.ingredients:
-                if ingredient.get('name'):
-                    ingredients.add(ingredient['name'])
-        
-        return jsonify({
-            'categories': sorted(categories),
-            'glasses': sorted(glasses),
-            'ingredients': sorted(list(ingredients))
-        })
+        etag, body = get_metadata_snapshot()
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -165,34 +432,51 @@ def get_user_bar_shelf(user_id):
 def add_to_bar_shelf(user_id):
     """Add ingredient to user's bar shelf"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
         ingredient_name = data.get('ingredient_name')
-        quantity = data.get('quantity', '')
         
         if not ingredient_name:
             return jsonify({'error': 'Ingredient name is required'}), 400
+        try:
+            quantity = parse_quantity(data.get('quantity'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Check if ingredient already exists
-        existing = UserBarShelf.query.filter_by(
+        # The upsert settles races; this only picks the status code
+        existed = db.session.query(UserBarShelf.id).filter_by(
             user_id=user_id,
             ingredient_name=ingredient_name
-        ).first()
+        ).first() is not None
         
-        if existing:
-            existing.quantity = quantity
-            db.session.commit()
-            return jsonify(existing.to_dict())
+        upsert_shelf_items(user_id, {ingredient_name: quantity})
+        db.session.commit()
         
-        # Create new ingredient
-        ingredient = UserBarShelf(
+        ingredient = UserBarShelf.query.filter_by(
             user_id=user_id,
-            ingredient_name=ingredient_name,
-            quantity=quantity
-        )
-        db.session.add(ingredient)
-        db.session.commit()
+            ingredient_name=ingredient_name
+        ).one()
+        return jsonify(ingredient.to_dict()), 200 if existed else 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/users/<int:user_id>/bar-shelf/batch', methods=['POST'])
+def update_bar_shelf(user_id):
+    """Add, update and remove many shelf ingredients in one transaction"""
+    try:
+        try:
+            additions, removals = parse_shelf_changes(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify(ingredient.to_dict()), 201
+        before, after = apply_shelf_changes(user_id, additions, removals)
+        
+        ingredients = UserBarShelf.query.filter_by(user_id=user_id).order_by(UserBarShelf.id)
+        return jsonify({
+            'shelf': [ingredient.to_dict() for ingredient in ingredients],
+            'makeable': {'before': before, 'after': after, 'delta': after - before}
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -214,182 +498,108 @@ def remove_from_bar_shelf(user_id, ingredient_id):
 
 @cocktail_bp.route('/users/<int:user_id>/cocktails', methods=['GET'])
 def get_user_cocktails(user_id):
-    """Get user's custom cocktails - Fall 2025 Main Menu"""
+    """Get the current house menu (Fall 2025) followed by the user's own cocktails"""
     try:
-        # Hardcode Fall 2025 menu data for reliability
-        fall_menu = [
-            {
-                "id": "fall_2025_001",
-                "name": "Orchard Mule",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Copper Mule Mug",
-                "instructions": "Add vodka, cloudy apple cider, fresh lime juice, and house-spiced demerara syrup to a copper mule mug filled with ice. Top with ginger beer and stir gently. Garnish with cinnamon stick, dehydrated apple wheel, and star anise.",
-                "image": "https://images.unsplash.com/photo-1544145945-f90425340c7e?w=400",
-                "ingredients": [
-                    {"name": "Vodka", "measure": "1.5 oz"},
-                    {"name": "Cloudy Apple Cider", "measure": "2 oz"},
-                    {"name": "Fresh Lime Juice", "measure": "0.5 oz"},
-                    {"name": "House-Spiced Demerara Syrup", "measure": "0.25 oz"},
-                    {"name": "Ginger Beer", "measure": "2 oz"}
-                ],
-                "garnish": "Cinnamon stick, dehydrated apple wheel, star anise",
-                "tags": ["Crisp", "Spiced", "Effervescent", "Seasonal"],
-                "notes": "Crowd-pleaser; rustic visual, easy to batch syrup in advance"
-            },
-            {
-                "id": "fall_2025_002",
-                "name": "Autumn Ember",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Highball",
-                "instructions": "Use dark rum infused with fig & spice for 24-48 hours. Add rum, fresh lime juice, and demerara syrup to a highball glass filled with ice. Top with ginger beer and stir gently. Garnish with fig slice, Luxardo cherry, and cinnamon stick.",
-                "image": "https://images.unsplash.com/photo-1536935338788-846bb9981813?w=400",
-                "ingredients": [
-                    {"name": "Dark Rum (fig & spice infused)", "measure": "1.5 oz"},
-                    {"name": "Fresh Lime Juice", "measure": "0.75 oz"},
-                    {"name": "Demerara Syrup", "measure": "0.25 oz"},
-                    {"name": "Ginger Beer", "measure": "2 oz"}
-                ],
-                "garnish": "Fig slice, Luxardo cherry, cinnamon stick",
-                "tags": ["Dark", "Spiced", "Fig-forward"],
-                "notes": "Bold fall cocktail; photogenic, visually rich"
-            },
-            {
-                "id": "fall_2025_003",
-                "name": "Blood Orange Cava Spritz",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Wine Glass",
-                "instructions": "Add Aperol and blood orange liqueur to a wine glass filled with ice. Top with Cava and soda water. Stir gently and garnish with dehydrated blood orange wheel and optional mint.",
-                "image": "https://images.unsplash.com/photo-1551538827-9c037cb4f32a?w=400",
-                "ingredients": [
-                    {"name": "Aperol", "measure": "1 oz"},
-                    {"name": "Blood Orange Liqueur", "measure": "0.5 oz"},
-                    {"name": "Cava", "measure": "3 oz"},
-                    {"name": "Soda Water", "measure": "0.5 oz"}
-                ],
-                "garnish": "Dehydrated blood orange wheel, optional mint",
-                "tags": ["Bright", "Fizzy", "Citrus-forward"],
-                "notes": "Refreshing, photogenic, keeps high menu visibility"
-            },
-            {
-                "id": "fall_2025_004",
-                "name": "Mill Manhattan",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Coupe",
-                "instructions": "Add rye whiskey, sweet vermouth, and Angostura bitters to a mixing glass filled with ice. Stir well and strain into a chilled coupe glass. Garnish with a Luxardo cherry.",
-                "image": "https://images.unsplash.com/photo-1470337458703-46ad1756a187?w=400",
-                "ingredients": [
-                    {"name": "Rye Whiskey", "measure": "2 oz"},
-                    {"name": "Sweet Vermouth", "measure": "0.75 oz"},
-                    {"name": "Angostura Bitters", "measure": "2 dashes"}
-                ],
-                "garnish": "Luxardo Cherry",
-                "tags": ["Premium", "Rye-forward", "Bitter-sweet"],
-                "notes": "Price anchor; high-margin, classic presentation"
-            },
-            {
-                "id": "fall_2025_005",
-                "name": "Apple Martini",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Coupe",
-                "instructions": "Add Grey Goose vodka and dry vermouth to a mixing glass filled with ice. Stir well and strain into a chilled coupe glass. Garnish with 2 blue cheese stuffed olives.",
-                "image": "https://images.unsplash.com/photo-1514362545857-3bc16c4c7d1b?w=400",
-                "ingredients": [
-                    {"name": "Grey Goose Vodka", "measure": "2 oz"},
-                    {"name": "Dry Vermouth", "measure": "0.25 oz"}
-                ],
-                "garnish": "2 Blue Cheese Stuffed Olives",
-                "tags": ["Crisp", "Savory", "Ultra-dry"],
-                "notes": "Tribute drink; high-contrast, Instagram-ready"
-            },
-            {
-                "id": "fall_2025_006",
-                "name": "Harvest Float",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Rocks Glass",
-                "instructions": "Add vodka and coffee liqueur to a rocks glass filled with ice. Slowly float the pumpkin cream mixture on top. Garnish with nutmeg dusting and cinnamon stick.",
-                "image": "https://images.unsplash.com/photo-1509440159596-0249088772ff?w=400",
-                "ingredients": [
-                    {"name": "Vodka", "measure": "1 oz"},
-                    {"name": "Coffee Liqueur", "measure": "0.5 oz"},
-                    {"name": "Pumpkin Cream Float", "measure": "0.5-0.75 oz"}
-                ],
-                "garnish": "Nutmeg dusting, cinnamon stick",
-                "tags": ["Creamy", "Spiced", "Indulgent"],
-                "notes": "Seasonal dessert cocktail; layered float visually striking"
-            },
-            {
-                "id": "fall_2025_007",
-                "name": "Espressotini",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Coupe",
-                "instructions": "Add vodka, coffee liqueur, and fresh espresso to a cocktail shaker filled with ice. Shake vigorously and strain into a chilled coupe glass. Garnish with cocoa stencil or vanilla garnish.",
-                "image": "https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=400",
-                "ingredients": [
-                    {"name": "Vodka", "measure": "1.5 oz"},
-                    {"name": "Coffee Liqueur", "measure": "1 oz"},
-                    {"name": "Fresh Espresso", "measure": "0.5 oz"}
-                ],
-                "garnish": "Cocoa stencil or vanilla garnish",
-                "tags": ["Coffee-forward", "Bold", "Dessert"],
-                "notes": "Second dessert option; aromatic and photogenic"
-            },
-            {
-                "id": "fall_2025_008",
-                "name": "Cucumber Elder Collins",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Collins Glass",
-                "instructions": "Muddle 2-3 cucumber slices in the bottom of a Collins glass. Add gin, elderflower liqueur, fresh lemon juice, and ruby red grapefruit juice. Fill with ice and top with soda water. Garnish with cucumber ribbon spiraling inside glass and lemon wheel.",
-                "image": "https://images.unsplash.com/photo-1551538827-9c037cb4f32a?w=400",
-                "ingredients": [
-                    {"name": "Gin", "measure": "1.5 oz"},
-                    {"name": "Elderflower Liqueur", "measure": "0.5 oz"},
-                    {"name": "Fresh Lemon Juice", "measure": "0.75 oz"},
-                    {"name": "Ruby Red Grapefruit Juice", "measure": "1 oz"},
-                    {"name": "Cucumber Slices", "measure": "2-3 slices"},
-                    {"name": "Soda Water", "measure": "2 oz"}
-                ],
-                "garnish": "Cucumber ribbon spiraling inside glass, lemon wheel",
-                "tags": ["Herbal", "Crisp", "Refreshing"],
-                "notes": "Bright, visual, refreshing; perfect for contrast to heavier cocktails"
-            },
-            {
-                "id": "fall_2025_009",
-                "name": "Chili-Pama Margarita",
-                "category": "Cocktail",
-                "alcoholic": "Alcoholic",
-                "glass": "Rocks Glass",
-                "instructions": "Rim rocks glass with chili-salt. Add tequila blanco, Pama liqueur, fresh lime juice, and agave syrup to a cocktail shaker filled with ice. Shake well and strain into the prepared glass over fresh ice. Garnish with lime wheel.",
-                "image": "https://images.unsplash.com/photo-1551538827-9c037cb4f32a?w=400",
-                "ingredients": [
-                    {"name": "Tequila Blanco", "measure": "1.5 oz"},
-                    {"name": "Pama Liqueur", "measure": "0.5 oz"},
-                    {"name": "Fresh Lime Juice", "measure": "1 oz"},
-                    {"name": "Agave Syrup", "measure": "0.25 oz"}
-                ],
-                "garnish": "Chili-salt rim, lime wheel",
-                "tags": ["Tart", "Spicy", "Ruby-red elegance"],
-                "notes": "Elegant tart/spicy combo; visually strong, color-forward"
-            }
+        menu = get_menu()
+        # One range scan of ix_user_cocktail_user
+        own = [
+            dumps(cocktail.to_dict())
+            for cocktail in UserCocktail.query.filter_by(user_id=user_id).order_by(UserCocktail.id)
         ]
-        
-        return jsonify(fall_menu)
+        body = b'[' + b','.join(part for part in [menu.body, *own] if part) + b']'
+        etag = menu.etag
+        if own:
+            etag += '-' + hashlib.sha1(b','.join(own)).hexdigest()[:12]
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['X-Menu-Version'] = str(menu.version)
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @cocktail_bp.route('/users/<int:user_id>/favorites', methods=['GET'])
 def get_user_favorites(user_id):
-    """Get user's favorite cocktails - should be empty"""
+    """Get user's favorite cocktails, most recently added first"""
+    try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return json_response(_encode_ids(favorite_ids(user_id), fields))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/users/<int:user_id>/favorites', methods=['POST'])
+def add_favorite(user_id):
+    """Add a cocktail to the user's favorites"""
+    try:
+        data = request.get_json(silent=True)
+        cocktail_id = data.get('cocktail_id') if isinstance(data, dict) else None
+        
+        if not isinstance(cocktail_id, str) or not cocktail_id.strip():
+            return jsonify({'error': 'Cocktail id is required'}), 400
+        if not existing_cocktail_ids([cocktail_id]):
+            return jsonify({'error': 'Cocktail not found'}), 404
+        
+        added = add_favorites(user_id, [cocktail_id])
+        db.session.commit()
+        favorites_cache.discard(user_id)
+        
+        favorite = UserFavorite.query.filter_by(user_id=user_id, cocktail_id=cocktail_id).one()
+        return jsonify(favorite.to_dict()), 201 if added else 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/users/<int:user_id>/favorites/batch', methods=['POST'])
+def update_favorites(user_id):
+    """Add and remove many favorites in one transaction
+
+    Ids not in the catalog are skipped and listed under ``unknown``.
+    """
+    try:
+        try:
+            additions, removals = parse_favorite_changes(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        known = existing_cocktail_ids(additions)
+        added = add_favorites(user_id, [c for c in additions if c in known])
+        removed = remove_favorites(user_id, removals)
+        db.session.commit()
+        favorites_cache.discard(user_id)
+        
+        return jsonify({
+            'favorites': list(favorite_ids(user_id)),
+            'added': added,
+            'removed': removed,
+            'unknown': [c for c in additions if c not in known]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/users/<int:user_id>/favorites/<cocktail_id>', methods=['DELETE'])
+def remove_favorite(user_id, cocktail_id):
+    """Remove a cocktail from the user's favorites"""
     try:
-        # Always return empty array for favorites
-        return jsonify([])
+        if not remove_favorites(user_id, [cocktail_id]):
+            return jsonify({'error': 'Favorite not found'}), 404
+        db.session.commit()
+        favorites_cache.discard(user_id)
+        
+        return jsonify({'message': 'Favorite removed successfully'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/users/<int:user_id>/export', methods=['GET'])
+def export_user_data(user_id):
+    """Stream a user's profile, bar shelf, favorites and own cocktails as NDJSON"""
+    try:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return jsonify({'error': 'User not found'}), 404
+        return _ndjson_response(iter_user_export(user))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -397,7 +607,9 @@ def get_user_favorites(user_id):
 def create_user_cocktail(user_id):
     """Create a new user cocktail"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
         
         cocktail = UserCocktail(
             user_id=user_id,
@@ -422,48 +634,96 @@ def create_user_cocktail(user_id):
 
 @cocktail_bp.route('/users/<int:user_id>/makeable', methods=['GET'])
 def get_makeable_cocktails(user_id):
-    """Get cocktails that can be made with user's bar shelf"""
+    """Get cocktails that can be made with user's bar shelf
+
+    ``scope=favorites`` only returns the user's favorite cocktails.
+    """
     try:
-        # Get user's ingredients
-        user_ingredients = UserBarShelf.query.filter_by(user_id=user_id).all()
-        user_ingredient_names = {ing.ingredient_name.lower() for ing in user_ingredients}
-        
-        if not user_ingredient_names:
-            return jsonify([])
+        scope = request.args.get('scope', 'catalog')
+        if scope not in COCKTAIL_SCOPES:
+            return jsonify({'error': f"scope must be one of {', '.join(COCKTAIL_SCOPES)}"}), 400
         
-        # Find cocktails that can be made
-        makeable = []
-        cocktails = Cocktail.query.all()
+        # Get user's ingredients as canonical ids
+        user_ingredient_ids = shelf_ingredient_ids(user_id)
         
-        for cocktail in cocktails:
-            cocktail_ingredients = {ing['name'].lower() for ing in cocktail.ingredients}
-            if cocktail_ingredients.issubset(user_ingredient_names):
-                makeable.append(cocktail.to_dict())
+        if not user_ingredient_ids:
+            return jsonify([])
         
-        return jsonify(makeable)
+        # Intersect the shelf with the inverted ingredient index
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        makeable_ids = get_ingredient_index().makeable(user_ingredient_ids)
+        if scope == 'favorites':
+            favorites = set(favorite_ids(user_id))
+            makeable_ids = [c for c in makeable_ids if c in favorites]
+        return json_response(_encode_ids(makeable_ids, fields))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cocktail_bp.route('/users/<int:user_id>/almost-makeable', methods=['GET'])
+def get_almost_makeable_cocktails(user_id):
+    """Get cocktails missing at most ``max_missing`` ingredients from the bar shelf"""
+    try:
+        try:
+            max_missing = _int_arg('max_missing', 1, MAX_MISSING_LIMIT)
+            limit = _int_arg('limit', 50, MAX_RESULTS_LIMIT)
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        user_ingredient_ids = shelf_ingredient_ids(user_id)
+        
+        index = get_ingredient_index()
+        positions, missing_counts = index.almost_makeable(user_ingredient_ids, max_missing)
+        
+        # Bottles that would each complete the most one-away cocktails
+        one_away = positions[missing_counts == 1]
+        _, unlocking = index.missing_ingredients(one_away, user_ingredient_ids)
+        unlock_counts = np.bincount(unlocking, minlength=len(index.ingredient_names))
+        top_unlocks = np.argsort(-unlock_counts, kind='stable')[:10]
+        
+        # Only the returned page needs its missing ingredients spelled out
+        page = positions[:limit]
+        page_ids = [index.cocktail_ids[p] for p in page]
+        owners, missing = index.missing_ingredients(page, user_ingredient_ids)
+        missing_by_id = {cocktail_id: [] for cocktail_id in page_ids}
+        for owner, ingredient_id in zip(owners.tolist(), missing.tolist()):
+            missing_by_id[page_ids[owner]].append(index.ingredient_names[ingredient_id])
+        
+        extras = {
+            cocktail_id: {'missing_count': len(names), 'missing_ingredients': names}
+            for cocktail_id, names in missing_by_id.items()
+        }
+        cocktails = _encode_ids(page_ids, fields, extras)
+        
+        return json_response({
+            'total': int(len(positions)),
+            'max_missing': max_missing,
+            'unlocks': [
+                {'ingredient': index.ingredient_names[i], 'cocktails': int(unlock_counts[i])}
+                for i in top_unlocks if unlock_counts[i]
+            ]
+        }, cocktails=cocktails)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _favorite_positions(index, user_id):
+    """Index positions of the user's favorite cocktails"""
+    return index.positions_of(favorite_ids(user_id))
+
 @cocktail_bp.route('/users/<int:user_id>/shopping-list', methods=['GET'])
 def get_shopping_list(user_id):
     """Generate shopping list for missing ingredients"""
     try:
-        # Get user's current ingredients
-        user_ingredients = UserBarShelf.query.filter_by(user_id=user_id).all()
-        user_ingredient_names = {ing.ingredient_name.lower() for ing in user_ingredients}
-        
-        # Get user's favorite cocktails
-        favorites = db.session.query(Cocktail).join(
-            UserFavorite, Cocktail.id == UserFavorite.cocktail_id
-        ).filter(UserFavorite.user_id == user_id).all()
-        
-        # Calculate missing ingredients
-        missing_ingredients = set()
-        for cocktail in favorites:
-            for ingredient in cocktail.ingredients:
-                ingredient_name = ingredient['name'].lower()
-                if ingredient_name not in user_ingredient_names:
-                    missing_ingredients.add(ingredient['name'])
+        # Get user's current ingredients as canonical ids
+        user_ingredient_ids = shelf_ingredient_ids(user_id)
+        
+        # Missing ingredients of the user's favorite cocktails, from the index
+        index = get_ingredient_index()
+        _, missing = index.missing_ingredients(_favorite_positions(index, user_id), user_ingredient_ids)
+        missing_ingredients = {index.ingredient_names[i] for i in np.unique(missing)}
         
         return jsonify({
             'missing_ingredients': sorted(list(missing_ingredients)),
@@ -472,3 +732,40 @@ def get_shopping_list(user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@cocktail_bp.route('/users/<int:user_id>/shopping-list/optimize', methods=['GET'])
+def optimize_shopping_list(user_id):
+    """Choose up to ``budget`` bottles to buy that unlock the most cocktails
+
+    ``scope=favorites`` only counts the user's favorite cocktails.
+    """
+    try:
+        scope = request.args.get('scope', 'catalog')
+        if scope not in COCKTAIL_SCOPES:
+            return jsonify({'error': f"scope must be one of {', '.join(COCKTAIL_SCOPES)}"}), 400
+        
+        try:
+            budget = _int_arg('budget', 3, MAX_PURCHASE_BUDGET)
+            limit = _int_arg('limit', 50, MAX_RESULTS_LIMIT)
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        user_ingredient_ids = shelf_ingredient_ids(user_id)
+        
+        index = get_ingredient_index()
+        positions = _favorite_positions(index, user_id) if scope == 'favorites' else None
+        plan = plan_purchases(index, user_ingredient_ids, budget, positions)
+        
+        unlocked_ids = [index.cocktail_ids[p] for p in plan.unlocked[:limit]]
+        return json_response({
+            'budget': budget,
+            'scope': scope,
+            'purchases': [
+                {'ingredient': index.ingredient_names[i], 'unlocks': gain}
+                for i, gain in zip(plan.ingredients, plan.gains)
+            ],
+            'unlocked_total': int(len(plan.unlocked))
+        }, cocktails=_encode_ids(unlocked_ids, fields))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
@@ -0,0 +1,136 @@
+"""
+Bar-shelf writes as single-transaction upserts
+
+Every change goes through ``INSERT ... ON CONFLICT DO UPDATE`` against the
+unique (user_id, ingredient_name) index, so concurrent requests cannot
+create duplicate rows and a whole batch costs one commit.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+
+from src.models.user import db
+from src.models.cocktail import UserBarShelf
+from src.services.canonical import get_canonical_lookup, shelf_ingredient_ids
+from src.services.ingredient_index import get_ingredient_index
+
+MAX_SHELF_BATCH = 500
+
+
+def dedupe_bar_shelf():
+    """Keep the newest row per (user, ingredient name) so the unique index can be built"""
+    db.session.execute(text(
+        "DELETE FROM user_bar_shelf WHERE id NOT IN "
+        "(SELECT max(id) FROM user_bar_shelf GROUP BY user_id, ingredient_name)"
+    ))
+    db.session.commit()
+
+
+def parse_quantity(value):
+    """Stored form of a shelf ``quantity``: a string, a number as text, or ''"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError('quantity must be a string or a number')
+
+
+def parse_shelf_changes(data):
+    """Validate a batch body into (additions, removals)
+
+    ``add`` is a list of ``{"ingredient_name", "quantity"}`` objects (or bare
+    names); ``remove`` holds ingredient names or shelf row ids.  A name both
+    added and removed ends up removed.  Raises ``ValueError`` on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object with "add" and/or "remove"')
+    add = data.get('add') or []
+    remove = data.get('remove') or []
+    if not isinstance(add, list) or not isinstance(remove, list):
+        raise ValueError('"add" and "remove" must be lists')
+    if len(add) + len(remove) > MAX_SHELF_BATCH:
+        raise ValueError(f'At most {MAX_SHELF_BATCH} changes per request')
+
+    additions = {}
+    for item in add:
+        if isinstance(item, str):
+            item = {'ingredient_name': item}
+        name = item.get('ingredient_name') if isinstance(item, dict) else None
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError('Every added item needs an ingredient_name')
+        # Later entries for the same name win, as they would one POST at a time
+        additions[name] = parse_quantity(item.get('quantity'))
+
+    removed_names, removed_ids = set(), set()
+    for item in remove:
+        if isinstance(item, bool) or not isinstance(item, (str, int)):
+            raise ValueError('Removed items must be ingredient names or shelf ids')
+        if isinstance(item, int):
+            removed_ids.add(item)
+        else:
+            removed_names.add(item)
+    for name in removed_names:
+        additions.pop(name, None)
+    return additions, (removed_names, removed_ids)
+
+
+def upsert_shelf_items(user_id, additions):
+    """Insert or update ``{ingredient name: quantity}`` in one statement; no commit"""
+    if not additions:
+        return
+    lookup = get_canonical_lookup()
+    statement = insert(UserBarShelf)
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserBarShelf.user_id, UserBarShelf.ingredient_name],
+        set_={
+            'quantity': statement.excluded.quantity,
+            'canonical_id': statement.excluded.canonical_id,
+        }
+    )
+    db.session.execute(statement, [
+        {
+            'user_id': user_id,
+            'ingredient_name': name,
+            'canonical_id': lookup.resolve(name),
+            'quantity': quantity,
+        }
+        for name, quantity in additions.items()
+    ])
+
+
+def remove_shelf_items(user_id, names=(), ids=()):
+    """Delete shelf rows by ingredient name or row id; no commit"""
+    conditions = []
+    if names:
+        conditions.append(UserBarShelf.ingredient_name.in_(list(names)))
+    if ids:
+        conditions.append(UserBarShelf.id.in_(list(ids)))
+    if conditions:
+        db.session.execute(
+            db.delete(UserBarShelf)
+            .where(UserBarShelf.user_id == user_id)
+            .where(db.or_(*conditions))
+        )
+
+
+def makeable_count(user_id):
+    """Number of catalog cocktails the user's shelf covers"""
+    shelf = shelf_ingredient_ids(user_id)
+    if not shelf:
+        return 0
+    return len(get_ingredient_index().makeable(shelf))
+
+
+def apply_shelf_changes(user_id, additions, removals):
+    """Apply a parsed batch in one transaction and report the makeable delta
+
+    Returns ``(before, after)`` makeable counts.
+    """
+    before = makeable_count(user_id)
+    removed_names, removed_ids = removals
+    upsert_shelf_items(user_id, additions)
+    remove_shelf_items(user_id, removed_names, removed_ids)
+    db.session.commit()
+    return before, makeable_count(user_id)
@@ -0,0 +1,226 @@
+"""
+Canonical ingredient ids, so shelves and recipes match on integers
+
+``canonical_key`` folds a name to the spelling it should match as: accents,
+case, punctuation and parenthesized notes are dropped, a leading "fresh"
+goes ("Fresh Lime Juice" -> "lime juice"), known synonyms are merged and
+brand names resolve to their spirit ("Grey Goose Vodka" -> "vodka").
+
+``sync_canonical_ingredients`` groups the catalog's ingredients by that key,
+points each one's ``canonical_id`` at the group's plain-named member (the
+triggers copy it onto the link rows), rewrites the ``ingredient_alias``
+table and resolves the bar shelves.  Requests only read the resulting ids;
+the per-version ``CanonicalLookup`` resolves names that come in from users,
+falling back to the ingredient table for names added since the last sync.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+from sqlalchemy import text
+
+from src.models.user import db
+from src.models.cocktail import Ingredient, IngredientAlias, UserBarShelf
+from src.services.catalog_cache import CatalogCache
+from src.services.catalog_version import bump_catalog_version
+
+_PARENTHETICAL_RE = re.compile(r'\([^)]*\)')
+_SEPARATOR_RE = re.compile(r"[\s\-_.]+")
+
+PREFIXES = ('freshly squeezed ', 'fresh squeezed ', 'fresh ', 'chilled ', 'homemade ', 'house made ')
+
+# Synonyms, keyed and valued by normalized spelling
+ALIASES = {
+    'whisky': 'whiskey',
+    'scotch whisky': 'scotch',
+    'blended scotch': 'scotch',
+    'bourbon whiskey': 'bourbon',
+    'rye': 'rye whiskey',
+    'irish whisky': 'irish whiskey',
+    'club soda': 'soda water',
+    'carbonated water': 'soda water',
+    'sugar syrup': 'simple syrup',
+    'white rum': 'light rum',
+    'sweet and sour': 'sour mix',
+    '7 up': 'lemon lime soda',
+    'sprite': 'lemon lime soda',
+    'coca cola': 'cola',
+    'pepsi cola': 'cola',
+    'whipping cream': 'heavy cream',
+    'london dry gin': 'gin',
+    'peachtree schnapps': 'peach schnapps',
+    'tequila blanco': 'tequila',
+    'blanco tequila': 'tequila',
+    'silver tequila': 'tequila',
+    'st germain': 'elderflower liqueur',
+    'cherries': 'cherry',
+}
+
+# Brand -> what it is; "<brand>" and "<brand> <spirit>" match the spirit,
+# flavoured expressions such as "Absolut Citron" stay distinct
+BRANDS = {
+    'grey goose': 'vodka', 'absolut': 'vodka', 'smirnoff': 'vodka', 'ketel one': 'vodka',
+    'titos': 'vodka', 'stolichnaya': 'vodka',
+    'tanqueray': 'gin', 'bombay sapphire': 'gin', 'beefeater': 'gin', 'hendricks': 'gin',
+    'gordons': 'gin',
+    'bacardi': 'light rum', 'captain morgan': 'spiced rum',
+    'jack daniels': 'tennessee whiskey', 'jim beam': 'bourbon', 'wild turkey': 'bourbon',
+    'makers mark': 'bourbon', 'bulleit': 'bourbon', 'jameson': 'irish whiskey',
+    'johnnie walker': 'scotch',
+    'jose cuervo': 'tequila', 'patron': 'tequila',
+    'kahlua': 'coffee liqueur', 'tia maria': 'coffee liqueur',
+    'cointreau': 'triple sec', 'baileys': 'irish cream',
+}
+
+BASE_SPIRITS = frozenset(BRANDS.values()) | {
+    'rum', 'dark rum', 'whiskey', 'rye whiskey', 'brandy', 'cognac',
+}
+
+
+def normalize_name(name):
+    """Accent-, case- and punctuation-insensitive spelling of ``name``"""
+    key = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    key = _PARENTHETICAL_RE.sub(' ', key).replace("'", '')
+    return ' '.join(part for part in _SEPARATOR_RE.split(key) if part)
+
+
+@lru_cache(maxsize=16384)
+def canonical_key(name):
+    """The spelling ``name`` should match as (see the module docstring)"""
+    key = normalize_name(name)
+    for prefix in PREFIXES:
+        if key.startswith(prefix) and len(key) > len(prefix):
+            key = key[len(prefix):]
+            break
+    key = ALIASES.get(key, key)
+    for brand, spirit in BRANDS.items():
+        if key == brand:
+            return spirit
+        if key.startswith(brand + ' '):
+            rest = canonical_key(key[len(brand) + 1:])
+            if rest in BASE_SPIRITS:
+                return rest
+    return key
+
+
+def sync_canonical_ingredients():
+    """Recompute canonical ids, the alias table and shelf ids from the catalog
+
+    Bumps the catalog version when anything changed so every process
+    rebuilds its ingredient index.
+    """
+    rows = db.session.execute(
+        db.select(Ingredient.id, Ingredient.name, Ingredient.canonical_id).order_by(Ingredient.id)
+    ).all()
+    groups = {}
+    for ingredient_id, name, current in rows:
+        groups.setdefault(canonical_key(name), []).append((ingredient_id, name, current))
+
+    aliases = {}
+    updates = []
+    for key, members in groups.items():
+        # Prefer the member spelled exactly like the key ("Lime juice" over "Fresh lime juice")
+        target = next(
+            (ingredient_id for ingredient_id, name, _ in members if normalize_name(name) == key),
+            members[0][0]
+        )
+        aliases[key] = target
+        for ingredient_id, name, current in members:
+            aliases.setdefault(normalize_name(name), target)
+            if (current or ingredient_id) != target:
+                updates.append({'id': ingredient_id, 'canonical_id': target})
+    if updates:
+        db.session.execute(db.update(Ingredient), updates)
+
+    stored = dict(db.session.execute(
+        db.select(IngredientAlias.alias_key, IngredientAlias.ingredient_id)
+    ).all())
+    if stored != aliases:
+        db.session.execute(db.delete(IngredientAlias))
+        db.session.execute(
+            db.insert(IngredientAlias),
+            [{'alias_key': key, 'ingredient_id': target} for key, target in aliases.items()]
+        )
+
+    # Link rows written before canonical ids existed
+    for table in ('cocktail_ingredient', 'user_cocktail_ingredient'):
+        db.session.execute(text(
+            f"UPDATE {table} SET canonical_id = "
+            f"(SELECT coalesce(i.canonical_id, i.id) FROM ingredient i WHERE i.id = {table}.ingredient_id) "
+            f"WHERE canonical_id IS NULL"
+        ))
+
+    shelf_updates = []
+    shelf_rows = db.session.execute(
+        db.select(UserBarShelf.id, UserBarShelf.ingredient_name, UserBarShelf.canonical_id)
+    )
+    for shelf_id, ingredient_name, current in shelf_rows:
+        target = aliases.get(canonical_key(ingredient_name))
+        if target != current:
+            shelf_updates.append({'id': shelf_id, 'canonical_id': target})
+    if shelf_updates:
+        db.session.execute(db.update(UserBarShelf), shelf_updates)
+
+    if updates or stored != aliases:
+        bump_catalog_version()
+    db.session.commit()
+
+
+class CanonicalLookup:
+    """In-memory copy of ``ingredient_alias`` for resolving user-entered names"""
+
+    def __init__(self, aliases):
+        self.aliases = aliases
+
+    @classmethod
+    def build(cls):
+        aliases = dict(db.session.execute(
+            db.select(IngredientAlias.alias_key, IngredientAlias.ingredient_id)
+        ).all())
+        # Ingredients written since the last sync have no alias rows yet;
+        # they match as the id their link rows were given
+        rows = db.session.execute(db.select(Ingredient.id, Ingredient.name, Ingredient.canonical_id))
+        for ingredient_id, name, canonical_id in rows:
+            aliases.setdefault(canonical_key(name), canonical_id or ingredient_id)
+        return cls(aliases)
+
+    def resolve(self, name):
+        """Canonical ingredient id for ``name``, or None if the catalog doesn't use it"""
+        if not name:
+            return None
+        return self.aliases.get(canonical_key(name))
+
+
+_lookup = CatalogCache(lambda key: CanonicalLookup.build())
+
+
+def get_canonical_lookup():
+    """Return the shared lookup, rebuilding it when the catalog version moved"""
+    return _lookup.get()
+
+
+def invalidate_canonical_lookup():
+    """Drop the shared lookup so the next request rebuilds it"""
+    _lookup.invalidate()
+
+
+def shelf_ingredient_ids(user_id):
+    """Canonical ingredient ids on the user's bar shelf
+
+    Rows saved before their ingredient reached the catalog have no id yet
+    and are resolved by name here.
+    """
+    rows = db.session.execute(
+        db.select(UserBarShelf.canonical_id, UserBarShelf.ingredient_name)
+        .where(UserBarShelf.user_id == user_id)
+    )
+    ids = set()
+    lookup = None
+    for canonical_id, ingredient_name in rows:
+        if canonical_id is None:
+            lookup = lookup or get_canonical_lookup()
+            canonical_id = lookup.resolve(ingredient_name)
+        if canonical_id is not None:
+            ids.add(canonical_id)
+    return ids
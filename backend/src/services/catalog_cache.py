@@ -0,0 +1,38 @@
+"""
+Per-process values derived from the catalog, rebuilt when its key moves
+
+Other worker processes bump the catalog version when they write, so the
+key is checked on every ``get`` (one primary-key lookup); a commit in
+this process drops the value straight away through ``on_catalog_change``.
+"""
+
+import threading
+
+from src.services.catalog_events import on_catalog_change
+from src.services.catalog_version import get_catalog_key
+
+
+class CatalogCache:
+    """Hold ``build(key)`` for the current catalog key"""
+
+    def __init__(self, build):
+        self._build = build
+        # (catalog key, value) of the last build
+        self._cached = None
+        self._lock = threading.Lock()
+        on_catalog_change(self.invalidate)
+
+    def get(self):
+        """Return the value, building it when the catalog key moved"""
+        key = get_catalog_key()
+        cached = self._cached
+        if cached is None or cached[0] != key:
+            with self._lock:
+                cached = self._cached
+                if cached is None or cached[0] != key:
+                    cached = self._cached = (key, self._build(key))
+        return cached[1]
+
+    def invalidate(self):
+        """Drop the value so the next ``get`` rebuilds it"""
+        self._cached = None
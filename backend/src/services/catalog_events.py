@@ -0,0 +1,41 @@
+"""
+Notify in-process caches when the cocktail catalog changes
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.cocktail import Cocktail
+
+_listeners = []
+
+
+def on_catalog_change(callback):
+    """Register a callable to run after a commit that touched cocktails"""
+    _listeners.append(callback)
+    return callback
+
+
+def notify_catalog_changed():
+    """Run every registered catalog-change callback"""
+    for callback in list(_listeners):
+        callback()
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_catalog_writes(session, flush_context, instances):
+    """Remember whether this transaction writes to the cocktail table"""
+    touched = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, Cocktail) for obj in touched):
+        session.info['catalog_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_after_commit(session):
+    if session.info.pop('catalog_changed', False):
+        notify_catalog_changed()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('catalog_changed', None)
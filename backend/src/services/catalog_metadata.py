@@ -0,0 +1,153 @@
+"""
+Materialized /api/metadata: per-value cocktail counts kept by triggers
+
+``catalog_facet_count`` holds how many cocktails use each category, glass,
+alcoholic value, ingredient and tag.  Triggers on ``cocktail`` and the
+derived link tables adjust the counts row by row, so the snapshot stays
+current without rescanning the catalog; ``rebuild_catalog_facets`` recomputes
+it from scratch after a bulk load.
+"""
+
+import hashlib
+import json
+
+from sqlalchemy import text
+
+from src.models.user import db
+from src.models.cocktail import CatalogFacetCount
+from src.services.catalog_cache import CatalogCache
+from src.services.schema import replace_schema_objects
+
+# Facets that are plain columns on cocktail
+COLUMN_FACETS = ('category', 'glass', 'alcoholic')
+
+
+def _increment(facet, value_sql, condition='1'):
+    # Update-then-insert rather than an upsert, which SQLite overrides
+    # inside triggers fired by an outer upsert
+    return (
+        f"UPDATE catalog_facet_count SET count = count + 1 "
+        f"WHERE facet = '{facet}' AND value = {value_sql} AND {condition}; "
+        f"INSERT INTO catalog_facet_count(facet, value, count) "
+        f"SELECT '{facet}', {value_sql}, 1 WHERE {condition} AND coalesce({value_sql}, '') != '' "
+        f"AND NOT EXISTS (SELECT 1 FROM catalog_facet_count "
+        f"WHERE facet = '{facet}' AND value = {value_sql});"
+    )
+
+
+def _decrement(facet, value_sql, condition='1'):
+    return (
+        f"UPDATE catalog_facet_count SET count = count - 1 "
+        f"WHERE facet = '{facet}' AND value = {value_sql} AND {condition};"
+    )
+
+
+def _link_trigger_statements(link_table, facet, key_column, name_table):
+    """Triggers counting each distinct (cocktail, ingredient|tag) pair once"""
+    name_sql = f"(SELECT name FROM {name_table} WHERE id = {{row}}.{key_column})"
+    if link_table == 'cocktail_ingredient':
+        # A recipe may list the same ingredient on several lines
+        others = (
+            f"NOT EXISTS (SELECT 1 FROM cocktail_ingredient "
+            f"WHERE cocktail_id = {{row}}.cocktail_id AND ingredient_id = {{row}}.ingredient_id "
+            f"AND position != {{row}}.position)"
+        )
+    else:
+        others = '1'
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {link_table}_facets_ai AFTER INSERT ON {link_table} BEGIN "
+        f"{_increment(facet, name_sql.format(row='new'), others.format(row='new'))} END",
+        f"CREATE TRIGGER IF NOT EXISTS {link_table}_facets_ad AFTER DELETE ON {link_table} BEGIN "
+        f"{_decrement(facet, name_sql.format(row='old'), others.format(row='old'))} END",
+    ]
+
+
+SCHEMA_STATEMENTS = [
+    "CREATE TRIGGER IF NOT EXISTS cocktail_facets_ai AFTER INSERT ON cocktail BEGIN "
+    + ' '.join(_increment(facet, f"new.{facet}") for facet in COLUMN_FACETS)
+    + " END",
+    "CREATE TRIGGER IF NOT EXISTS cocktail_facets_ad AFTER DELETE ON cocktail BEGIN "
+    + ' '.join(_decrement(facet, f"old.{facet}") for facet in COLUMN_FACETS)
+    + " END",
+    f"CREATE TRIGGER IF NOT EXISTS cocktail_facets_au AFTER UPDATE OF {', '.join(COLUMN_FACETS)} ON cocktail BEGIN "
+    + ' '.join(_decrement(facet, f"old.{facet}") for facet in COLUMN_FACETS)
+    + ' '.join(_increment(facet, f"new.{facet}") for facet in COLUMN_FACETS)
+    + " END",
+    *_link_trigger_statements('cocktail_ingredient', 'ingredient', 'ingredient_id', 'ingredient'),
+    *_link_trigger_statements('cocktail_tag', 'tag', 'tag_id', 'tag'),
+]
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM catalog_facet_count",
+    *[
+        f"INSERT INTO catalog_facet_count(facet, value, count) "
+        f"SELECT '{facet}', {facet}, count(*) FROM cocktail "
+        f"WHERE coalesce({facet}, '') != '' GROUP BY {facet}"
+        for facet in COLUMN_FACETS
+    ],
+    "INSERT INTO catalog_facet_count(facet, value, count) "
+    "SELECT 'ingredient', i.name, count(DISTINCT ci.cocktail_id) "
+    "FROM cocktail_ingredient ci JOIN ingredient i ON i.id = ci.ingredient_id GROUP BY i.id",
+    "INSERT INTO catalog_facet_count(facet, value, count) "
+    "SELECT 'tag', t.name, count(*) "
+    "FROM cocktail_tag ct JOIN tag t ON t.id = ct.tag_id GROUP BY t.id",
+]
+
+
+def ensure_catalog_metadata():
+    """Create the facet triggers and backfill the counts for existing databases"""
+    replace_schema_objects(SCHEMA_STATEMENTS)
+    has_counts = db.session.execute(text("SELECT 1 FROM catalog_facet_count LIMIT 1")).first()
+    has_cocktails = db.session.execute(text("SELECT 1 FROM cocktail LIMIT 1")).first()
+    if has_cocktails and not has_counts:
+        for statement in REBUILD_STATEMENTS:
+            db.session.execute(text(statement))
+    db.session.commit()
+
+
+def rebuild_catalog_facets():
+    """Recompute every facet count from the catalog tables"""
+    for statement in REBUILD_STATEMENTS:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+def build_metadata():
+    """Assemble the /api/metadata payload from the facet counts"""
+    counts = {'category': {}, 'glass': {}, 'alcoholic': {}, 'ingredient': {}, 'tag': {}}
+    rows = db.session.execute(
+        db.select(CatalogFacetCount.facet, CatalogFacetCount.value, CatalogFacetCount.count)
+        .where(CatalogFacetCount.count > 0)
+    )
+    for facet, value, count in rows:
+        counts.setdefault(facet, {})[value] = count
+    return {
+        'categories': sorted(counts['category']),
+        'glasses': sorted(counts['glass']),
+        'ingredients': sorted(counts['ingredient']),
+        'counts': {
+            'categories': counts['category'],
+            'glasses': counts['glass'],
+            'alcoholic': counts['alcoholic'],
+            'ingredients': counts['ingredient'],
+            'tags': counts['tag']
+        }
+    }
+
+
+def _encode_metadata(key):
+    body = json.dumps(build_metadata(), separators=(',', ':')).encode('utf-8')
+    etag = f"metadata-{key[0]}-{key[1]}-{hashlib.sha1(body).hexdigest()[:12]}"
+    return etag, body
+
+
+# (etag, encoded body) of the current catalog
+_snapshot = CatalogCache(_encode_metadata)
+
+
+def get_metadata_snapshot():
+    """Return ``(etag, body)`` for the current catalog version
+
+    Costs one primary-key lookup when the cached snapshot is still current.
+    """
+    return _snapshot.get()
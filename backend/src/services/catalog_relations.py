@@ -0,0 +1,128 @@
+"""
+Keep the normalized ingredient and tag tables in step with the JSON columns
+
+``ingredients_json``/``tags_json`` stay the write format and the serialized
+copy returned by ``to_dict``; the ``ingredient``, ``tag``,
+``cocktail_ingredient``/``cocktail_tag`` and ``user_cocktail_*`` tables are
+derived from them by triggers so filters can use indexed equality joins.
+"""
+
+from sqlalchemy import text
+
+from src.models.user import db
+from src.services.schema import replace_schema_objects
+
+# (owner table, owner key column, ingredient link table, tag link table, link key column)
+OWNERS = [
+    ('cocktail', 'id', 'cocktail_ingredient', 'cocktail_tag', 'cocktail_id'),
+    ('user_cocktail', 'id', 'user_cocktail_ingredient', 'user_cocktail_tag', 'user_cocktail_id'),
+]
+
+_NAME_KEY = "lower(trim({expr}))"
+
+
+def _populate_statements(row, source, owner_key, ingredient_table, tag_table, link_key):
+    """INSERT statements deriving link rows for ``row`` (a trigger row or a table alias)
+
+    The statements avoid ``INSERT OR IGNORE``: inside a trigger fired by an
+    upsert, SQLite applies the outer statement's conflict handling instead.
+    """
+    ingredients = f"json_each(coalesce({row}.ingredients_json, '[]'))"
+    tags = f"json_each(coalesce({row}.tags_json, '[]'))"
+    ingredient_name = "json_extract(j.value, '$.name')"
+    return [
+        f"INSERT INTO ingredient(name, name_key) "
+        f"SELECT min(src.name), src.name_key FROM ("
+        f"SELECT trim({ingredient_name}) AS name, {_NAME_KEY.format(expr=ingredient_name)} AS name_key "
+        f"FROM {source}{ingredients} j) src "
+        f"WHERE coalesce(src.name_key, '') != '' "
+        f"AND NOT EXISTS (SELECT 1 FROM ingredient i WHERE i.name_key = src.name_key) "
+        f"GROUP BY src.name_key",
+
+        f"INSERT INTO {ingredient_table}({link_key}, position, ingredient_id, canonical_id, measure) "
+        f"SELECT {row}.{owner_key}, j.key, i.id, coalesce(i.canonical_id, i.id), "
+        f"json_extract(j.value, '$.measure') "
+        f"FROM {source}{ingredients} j "
+        f"JOIN ingredient i ON i.name_key = {_NAME_KEY.format(expr=ingredient_name)}",
+
+        f"INSERT INTO tag(name, name_key) "
+        f"SELECT min(src.name), src.name_key FROM ("
+        f"SELECT trim(j.value) AS name, {_NAME_KEY.format(expr='j.value')} AS name_key "
+        f"FROM {source}{tags} j) src "
+        f"WHERE coalesce(src.name_key, '') != '' "
+        f"AND NOT EXISTS (SELECT 1 FROM tag t WHERE t.name_key = src.name_key) "
+        f"GROUP BY src.name_key",
+
+        f"INSERT INTO {tag_table}({link_key}, tag_id) "
+        f"SELECT DISTINCT {row}.{owner_key}, t.id "
+        f"FROM {source}{tags} j "
+        f"JOIN tag t ON t.name_key = {_NAME_KEY.format(expr='j.value')}",
+    ]
+
+
+def _trigger_statements(owner, owner_key, ingredient_table, tag_table, link_key):
+    clear = (
+        f"DELETE FROM {ingredient_table} WHERE {link_key} = old.{owner_key};\n"
+        f"DELETE FROM {tag_table} WHERE {link_key} = old.{owner_key};"
+    )
+    populate = ';\n'.join(
+        _populate_statements('new', '', owner_key, ingredient_table, tag_table, link_key)
+    ) + ';'
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {owner}_relations_ai AFTER INSERT ON {owner} "
+        f"BEGIN\n{populate}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS {owner}_relations_ad AFTER DELETE ON {owner} "
+        f"BEGIN\n{clear}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS {owner}_relations_au "
+        f"AFTER UPDATE OF {owner_key}, ingredients_json, tags_json ON {owner} "
+        f"BEGIN\n{clear}\n{populate}\nEND",
+    ]
+
+
+def _canonical_trigger_statements():
+    """Carry ingredient.canonical_id changes over to the link rows"""
+    updates = ' '.join(
+        f"UPDATE {ingredient_table} SET canonical_id = coalesce(new.canonical_id, new.id) "
+        f"WHERE ingredient_id = new.id;"
+        for _, _, ingredient_table, _, _ in OWNERS
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS ingredient_canonical_au "
+        f"AFTER UPDATE OF canonical_id ON ingredient BEGIN {updates} END",
+    ]
+
+
+def ensure_catalog_relations():
+    """Create the sync triggers and backfill link tables for existing databases"""
+    replace_schema_objects([
+        statement for owner in OWNERS for statement in _trigger_statements(*owner)
+    ] + _canonical_trigger_statements())
+    for owner, owner_key, ingredient_table, tag_table, link_key in OWNERS:
+        has_owners = db.session.execute(text(
+            f"SELECT 1 FROM {owner} WHERE ingredients_json IS NOT NULL "
+            f"OR tags_json IS NOT NULL LIMIT 1"
+        )).first()
+        has_links = db.session.execute(text(
+            f"SELECT 1 FROM {ingredient_table} LIMIT 1"
+        )).first() or db.session.execute(text(
+            f"SELECT 1 FROM {tag_table} LIMIT 1"
+        )).first()
+        if has_owners and not has_links:
+            _rebuild(owner, owner_key, ingredient_table, tag_table, link_key)
+    db.session.commit()
+
+
+def rebuild_catalog_relations():
+    """Re-derive every link table from the JSON columns"""
+    for owner in OWNERS:
+        _rebuild(*owner)
+    db.session.commit()
+
+
+def _rebuild(owner, owner_key, ingredient_table, tag_table, link_key):
+    db.session.execute(text(f"DELETE FROM {ingredient_table}"))
+    db.session.execute(text(f"DELETE FROM {tag_table}"))
+    for statement in _populate_statements(
+        'o', f"{owner} o, ", owner_key, ingredient_table, tag_table, link_key
+    ):
+        db.session.execute(text(statement))
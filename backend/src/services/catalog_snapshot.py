@@ -0,0 +1,307 @@
+"""
+Read-optimized, memory-mapped snapshot of the catalog
+
+The cocktail table only changes when the catalog is written, so the read
+routes are served from a snapshot built once per catalog version instead
+of from ORM rows:
+
+* every cocktail is kept as pre-encoded JSON fragments (``"name":"..."``,
+  one per field) in a single byte blob, with rows in (name, id) order, so
+  encoding a row is a couple of slices and never creates Python objects;
+* ``sorted_ids``/``id_positions`` find a cocktail by id with a binary
+  search;
+* facet indexes map each category, alcoholic, glass and iba value, tag
+  (case-insensitive) and canonical ingredient to the sorted positions of
+  its cocktails, so list filters are array intersections whose results are
+  already in list order, and counting a filter's matches per facet value
+  is one pass over that facet's positions (``facet_counts``).
+
+Encoding matches ``serialization.encode_cocktail`` byte for byte.  The
+arrays are saved under ``<database>.snapshot/<epoch>-v<version>/`` and
+memory-mapped (see ``mapped_store``), so gunicorn workers share the pages;
+what a worker holds privately is the facet key dictionaries.
+"""
+
+import bisect
+import json
+import mmap
+import os
+
+import numpy as np
+
+from src.models.user import db
+from src.models.cocktail import Cocktail, CocktailIngredient, CocktailTag, Ingredient, Tag
+from src.services.catalog_cache import CatalogCache
+from src.services.mapped_store import load_or_build, store_root
+from src.services.serialization import COCKTAIL_FIELDS, RAW_JSON_COLUMNS, cocktail_columns, dumps
+
+SNAPSHOT_SUFFIX = '.snapshot'
+
+FACETS = ('category', 'alcoholic', 'glass', 'iba', 'tag', 'ingredient')
+# Facets whose keys are not display names; the others are labelled by their key
+LABELLED_FACETS = ('tag', 'ingredient')
+
+# Fragment order within a row: scalars, then the raw JSON columns, the
+# order encode_cocktail writes them in (extras go between the two)
+STORED_FIELDS = tuple(
+    [f for f in COCKTAIL_FIELDS if f not in RAW_JSON_COLUMNS]
+    + [f for f in COCKTAIL_FIELDS if f in RAW_JSON_COLUMNS]
+)
+SCALAR_COUNT = len(STORED_FIELDS) - len(RAW_JSON_COLUMNS)
+FIELD_SLOTS = {name: slot for slot, name in enumerate(STORED_FIELDS)}
+
+ARRAYS = ('offsets', 'sorted_ids', 'id_positions') + tuple(
+    f"{facet}_{part}" for facet in FACETS for part in ('offsets', 'positions')
+)
+
+
+class _SortKeys:
+    """(name, id) of every row as a lazy sequence, for ``bisect``"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def __getitem__(self, position):
+        return self.snapshot.sort_key(position)
+
+
+class CatalogSnapshot:
+    """Immutable, array-backed copy of the catalog for the read routes"""
+
+    def __init__(self, blob, arrays, facet_keys, facet_labels):
+        self.blob = blob
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.facet_keys = facet_keys
+        self.facet_labels = facet_labels
+        # Facet value -> slot, rebuilt per process from the saved key lists
+        self.facet_slots = {
+            facet: {key: slot for slot, key in enumerate(keys)} for facet, keys in facet_keys.items()
+        }
+        self._all = None
+
+    @classmethod
+    def build(cls):
+        """Encode every cocktail and group positions by facet value"""
+        rows = db.session.execute(
+            db.select(*cocktail_columns()).order_by(Cocktail.name, Cocktail.id)
+        )
+        fragments = []
+        ids = []
+        groups = {facet: {} for facet in FACETS}
+        for position, row in enumerate(rows):
+            ids.append(row.id)
+            for name in STORED_FIELDS:
+                column = RAW_JSON_COLUMNS.get(name)
+                value = (getattr(row, column) or '[]').encode('utf-8') if column else dumps(getattr(row, name))
+                fragments.append(b'"' + name.encode('ascii') + b'":' + value + b',')
+            for facet in ('category', 'alcoholic', 'glass', 'iba'):
+                value = getattr(row, facet)
+                if value:
+                    groups[facet].setdefault(value, []).append(position)
+
+        positions = {cocktail_id: p for p, cocktail_id in enumerate(ids)}
+        tag_rows = db.session.execute(
+            db.select(CocktailTag.cocktail_id, Tag.name_key, Tag.name).join(Tag, Tag.id == CocktailTag.tag_id)
+        )
+        canonical = db.func.coalesce(CocktailIngredient.canonical_id, CocktailIngredient.ingredient_id)
+        ingredient_rows = db.session.execute(
+            db.select(CocktailIngredient.cocktail_id, canonical, Ingredient.name)
+            .join(Ingredient, Ingredient.id == canonical).distinct()
+        )
+        labels = {facet: {} for facet in LABELLED_FACETS}
+        for facet, rows in (('tag', tag_rows), ('ingredient', ingredient_rows)):
+            for cocktail_id, key, label in rows:
+                if cocktail_id in positions:
+                    groups[facet].setdefault(key, []).append(positions[cocktail_id])
+                    labels[facet][key] = label
+
+        offsets = np.zeros(len(fragments) + 1, dtype=np.int64)
+        np.cumsum([len(f) for f in fragments], out=offsets[1:])
+        id_array = np.asarray(ids, dtype=str)
+        order = np.argsort(id_array, kind='stable')
+        arrays = {
+            'offsets': offsets,
+            'sorted_ids': id_array[order],
+            'id_positions': order.astype(np.int32),
+        }
+        facet_keys = {}
+        facet_labels = {}
+        for facet, values in groups.items():
+            keys = sorted(values)
+            facet_keys[facet] = keys
+            if facet in labels:
+                facet_labels[facet] = [labels[facet][k] for k in keys]
+            arrays[f"{facet}_offsets"] = np.zeros(len(keys) + 1, dtype=np.int64)
+            np.cumsum([len(values[k]) for k in keys], out=arrays[f"{facet}_offsets"][1:])
+            arrays[f"{facet}_positions"] = np.asarray(
+                [p for k in keys for p in sorted(values[k])], dtype=np.int32
+            )
+        return cls(b''.join(fragments), arrays, facet_keys, facet_labels)
+
+    def save(self, directory):
+        """Write the blob, arrays and facet keys into ``directory`` (created)"""
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'blob.bin'), 'wb') as f:
+            f.write(self.blob)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'facets.json'), 'w', encoding='utf-8') as f:
+            json.dump({'keys': self.facet_keys, 'labels': self.facet_labels}, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Map a directory written by ``save``"""
+        with open(os.path.join(directory, 'blob.bin'), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+            for name in ARRAYS
+        }
+        with open(os.path.join(directory, 'facets.json'), 'r', encoding='utf-8') as f:
+            facets = json.load(f)
+        return cls(blob, arrays, facets['keys'], facets['labels'])
+
+    def __len__(self):
+        return len(self.sorted_ids)
+
+    @property
+    def all_positions(self):
+        if self._all is None:
+            self._all = np.arange(len(self), dtype=np.int32)
+        return self._all
+
+    def position(self, cocktail_id):
+        """Row of ``cocktail_id``, or None"""
+        i = int(np.searchsorted(self.sorted_ids, cocktail_id))
+        if i < len(self) and self.sorted_ids[i] == cocktail_id:
+            return int(self.id_positions[i])
+        return None
+
+    def positions_of(self, cocktail_ids):
+        """Rows of ``cocktail_ids`` in their order, dropping unknown ids"""
+        positions = (self.position(cocktail_id) for cocktail_id in cocktail_ids)
+        return [p for p in positions if p is not None]
+
+    def facet(self, facet, key):
+        """Sorted rows having ``key`` for ``facet`` (empty if none do)"""
+        slot = self.facet_slots[facet].get(key)
+        if slot is None:
+            return self.all_positions[:0]
+        offsets = getattr(self, f"{facet}_offsets")
+        return getattr(self, f"{facet}_positions")[offsets[slot]:offsets[slot + 1]]
+
+    def facet_union(self, facet, keys):
+        """Sorted rows having any of ``keys`` for ``facet``"""
+        parts = [self.facet(facet, key) for key in keys]
+        return np.unique(np.concatenate(parts)) if parts else self.all_positions[:0]
+
+    def filter(self, **facets):
+        """Sorted rows matching every ``facet=key`` given; None keys are ignored"""
+        result = None
+        for facet, key in facets.items():
+            if key is None:
+                continue
+            positions = self.facet(facet, key)
+            result = positions if result is None else np.intersect1d(result, positions, assume_unique=True)
+        return self.all_positions if result is None else result
+
+    def facet_counts(self, facet, positions):
+        """How many of ``positions`` have each value of ``facet``, lined up with ``facet_keys``
+
+        One pass over the facet's postings whatever its number of values:
+        mark ``positions``, take a running total of the marks along the
+        postings and difference it at each value's offsets.
+        """
+        offsets = getattr(self, f"{facet}_offsets")
+        if len(positions) == len(self):
+            return np.diff(offsets)
+        selected = np.zeros(len(self), dtype=bool)
+        selected[positions] = True
+        marks = np.zeros(len(getattr(self, f"{facet}_positions")) + 1, dtype=np.int64)
+        np.cumsum(selected[getattr(self, f"{facet}_positions")], out=marks[1:])
+        return marks[offsets[1:]] - marks[offsets[:-1]]
+
+    def facet_label(self, facet, slot):
+        """Display name of a facet value"""
+        labels = self.facet_labels.get(facet)
+        return labels[slot] if labels is not None else self.facet_keys[facet][slot]
+
+    def _field(self, position, name):
+        slot = position * len(STORED_FIELDS) + FIELD_SLOTS[name]
+        start, end = self.offsets[slot:slot + 2].tolist()
+        return json.loads(b'{' + self.blob[start:end - 1] + b'}')[name]
+
+    def sort_key(self, position):
+        """(name, id) of a row, the list order"""
+        return self._field(position, 'name'), self._field(position, 'id')
+
+    def rank_after(self, name, cocktail_id):
+        """First row ordered after (name, id)"""
+        return bisect.bisect_right(_SortKeys(self), (name, cocktail_id))
+
+    def encode(self, position, fields=None, extra=None):
+        """One row as a JSON object, like ``encode_cocktail``"""
+        width = len(STORED_FIELDS)
+        if fields is None:
+            base = position * width
+            start, middle, end = self.offsets[[base, base + SCALAR_COUNT, base + width]].tolist()
+            if not extra:
+                return b'{' + self.blob[start:end - 1] + b'}'
+            return (b'{' + self.blob[start:middle] + dumps(extra)[1:-1] + b','
+                    + self.blob[middle:end - 1] + b'}')
+
+        bounds = self.offsets[position * width:position * width + width + 1].tolist()
+        parts = [
+            self.blob[bounds[FIELD_SLOTS[name]]:bounds[FIELD_SLOTS[name] + 1]]
+            for name in fields if name not in RAW_JSON_COLUMNS
+        ]
+        if extra:
+            parts.append(dumps(extra)[1:-1] + b',')
+        parts.extend(
+            self.blob[bounds[FIELD_SLOTS[name]]:bounds[FIELD_SLOTS[name] + 1]]
+            for name in fields if name in RAW_JSON_COLUMNS
+        )
+        body = b''.join(parts)
+        return b'{' + body[:-1] + b'}' if body else b'{}'
+
+    def encode_positions(self, positions, fields=None, extras=None):
+        """Rows as a JSON array; ``extras`` lines up with ``positions``"""
+        if extras is None:
+            return b'[' + b','.join(self.encode(int(p), fields) for p in positions) + b']'
+        return b'[' + b','.join(
+            self.encode(int(p), fields, extra) for p, extra in zip(positions, extras)
+        ) + b']'
+
+    def encode_ids(self, cocktail_ids, fields=None, extras=None):
+        """Cocktails as a JSON array in the order of ``cocktail_ids``, skipping unknown ids
+
+        ``extras`` maps cocktail id to extra fields, as for ``encode_cocktails``.
+        """
+        if not extras:
+            return self.encode_positions(self.positions_of(cocktail_ids), fields)
+        found = [(c, self.position(c)) for c in cocktail_ids]
+        found = [(c, p) for c, p in found if p is not None]
+        return self.encode_positions([p for _, p in found], fields, [extras.get(c) for c, _ in found])
+
+
+def snapshot_root():
+    """Directory holding the saved snapshots, or None for in-memory databases"""
+    return store_root(SNAPSHOT_SUFFIX)
+
+
+_snapshot = CatalogCache(lambda key: load_or_build(CatalogSnapshot, SNAPSHOT_SUFFIX, key))
+
+
+def get_catalog_snapshot():
+    """Return the shared snapshot, mapping or rebuilding it when the catalog version moved"""
+    return _snapshot.get()
+
+
+def invalidate_catalog_snapshot():
+    """Drop the shared snapshot so the next read maps the new version"""
+    _snapshot.invalidate()
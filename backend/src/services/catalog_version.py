@@ -0,0 +1,80 @@
+"""
+Catalog version number shared by every process using the database
+
+``updated_at`` (Unix seconds) records when the version last moved; it is
+the ``Last-Modified`` time of responses derived from the catalog.
+
+The version only counts writes, so two databases (a rebuilt one and the
+one it replaced, say) can reach the same number with different contents.
+``epoch`` is a random id given to each database when its state row is
+created; anything derived from the catalog and kept outside the database
+(saved snapshots, per-process caches) is keyed by ``(epoch, version)``,
+see ``get_catalog_key``.
+"""
+
+from sqlalchemy import text
+
+from src.models.user import db
+from src.models.cocktail import CatalogState
+from src.services.schema import replace_schema_objects
+
+STATE_ID = 1
+
+_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+_NEW_EPOCH = "lower(hex(randomblob(16)))"
+
+_BUMP = f"UPDATE catalog_state SET version = version + 1, updated_at = {_NOW} WHERE id = {STATE_ID};"
+
+SCHEMA_STATEMENTS = [
+    f"CREATE TRIGGER IF NOT EXISTS cocktail_version_ai AFTER INSERT ON cocktail BEGIN {_BUMP} END",
+    f"CREATE TRIGGER IF NOT EXISTS cocktail_version_ad AFTER DELETE ON cocktail BEGIN {_BUMP} END",
+    f"CREATE TRIGGER IF NOT EXISTS cocktail_version_au AFTER UPDATE ON cocktail BEGIN {_BUMP} END",
+]
+
+
+def ensure_catalog_version():
+    """Create the version row and the triggers that bump it"""
+    db.session.execute(text(
+        f"INSERT OR IGNORE INTO catalog_state(id, version, epoch) VALUES ({STATE_ID}, 0, {_NEW_EPOCH})"
+    ))
+    # Databases from before epoch existed: they get one now, unlike any other
+    db.session.execute(text(
+        f"UPDATE catalog_state SET epoch = {_NEW_EPOCH} WHERE id = {STATE_ID} AND epoch IS NULL"
+    ))
+    # Databases from before updated_at existed: start the clock now
+    db.session.execute(text(
+        f"UPDATE catalog_state SET updated_at = {_NOW} WHERE id = {STATE_ID} AND updated_at IS NULL"
+    ))
+    replace_schema_objects(SCHEMA_STATEMENTS)
+    db.session.commit()
+
+
+def get_catalog_version():
+    """Return the current catalog version (a primary-key lookup)"""
+    return db.session.execute(
+        db.select(CatalogState.version).where(CatalogState.id == STATE_ID)
+    ).scalar() or 0
+
+
+def get_catalog_key():
+    """Return ``(epoch, version)``, which identifies the catalog across databases (a primary-key lookup)"""
+    row = db.session.execute(
+        db.select(CatalogState.epoch, CatalogState.version).where(CatalogState.id == STATE_ID)
+    ).first()
+    return (row.epoch, row.version) if row is not None else (None, 0)
+
+
+def get_catalog_state():
+    """Return ``(epoch, version, updated_at)`` (a primary-key lookup)"""
+    row = db.session.execute(
+        db.select(CatalogState.epoch, CatalogState.version, CatalogState.updated_at)
+        .where(CatalogState.id == STATE_ID)
+    ).first()
+    return (row.epoch, row.version, row.updated_at) if row is not None else (None, 0, None)
+
+
+def bump_catalog_version():
+    """Advance the version explicitly, e.g. after a rebuild of derived tables"""
+    db.session.execute(text(_BUMP))
+    db.session.commit()
@@ -0,0 +1,96 @@
+"""
+Stream the catalog and user data as NDJSON
+
+Exports are generators of one JSON object per line, read from a single
+``SELECT`` with ``yield_per`` so only one batch of rows is in memory at a
+time; the caller wraps them in a streamed response.  Catalog lines are
+ordered by (date_modified, id) along ``ix_cocktail_date_modified``, so a
+sync tool can pass the largest ``date_modified`` it has seen as ``since``
+next time and get only what changed since then.  ``since`` is inclusive:
+rows modified in that same second come again rather than being missed.
+
+``gzip_chunks`` compresses the stream on the fly, flushing after every
+batch so the client keeps receiving data.
+"""
+
+import re
+import zlib
+
+from src.models.user import db
+from src.models.cocktail import Cocktail, UserBarShelf, UserFavorite, UserCocktail
+from src.services.serialization import cocktail_columns, dumps, encode_cocktail
+
+EXPORT_BATCH_SIZE = 1000
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# date_modified values look like "2016-08-31 19:42:52"
+_SINCE_RE = re.compile(r'^\d{4}(-\d{2}(-\d{2}([ T]\d{2}(:\d{2}(:\d{2})?)?)?)?)?$')
+
+
+def parse_since(value):
+    """Normalize a ``since`` argument to the stored date_modified format
+
+    Any prefix of ``YYYY-MM-DD HH:MM:SS`` is accepted (``T`` may separate
+    date and time); raises ValueError otherwise.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if not _SINCE_RE.match(value):
+        raise ValueError("since must look like YYYY-MM-DD or 'YYYY-MM-DD HH:MM:SS'")
+    return value.replace('T', ' ')
+
+
+def _batched_lines(rows, encode):
+    """Join encoded rows into one chunk per EXPORT_BATCH_SIZE lines"""
+    batch = []
+    for row in rows:
+        batch.append(encode(row))
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield b'\n'.join(batch) + b'\n'
+            batch = []
+    if batch:
+        yield b'\n'.join(batch) + b'\n'
+
+
+def iter_catalog_export(since=None, fields=None):
+    """Yield NDJSON chunks of every cocktail modified at or after ``since``"""
+    query = db.select(*cocktail_columns(fields))
+    if since is not None:
+        query = query.where(Cocktail.date_modified >= since)
+    query = query.order_by(Cocktail.date_modified, Cocktail.id)
+    rows = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    # Streaming runs after the request's timers have stopped
+    encode = encode_cocktail.__wrapped__
+    yield from _batched_lines(rows, lambda row: encode(row, fields))
+
+
+def iter_user_export(user):
+    """Yield NDJSON chunks of a user, their shelf, favorites and own cocktails
+
+    Every line carries a ``type``: ``user``, ``bar_shelf``, ``favorite`` or
+    ``cocktail``.
+    """
+    yield dumps({'type': 'user', **user.to_dict()}) + b'\n'
+    # Each section is read in the order of its (user_id, ...) index
+    sections = (
+        ('bar_shelf', UserBarShelf, UserBarShelf.ingredient_name),
+        ('favorite', UserFavorite, UserFavorite.cocktail_id),
+        ('cocktail', UserCocktail, UserCocktail.id),
+    )
+    for kind, model, order in sections:
+        rows = db.session.execute(
+            db.select(model).where(model.user_id == user.id).order_by(order)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).scalars()
+        yield from _batched_lines(rows, lambda row, kind=kind: dumps({'type': kind, **row.to_dict()}))
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of byte chunks, flushing after each one"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,190 @@
+"""
+Favorite cocktails, with each user's favorite ids cached in memory
+
+Writes are single statements against the unique (user_id, cocktail_id)
+index.  Triggers on ``user_favorite`` bump a per-user version in
+``user_favorite_state``, the way the catalog version works, so a worker
+keeps a user's ids until that version moves: a read is one primary-key
+lookup instead of the favorites query, and a write in any process is seen
+by every other on its next read.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+
+from src.models.user import db
+from src.models.cocktail import Cocktail, UserFavorite, UserFavoriteState
+from src.services.instrumentation import registry
+from src.services.schema import replace_schema_objects
+
+MAX_FAVORITES_BATCH = 500
+DEFAULT_CACHE_USERS = 10000
+
+
+def _bump(row):
+    return (
+        f"INSERT INTO user_favorite_state(user_id, version) SELECT {row}.user_id, 0 "
+        f"WHERE NOT EXISTS (SELECT 1 FROM user_favorite_state WHERE user_id = {row}.user_id); "
+        f"UPDATE user_favorite_state SET version = version + 1 WHERE user_id = {row}.user_id;"
+    )
+
+
+SCHEMA_STATEMENTS = [
+    f"CREATE TRIGGER IF NOT EXISTS user_favorite_version_ai AFTER INSERT ON user_favorite "
+    f"BEGIN {_bump('new')} END",
+    f"CREATE TRIGGER IF NOT EXISTS user_favorite_version_ad AFTER DELETE ON user_favorite "
+    f"BEGIN {_bump('old')} END",
+    f"CREATE TRIGGER IF NOT EXISTS user_favorite_version_au AFTER UPDATE ON user_favorite "
+    f"BEGIN {_bump('old')} {_bump('new')} END",
+]
+
+
+def dedupe_favorites():
+    """Keep the first row per (user, cocktail) so the unique index can be built"""
+    db.session.execute(text(
+        "DELETE FROM user_favorite WHERE id NOT IN "
+        "(SELECT min(id) FROM user_favorite GROUP BY user_id, cocktail_id)"
+    ))
+    # Superseded by ux_user_favorite_user_cocktail
+    db.session.execute(text("DROP INDEX IF EXISTS ix_user_favorite_user"))
+    db.session.commit()
+
+
+def ensure_favorite_state():
+    """Create the version triggers and state rows for favorites saved before them"""
+    replace_schema_objects(SCHEMA_STATEMENTS)
+    db.session.execute(text(
+        "INSERT INTO user_favorite_state(user_id, version) "
+        "SELECT DISTINCT user_id, 0 FROM user_favorite f WHERE NOT EXISTS "
+        "(SELECT 1 FROM user_favorite_state s WHERE s.user_id = f.user_id)"
+    ))
+    db.session.commit()
+
+
+def parse_favorite_changes(data):
+    """Validate a batch body into (added ids, removed ids)
+
+    ``add`` and ``remove`` are lists of cocktail ids; an id in both ends up
+    removed.  Raises ``ValueError`` on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object with "add" and/or "remove"')
+    add = data.get('add') or []
+    remove = data.get('remove') or []
+    if not isinstance(add, list) or not isinstance(remove, list):
+        raise ValueError('"add" and "remove" must be lists')
+    if len(add) + len(remove) > MAX_FAVORITES_BATCH:
+        raise ValueError(f'At most {MAX_FAVORITES_BATCH} changes per request')
+    if not all(isinstance(item, str) and item.strip() for item in add + remove):
+        raise ValueError('Favorites are given as cocktail id strings')
+    removals = set(remove)
+    additions = [item for item in dict.fromkeys(add) if item not in removals]
+    return additions, removals
+
+
+def existing_cocktail_ids(cocktail_ids):
+    """The subset of ``cocktail_ids`` present in the catalog"""
+    return set(db.session.execute(
+        db.select(Cocktail.id).where(Cocktail.id.in_(cocktail_ids))
+    ).scalars()) if cocktail_ids else set()
+
+
+def add_favorites(user_id, cocktail_ids):
+    """Insert favorites, skipping ones the user already has; no commit
+
+    Returns the number of new rows.
+    """
+    if not cocktail_ids:
+        return 0
+    # A Core insert, so the result reports how many rows were new
+    table = UserFavorite.__table__
+    statement = insert(table).on_conflict_do_nothing(
+        index_elements=[table.c.user_id, table.c.cocktail_id]
+    )
+    result = db.session.execute(
+        statement, [{'user_id': user_id, 'cocktail_id': c} for c in cocktail_ids]
+    )
+    return result.rowcount
+
+
+def remove_favorites(user_id, cocktail_ids):
+    """Delete favorites by cocktail id; no commit.  Returns the number removed"""
+    if not cocktail_ids:
+        return 0
+    result = db.session.execute(
+        db.delete(UserFavorite).where(
+            UserFavorite.user_id == user_id, UserFavorite.cocktail_id.in_(cocktail_ids)
+        )
+    )
+    return result.rowcount
+
+
+class FavoritesCache:
+    """LRU of user id -> (favorites version, favorite ids, newest first)"""
+
+    def __init__(self, max_users=DEFAULT_CACHE_USERS):
+        self.max_users = max_users
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, version, cocktail_ids):
+        with self.lock:
+            self.entries[user_id] = (version, cocktail_ids)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def stats(self):
+        """Counters for /api/_metrics"""
+        with self.lock:
+            return [
+                ('favorites_cache_hits_total', 'counter', 'Favorite lists served from memory', self.hits),
+                ('favorites_cache_misses_total', 'counter', 'Favorite lists read from the database',
+                 self.misses),
+                ('favorites_cache_users', 'gauge', 'Users whose favorites are cached', len(self.entries)),
+            ]
+
+
+favorites_cache = FavoritesCache(int(os.environ.get('FAVORITES_CACHE_USERS', DEFAULT_CACHE_USERS)))
+registry.add_collector(favorites_cache.stats)
+
+
+def favorite_ids(user_id):
+    """The user's favorite cocktail ids, newest first, from the cache when current"""
+    version = db.session.execute(
+        db.select(UserFavoriteState.version).where(UserFavoriteState.user_id == user_id)
+    ).scalar()
+    if version is None:
+        # No favorite was ever saved for this user
+        return ()
+    cached = favorites_cache.get(user_id, version)
+    if cached is not None:
+        return cached
+    # Read through the covering unique index and sort here; an ORDER BY id
+    # can tempt the planner into walking the whole table backwards
+    rows = db.session.execute(
+        db.select(UserFavorite.id, UserFavorite.cocktail_id).where(UserFavorite.user_id == user_id)
+    ).all()
+    cocktail_ids = tuple(cocktail_id for _, cocktail_id in sorted(rows, reverse=True))
+    favorites_cache.put(user_id, version, cocktail_ids)
+    return cocktail_ids
@@ -0,0 +1,174 @@
+"""
+Inverted ingredient -> cocktail index used by the bar-shelf queries
+"""
+
+
+import numpy as np
+
+from src.models.user import db
+from src.models.cocktail import Cocktail, CocktailIngredient, Ingredient
+from src.services.catalog_cache import CatalogCache
+
+
+class IngredientIndex:
+    """Posting lists of cocktail positions for every ingredient in the catalog
+
+    Cocktails are addressed by their position in ``cocktail_ids``.  The
+    postings for ingredient ``i`` are ``postings[offsets[i]:offsets[i + 1]]``
+    and ``need[p]`` is the number of distinct ingredients cocktail ``p`` uses,
+    so a shelf query is a ``bincount`` over the shelf's postings compared
+    against ``need`` instead of a JSON decode per cocktail.  The same pairs are
+    kept row by row in ``cocktail_ingredients`` (sliced by ``cocktail_offsets``)
+    to report which ingredients a cocktail is missing.
+    """
+
+    def __init__(self, cocktail_ids, ingredient_lists):
+        self.cocktail_ids = list(cocktail_ids)
+        self._positions = None
+        self.ingredient_ids = {}
+        # Database ingredient id -> index id, filled in by build()
+        self.canonical_ids = {}
+        self.ingredient_names = []
+
+        ingredient_column = []
+        cocktail_offsets = [0]
+        for names in ingredient_lists:
+            seen = set()
+            for name in names:
+                key = name.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                ingredient_id = self.ingredient_ids.get(key)
+                if ingredient_id is None:
+                    ingredient_id = self.ingredient_ids[key] = len(self.ingredient_names)
+                    self.ingredient_names.append(name)
+                ingredient_column.append(ingredient_id)
+            cocktail_offsets.append(len(ingredient_column))
+
+        # Cocktail -> ingredients, row by row
+        self.cocktail_offsets = np.asarray(cocktail_offsets, dtype=np.int64)
+        self.cocktail_ingredients = np.asarray(ingredient_column, dtype=np.int32)
+        self.need = np.diff(self.cocktail_offsets).astype(np.int32)
+
+        # Ingredient -> cocktails, the same pairs regrouped by ingredient
+        cocktail_column = np.repeat(np.arange(len(self.cocktail_ids), dtype=np.int32), self.need)
+        order = np.argsort(self.cocktail_ingredients, kind='stable')
+        self.postings = cocktail_column[order]
+        self.offsets = np.zeros(len(self.ingredient_names) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.cocktail_ingredients, minlength=len(self.ingredient_names)),
+            out=self.offsets[1:]
+        )
+
+    @classmethod
+    def build(cls):
+        """Build the index from the normalized cocktail_ingredient rows
+
+        Recipe lines are grouped by canonical ingredient, so "Fresh lime
+        juice" and "Lime juice" are one posting list; ``lookup`` accepts the
+        canonical ids stored on bar-shelf rows.
+        """
+        names = dict(db.session.execute(db.select(Ingredient.id, Ingredient.name)).all())
+        canonical = db.func.coalesce(CocktailIngredient.canonical_id, CocktailIngredient.ingredient_id)
+        ingredient_lists = {}
+        rows = db.session.execute(
+            db.select(CocktailIngredient.cocktail_id, canonical)
+            .order_by(CocktailIngredient.cocktail_id, CocktailIngredient.position)
+        )
+        for cocktail_id, ingredient_id in rows:
+            ingredient_lists.setdefault(cocktail_id, []).append(names[ingredient_id])
+        cocktail_ids = db.session.execute(
+            db.select(Cocktail.id).order_by(db.literal_column('cocktail.rowid'))
+        ).scalars().all()
+        index = cls(cocktail_ids, (ingredient_lists.get(c, ()) for c in cocktail_ids))
+        for ingredient_id, name in names.items():
+            position = index.ingredient_ids.get(name.lower())
+            if position is not None:
+                index.canonical_ids[ingredient_id] = position
+        return index
+
+    def __len__(self):
+        return len(self.cocktail_ids)
+
+    def positions_of(self, cocktail_ids):
+        """Map cocktail ids to their positions, dropping ids not in the index"""
+        if self._positions is None:
+            self._positions = {cocktail_id: p for p, cocktail_id in enumerate(self.cocktail_ids)}
+        return [self._positions[c] for c in cocktail_ids if c in self._positions]
+
+    def lookup(self, ingredients):
+        """Map shelf entries to index ids, dropping unknown ones
+
+        Entries are canonical ingredient ids (ints) or lower-cased names.
+        """
+        found = set()
+        for ingredient in ingredients:
+            if isinstance(ingredient, int):
+                position = self.canonical_ids.get(ingredient)
+            else:
+                position = self.ingredient_ids.get(ingredient)
+            if position is not None:
+                found.add(position)
+        return found
+
+    def have_counts(self, ingredient_names):
+        """Count, per cocktail, how many of the given ingredients it uses"""
+        ingredient_ids = self.lookup(ingredient_names)
+        if not ingredient_ids:
+            return np.zeros(len(self.cocktail_ids), dtype=np.int32)
+        hits = np.concatenate([
+            self.postings[self.offsets[i]:self.offsets[i + 1]]
+            for i in ingredient_ids
+        ])
+        return np.bincount(hits, minlength=len(self.cocktail_ids))
+
+    def makeable(self, ingredient_names):
+        """Return ids of cocktails whose ingredients are all in ``ingredient_names``"""
+        positions = np.flatnonzero(self.have_counts(ingredient_names) == self.need)
+        return [self.cocktail_ids[p] for p in positions]
+
+    def missing_counts(self, ingredient_names):
+        """Number of ingredients each cocktail needs beyond ``ingredient_names``"""
+        return self.need - self.have_counts(ingredient_names)
+
+    def almost_makeable(self, ingredient_names, max_missing=1):
+        """Rank cocktails missing between 1 and ``max_missing`` ingredients
+
+        Returns ``(positions, missing)`` arrays ordered by missing count and
+        then catalog order; ``positions`` index into ``cocktail_ids``.
+        """
+        missing = self.missing_counts(ingredient_names)
+        positions = np.flatnonzero((missing > 0) & (missing <= max_missing))
+        positions = positions[np.argsort(missing[positions], kind='stable')]
+        return positions, missing[positions]
+
+    def ingredients_of(self, positions):
+        """Flatten the ingredient rows of ``positions`` into (owner, ingredient) arrays"""
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = self.cocktail_offsets[positions]
+        lengths = self.cocktail_offsets[positions + 1] - starts
+        owners = np.repeat(np.arange(len(positions)), lengths)
+        flat = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return owners, self.cocktail_ingredients[np.repeat(starts, lengths) + flat]
+
+    def missing_ingredients(self, positions, ingredient_names):
+        """Return (owner, ingredient) pairs for ingredients of ``positions`` not on the shelf"""
+        on_shelf = np.zeros(len(self.ingredient_names), dtype=bool)
+        on_shelf[list(self.lookup(ingredient_names))] = True
+        owners, ingredients = self.ingredients_of(positions)
+        keep = ~on_shelf[ingredients]
+        return owners[keep], ingredients[keep]
+
+
+_index = CatalogCache(lambda key: IngredientIndex.build())
+
+
+def get_ingredient_index():
+    """Return the shared index, rebuilding it when the catalog version moved"""
+    return _index.get()
+
+
+def invalidate_ingredient_index():
+    """Drop the shared index so the next query rebuilds it"""
+    _index.invalidate()
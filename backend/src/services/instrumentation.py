@@ -0,0 +1,270 @@
+"""
+Per-request SQL, serialization and latency measurements
+
+Engine events count the statements a request runs and the time spent in
+them, the serialization helpers add their encoding time, and an
+``after_request`` hook reports both in a ``Server-Timing`` header and folds
+them into per-route totals.  ``GET /api/_metrics`` serves those totals in
+the Prometheus text format.  Totals are per worker process, so with several
+gunicorn workers each scrape sees the worker that answered it.
+
+Requests slower than SLOW_REQUEST_MS and requests that run the same
+statement N_PLUS_ONE_THRESHOLD times or more are logged as warnings.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_REQUEST_MS = 500
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+
+# Upper bounds of the latency histogram, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+METRICS_PATH = '/api/_metrics'
+
+
+class RequestStats:
+    """Measurements for the request being handled, kept on ``flask.g``"""
+
+    __slots__ = ('started', 'queries', 'db_time', 'serialize_time', 'serializing', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.statements = Counter()
+
+
+def current_stats():
+    """The current request's stats, or None outside an instrumented request"""
+    if not has_request_context():
+        return None
+    return g.get('request_stats')
+
+
+@contextmanager
+def serialization_timer():
+    """Add the enclosed time to the request's serialization total
+
+    Nested timers (an encoder calling another) only count once.
+    """
+    stats = current_stats()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_time += time.perf_counter() - started
+        stats.serializing = False
+
+
+def timed_serialization(function):
+    """Decorator form of ``serialization_timer``"""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        with serialization_timer():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider with ``jsonify`` counted as serialization"""
+
+    def response(self, *args, **kwargs):
+        with serialization_timer():
+            return super().response(*args, **kwargs)
+
+
+class RouteMetrics:
+    """Running totals for one (route, method)"""
+
+    __slots__ = ('requests', 'statuses', 'buckets', 'latency', 'queries', 'db_time',
+                 'serialize_time', 'response_bytes')
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = Counter()
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    """Per-route totals shared by the worker's request threads"""
+
+    def __init__(self):
+        self.routes = {}
+        self.lock = threading.Lock()
+        # Callables returning [(name, type, help, value)] for other subsystems
+        self.collectors = []
+
+    def add_collector(self, collector):
+        """Include ``collector()``'s metrics in every render"""
+        self.collectors.append(collector)
+        return collector
+
+    def observe(self, route, method, status, latency, stats, response_bytes):
+        with self.lock:
+            metrics = self.routes.get((route, method))
+            if metrics is None:
+                metrics = self.routes[(route, method)] = RouteMetrics()
+            metrics.requests += 1
+            metrics.statuses[status] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    metrics.buckets[i] += 1
+                    break
+            metrics.latency += latency
+            metrics.queries += stats.queries
+            metrics.db_time += stats.db_time
+            metrics.serialize_time += stats.serialize_time
+            metrics.response_bytes += response_bytes
+
+    def render(self):
+        """Prometheus text exposition of every total"""
+        with self.lock:
+            snapshot = sorted(self.routes.items())
+            snapshot = [(key, _copy(metrics)) for key, metrics in snapshot]
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family('http_request_duration_seconds', 'histogram', 'Request latency by route')
+        for (route, method), metrics in snapshot:
+            labels = _labels(route=route, method=method)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.requests}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {metrics.latency:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {metrics.requests}')
+
+        family('http_requests_total', 'counter', 'Requests by route and status')
+        for (route, method), metrics in snapshot:
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(f'http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+        totals = (
+            ('http_request_db_queries_total', 'SQL statements run', 'queries', '{}'),
+            ('http_request_db_seconds_total', 'Time spent in SQL statements', 'db_time', '{:.6f}'),
+            ('http_request_serialization_seconds_total', 'Time spent encoding responses',
+             'serialize_time', '{:.6f}'),
+            ('http_response_bytes_total', 'Response body bytes', 'response_bytes', '{}'),
+        )
+        for name, help_text, attribute, number in totals:
+            family(name, 'counter', help_text)
+            for (route, method), metrics in snapshot:
+                value = number.format(getattr(metrics, attribute))
+                lines.append(f'{name}{{{_labels(route=route, method=method)}}} {value}')
+
+        for collector in self.collectors:
+            for name, kind, help_text, value in collector():
+                family(name, kind, help_text)
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(metrics):
+    copy = RouteMetrics()
+    for name in RouteMetrics.__slots__:
+        value = getattr(metrics, name)
+        setattr(copy, name, value.copy() if hasattr(value, 'copy') else value)
+    return copy
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+registry = MetricsRegistry()
+
+
+def instrument_engine(engine):
+    """Count statements and their time for the request running them"""
+
+    # The start time lives on the statement's execution context, which is
+    # dropped with it whether or not the statement raised
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = context._query_started
+        stats = current_stats()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - started
+            stats.statements[statement] += 1
+
+
+def init_instrumentation(app, engine):
+    """Install the request hooks, the engine events and the metrics endpoint"""
+    slow_seconds = int(os.environ.get('SLOW_REQUEST_MS', DEFAULT_SLOW_REQUEST_MS)) / 1000
+    n_plus_one = int(os.environ.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD))
+    app.json = TimedJSONProvider(app)
+    instrument_engine(engine)
+
+    @app.before_request
+    def _start_request():
+        g.request_stats = RequestStats()
+
+    @app.after_request
+    def _finish_request(response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+        latency = time.perf_counter() - stats.started
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"',
+            f'serialize;dur={stats.serialize_time * 1000:.2f}',
+            f'app;dur={latency * 1000:.2f}',
+        ])
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        response_bytes = 0 if response.is_streamed else (response.content_length or 0)
+        registry.observe(route, request.method, response.status_code, latency, stats, response_bytes)
+
+        if latency >= slow_seconds:
+            logger.warning(
+                "Slow request %s %s: %.1f ms (%d queries, %.1f ms SQL, %.1f ms serialization)",
+                request.method, request.full_path.rstrip('?'), latency * 1000,
+                stats.queries, stats.db_time * 1000, stats.serialize_time * 1000
+            )
+        if stats.statements:
+            statement, count = stats.statements.most_common(1)[0]
+            if count >= n_plus_one:
+                logger.warning(
+                    "Possible N+1 in %s %s: statement ran %d times: %s",
+                    request.method, route, count, ' '.join(statement.split())[:200]
+                )
+        return response
+
+    @app.route(METRICS_PATH)
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,68 @@
+"""
+Catalog-derived structures saved beside the database and memory-mapped
+
+A structure is saved once per catalog version under
+``<database><suffix>/<epoch>-v<version>/`` (see ``get_catalog_key``: the
+epoch keeps a rebuilt database from reusing the directory of the one it
+replaced when their versions coincide) and every process then opens that
+directory with ``mmap_mode='r'``, so gunicorn workers share one copy of the
+pages instead of each building and holding its own.  A new version is
+written to a staging directory and renamed into place, so readers never
+see a half-written one; older versions are removed once the new one is in
+place (processes still mapping them keep their pages until they let go).
+
+Structures implement ``build()`` and ``load(directory)`` classmethods and
+``save(directory)``.
+"""
+
+import logging
+import os
+import shutil
+import threading
+
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+
+def store_root(suffix):
+    """Directory holding the saved versions, or None for in-memory databases"""
+    database = db.engine.url.database
+    if not database or database == ':memory:':
+        return None
+    return os.path.abspath(database) + suffix
+
+
+def load_or_build(cls, suffix, key):
+    """Map the saved ``cls`` structure for catalog ``key``, building and saving it if needed
+
+    ``key`` is ``(epoch, version)`` from ``get_catalog_key``.
+    """
+    root = store_root(suffix)
+    if root is None:
+        return cls.build()
+    epoch, version = key
+    name = f"{epoch}-v{version}"
+    directory = os.path.join(root, name)
+    if os.path.isdir(directory):
+        try:
+            return cls.load(directory)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Rebuilding unreadable %s %s: %s", cls.__name__, directory, e)
+    built = cls.build()
+    staging = os.path.join(root, f".{name}-{os.getpid()}-{threading.get_ident()}")
+    try:
+        shutil.rmtree(staging, ignore_errors=True)
+        built.save(staging)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # Another worker saved this key first
+            shutil.rmtree(staging, ignore_errors=True)
+        for entry in os.listdir(root):
+            if entry != name and not entry.startswith('.'):
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+        return cls.load(directory)
+    except OSError as e:
+        logger.warning("Serving an unsaved %s: %s", cls.__name__, e)
+        return built
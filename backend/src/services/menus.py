@@ -0,0 +1,143 @@
+"""
+House menus loaded from JSON files and kept pre-serialized in memory
+
+Each menu is a JSON array of cocktails shaped like the catalog records.  A
+file is validated when it is first loaded; the encoded array body is then
+reused for every request.  The file's mtime is re-checked at most every
+``RELOAD_CHECK_SECONDS``, so editing the file swaps the menu in without a
+restart.  An edit that fails validation is logged and the previous menu
+keeps being served.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from src.services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+MENU_DIR = os.environ.get(
+    'MENU_DIR', os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+# Menu slug -> file name under MENU_DIR
+MENU_FILES = {
+    'fall-2025': 'fall_2025_menu.json',
+}
+CURRENT_MENU = 'fall-2025'
+
+RELOAD_CHECK_SECONDS = 2.0
+
+_REQUIRED_TEXT_FIELDS = ('id', 'name')
+_OPTIONAL_TEXT_FIELDS = (
+    'category', 'alcoholic', 'glass', 'instructions', 'image', 'garnish',
+    'notes', 'date_modified', 'video', 'iba'
+)
+
+
+def validate_menu(items, source='menu'):
+    """Check a decoded menu; raises ValueError naming the first bad entry"""
+    if not isinstance(items, list):
+        raise ValueError(f"{source}: expected a JSON array of cocktails")
+    seen = set()
+    for position, item in enumerate(items):
+        where = f"{source}[{position}]"
+        if not isinstance(item, dict):
+            raise ValueError(f"{where}: expected an object")
+        for field in _REQUIRED_TEXT_FIELDS:
+            if not isinstance(item.get(field), str) or not item[field].strip():
+                raise ValueError(f"{where}: '{field}' must be a non-empty string")
+        for field in _OPTIONAL_TEXT_FIELDS:
+            if item.get(field) is not None and not isinstance(item[field], str):
+                raise ValueError(f"{where}: '{field}' must be a string")
+        if item['id'] in seen:
+            raise ValueError(f"{where}: duplicate id {item['id']!r}")
+        seen.add(item['id'])
+        ingredients = item.get('ingredients', [])
+        if not isinstance(ingredients, list) or not all(
+            isinstance(i, dict) and isinstance(i.get('name'), str) and i['name'].strip()
+            and isinstance(i.get('measure', ''), (str, type(None)))
+            for i in ingredients
+        ):
+            raise ValueError(f"{where}: 'ingredients' must be a list of {{name, measure}} objects")
+        tags = item.get('tags', [])
+        if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+            raise ValueError(f"{where}: 'tags' must be a list of strings")
+    return items
+
+
+class Menu:
+    """One loaded menu: the items and their encoded JSON array elements"""
+
+    __slots__ = ('slug', 'version', 'items', 'body', 'etag')
+
+    def __init__(self, slug, version, items):
+        self.slug = slug
+        self.version = version
+        self.items = items
+        # Comma-joined elements without the surrounding brackets, for splicing
+        self.body = b','.join(dumps(item) for item in items)
+        self.etag = f"{slug}-{version}-{hashlib.sha1(self.body).hexdigest()[:12]}"
+
+
+class MenuFile:
+    """A menu file with hot reload on mtime change"""
+
+    def __init__(self, slug, path):
+        self.slug = slug
+        self.path = path
+        self.menu = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """(Re)read and validate the file; raises on a missing or invalid file"""
+        stamp = self._file_stamp()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            items = validate_menu(json.load(f), source=os.path.basename(self.path))
+        version = self.menu.version + 1 if self.menu is not None else 1
+        self.menu = Menu(self.slug, version, items)
+        self._stamp = stamp
+        return self.menu
+
+    def get(self):
+        """Return the current menu, reloading it if the file changed"""
+        now = time.monotonic()
+        if self.menu is not None and now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return self.menu
+        with self._lock:
+            if self.menu is not None and now - self._checked_at < RELOAD_CHECK_SECONDS:
+                return self.menu
+            self._checked_at = now
+            if self.menu is None:
+                return self.load()
+            try:
+                if self._file_stamp() != self._stamp:
+                    self.load()
+                    logger.info("Reloaded menu %s (version %d)", self.slug, self.menu.version)
+            except (OSError, ValueError) as e:
+                logger.warning("Keeping menu %s version %d: %s", self.slug, self.menu.version, e)
+            return self.menu
+
+
+_menus = {slug: MenuFile(slug, os.path.join(MENU_DIR, name)) for slug, name in MENU_FILES.items()}
+
+
+def get_menu(slug=CURRENT_MENU):
+    """Return the loaded Menu for ``slug``; KeyError for an unknown menu"""
+    return _menus[slug].get()
+
+
+def load_menus():
+    """Load and validate every configured menu, failing loudly on a bad file"""
+    for menu_file in _menus.values():
+        menu_file.load()
@@ -0,0 +1,51 @@
+"""
+Keyset cursors and bounded counts for list endpoints
+"""
+
+import base64
+import json
+
+from sqlalchemy import func, select
+
+from src.models.user import db
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+# count=estimate stops counting after this many matches
+ESTIMATE_COUNT_CAP = 10000
+
+
+def encode_cursor(sort_key, row_id):
+    """Pack the (sort key, id) of the last returned row into an opaque token"""
+    payload = json.dumps([sort_key, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Unpack a token from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from e
+    if not isinstance(row_id, str) or not isinstance(sort_key, (str, int, float)):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    return sort_key, row_id
+
+
+def count_rows(query, mode):
+    """Count the rows of ``query`` according to ``mode``
+
+    Returns ``(total, exact)``.  ``estimate`` counts at most
+    ESTIMATE_COUNT_CAP matches, so it reports ``exact=False`` for large
+    result sets instead of walking all of them; ``none`` skips counting.
+    """
+    if mode == 'none':
+        return None, False
+    if mode == 'exact':
+        return query.order_by(None).count(), True
+    bounded = query.order_by(None).with_entities(db.literal(1)).limit(ESTIMATE_COUNT_CAP + 1).subquery()
+    total = db.session.execute(select(func.count()).select_from(bounded)).scalar()
+    if total > ESTIMATE_COUNT_CAP:
+        return ESTIMATE_COUNT_CAP, False
+    return total, True
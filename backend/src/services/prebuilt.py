@@ -0,0 +1,53 @@
+"""
+Start a fresh deployment from a database prebuilt by ``load_cocktails.py``
+
+The image loads the catalog once at build time into a read-only seed file
+(``SEED_DATABASE_PATH``).  On a boot that finds no database at
+``DATABASE_PATH`` (a new volume, say), the seed and the snapshot and
+similarity directories saved beside it are copied into place (replacing
+any left there), so the app serves the full catalog without loading it
+again.  The seed was stamped with the schema version when it was built,
+so ``prepare_database`` then has nothing to do.
+"""
+
+import logging
+import os
+import shutil
+
+from src.services.catalog_snapshot import SNAPSHOT_SUFFIX
+from src.services.similarity import SIMILARITY_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+# Directories of catalog-derived files saved next to a database
+DERIVED_SUFFIXES = (SNAPSHOT_SUFFIX, SIMILARITY_SUFFIX)
+
+
+def seed_database(database_path, seed_path):
+    """Copy ``seed_path`` to ``database_path`` if the latter does not exist yet
+
+    The seed must not be open for writing (the loader has exited).  Returns
+    True when a copy was made.
+    """
+    if not seed_path or os.path.exists(database_path):
+        return False
+    if not os.path.exists(seed_path):
+        logger.warning("Seed database %s not found; starting empty", seed_path)
+        return False
+    os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+    # Copy under a temporary name so a crash never leaves half a database
+    staging = f"{database_path}.{os.getpid()}.seed"
+    shutil.copyfile(seed_path, staging)
+    os.replace(staging, database_path)
+    # Directories already beside the new database were derived from another
+    # one, so they are replaced, never merged.  Saved structures are only an
+    # optimization: one left missing or unreadable by a crash here is
+    # rebuilt on first use
+    for suffix in DERIVED_SUFFIXES:
+        source = os.path.abspath(seed_path) + suffix
+        target = os.path.abspath(database_path) + suffix
+        shutil.rmtree(target, ignore_errors=True)
+        if os.path.isdir(source):
+            shutil.copytree(source, target)
+    logger.info("Seeded %s from %s", database_path, seed_path)
+    return True
@@ -0,0 +1,57 @@
+"""
+Constant-time random cocktail selection from cached id lists
+"""
+
+import random
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.catalog_cache import CatalogCache
+
+
+class RandomPool:
+    """Cocktail ids grouped by every (category, alcoholic) filter combination
+
+    Built with one scan of the catalog; picking is then ``random.sample`` over
+    the matching list, so the cost does not grow with the catalog size.
+    """
+
+    def __init__(self, rows):
+        self.ids = []
+        # (category or None, alcoholic or None) -> ids
+        self.groups = {}
+        for cocktail_id, category, alcoholic in rows:
+            self.ids.append(cocktail_id)
+            for key in ((category, None), (None, alcoholic), (category, alcoholic)):
+                self.groups.setdefault(key, []).append(cocktail_id)
+
+    @classmethod
+    def build(cls):
+        return cls(db.session.execute(
+            db.select(Cocktail.id, Cocktail.category, Cocktail.alcoholic)
+            .order_by(db.literal_column('cocktail.rowid'))
+        ))
+
+    def candidates(self, category=None, alcoholic=None):
+        """The id list matching the filters (falsy filters match everything)"""
+        if not category and not alcoholic:
+            return self.ids
+        return self.groups.get((category or None, alcoholic or None), [])
+
+    def pick(self, n=1, category=None, alcoholic=None, rng=random):
+        """Up to ``n`` distinct random ids matching the filters"""
+        ids = self.candidates(category, alcoholic)
+        return rng.sample(ids, min(n, len(ids)))
+
+
+_pool = CatalogCache(lambda key: RandomPool.build())
+
+
+def get_random_pool():
+    """Return the shared pool, rebuilding it when the catalog version moved"""
+    return _pool.get()
+
+
+def invalidate_random_pool():
+    """Drop the shared pool so the next pick rebuilds it"""
+    _pool.invalidate()
@@ -0,0 +1,160 @@
+"""
+Cache encoded catalog responses per catalog version
+
+Catalog routes only change when the catalog does, so their encoded bodies
+are kept in a size-bounded LRU keyed by (endpoint, view arguments,
+normalized query string) under the current catalog key (the database's
+epoch and the catalog version, see ``get_catalog_key``); a version bump
+(any cocktail write, e.g. a ``load_cocktails.py`` run, in any process) or a
+different database makes every older entry unreachable and the first
+request to see the new key empties the cache.
+
+Responses carry an ``ETag`` (which includes the catalog key, so a body
+from a replaced database never revalidates) and a ``Last-Modified`` time
+(when the version last moved), and ``Cache-Control: public, no-cache`` so
+browsers and the nginx proxy revalidate with a conditional request that
+costs one primary-key lookup and a cache hit.  ``X-Cache`` says whether the
+body was cached.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from src.services.catalog_events import on_catalog_change
+from src.services.catalog_version import get_catalog_state
+from src.services.instrumentation import registry
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MAX_MB = 64
+
+
+class CachedResponse:
+    """An encoded 200 response"""
+
+    __slots__ = ('body', 'mimetype', 'etag')
+
+    def __init__(self, body, mimetype, etag):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+
+
+class ResponseCache:
+    """LRU of ``CachedResponse`` bounded by entry count and total body bytes"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_MB * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.catalog_key = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, catalog_key, key):
+        with self.lock:
+            if catalog_key != self.catalog_key:
+                self._clear(catalog_key)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, catalog_key, key, entry):
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if catalog_key != self.catalog_key:
+                # The catalog moved while this response was built
+                return
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous.body)
+            self.entries[key] = entry
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted.body)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self._clear(None)
+
+    def _clear(self, catalog_key):
+        self.entries.clear()
+        self.bytes = 0
+        self.catalog_key = catalog_key
+
+    def stats(self):
+        """Counters for /api/_metrics"""
+        with self.lock:
+            return [
+                ('response_cache_hits_total', 'counter', 'Catalog responses served from the cache', self.hits),
+                ('response_cache_misses_total', 'counter', 'Catalog responses that had to be built', self.misses),
+                ('response_cache_evictions_total', 'counter', 'Entries dropped to stay within bounds',
+                 self.evictions),
+                ('response_cache_entries', 'gauge', 'Responses currently cached', len(self.entries)),
+                ('response_cache_bytes', 'gauge', 'Body bytes currently cached', self.bytes),
+            ]
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_ENTRIES', DEFAULT_MAX_ENTRIES)),
+    max_bytes=int(float(os.environ.get('RESPONSE_CACHE_MB', DEFAULT_MAX_MB)) * 2 ** 20),
+)
+registry.add_collector(response_cache.stats)
+
+
+@on_catalog_change
+def invalidate_response_cache():
+    """Free this process's cached responses as soon as it writes the catalog"""
+    response_cache.clear()
+
+
+def normalized_args():
+    """The query string as sorted (name, value) pairs, so parameter order doesn't matter"""
+    return tuple(sorted((name, value.strip()) for name, value in request.args.items(multi=True)))
+
+
+def cached_catalog_response(view):
+    """Serve ``view`` from the response cache, with conditional-request support
+
+    Only 200 responses are cached; errors are rebuilt every time.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        epoch, version, updated_at = get_catalog_state()
+        key = (request.endpoint, tuple(sorted(kwargs.items())), normalized_args())
+        entry = response_cache.get((epoch, version), key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            body = response.get_data()
+            etag = f"c{epoch}-{version}-{hashlib.sha1(body).hexdigest()[:16]}"
+            response_cache.put((epoch, version), key, CachedResponse(body, response.mimetype, etag))
+            response.headers['X-Cache'] = 'MISS'
+        else:
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.headers['X-Cache'] = 'HIT'
+            etag = entry.etag
+
+        response.set_etag(etag)
+        if updated_at:
+            response.last_modified = datetime.fromtimestamp(updated_at, timezone.utc)
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response.make_conditional(request)
+    return wrapper
@@ -0,0 +1,120 @@
+"""
+Create the triggers and derived tables that sit beside the ORM models
+
+``prepare_database`` runs the whole pass (``db.create_all()`` and every
+idempotent step) only when the database is not stamped with the current
+schema version, so a database prepared once (by ``load_cocktails.py``, or
+by the first boot) starts without reflecting or rewriting anything.  The
+version is a checksum of the modules that define the schema, kept in
+SQLite's ``user_version``: any edit to them runs the pass once more.
+"""
+
+import importlib
+import re
+import zlib
+
+from sqlalchemy import text
+
+from src.models.user import db
+
+# Modules whose code decides the tables, triggers and derived data
+SCHEMA_MODULES = (
+    'src.models.user',
+    'src.models.cocktail',
+    'src.services.schema',
+    'src.services.bar_shelf',
+    'src.services.catalog_version',
+    'src.services.favorites',
+    'src.services.catalog_relations',
+    'src.services.catalog_metadata',
+    'src.services.search',
+    'src.services.canonical',
+)
+
+_TRIGGER_NAME_RE = re.compile(r'CREATE TRIGGER IF NOT EXISTS (\w+)')
+
+
+def replace_schema_objects(statements):
+    """Execute ``statements``, dropping each trigger they create first
+
+    ``CREATE TRIGGER IF NOT EXISTS`` alone would keep a trigger left by an
+    older definition; other statements are run as they are.
+    """
+    for statement in statements:
+        name = _TRIGGER_NAME_RE.search(statement)
+        if name:
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {name.group(1)}"))
+        db.session.execute(text(statement))
+
+
+def migrate_model_tables():
+    """Add columns and indexes that models gained after a database was created
+
+    ``db.create_all()`` only creates missing tables.  New columns must be
+    nullable (or have a server default) to be added this way.  Statistics
+    are refreshed after new indexes so the planner knows how selective they
+    are.
+    """
+    connection = db.session.connection()
+    inspector = db.inspect(connection)
+    created = False
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(connection.dialect)
+                db.session.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                ))
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+                created = True
+    if created:
+        db.session.execute(text("ANALYZE"))
+    db.session.commit()
+
+
+def ensure_catalog_schema():
+    """Run every idempotent schema step; call after ``db.create_all()``"""
+    # Imported here because the step modules import replace_schema_objects
+    from src.services import (
+        bar_shelf, canonical, catalog_metadata, catalog_relations, catalog_version, favorites, search,
+    )
+    # Older databases may hold duplicates the new unique index would reject
+    bar_shelf.dedupe_bar_shelf()
+    favorites.dedupe_favorites()
+    migrate_model_tables()
+    catalog_version.ensure_catalog_version()
+    favorites.ensure_favorite_state()
+    catalog_relations.ensure_catalog_relations()
+    catalog_metadata.ensure_catalog_metadata()
+    search.ensure_search_index()
+    canonical.sync_canonical_ingredients()
+
+
+def schema_version():
+    """Checksum of the schema modules' source, as a positive 31-bit ``user_version``"""
+    checksum = 0
+    for name in SCHEMA_MODULES:
+        with open(importlib.import_module(name).__file__, 'rb') as f:
+            checksum = zlib.crc32(f.read(), checksum)
+    # 0 is what SQLite reports for a database never stamped
+    return (checksum & 0x7fffffff) or 1
+
+
+def prepare_database():
+    """Create tables and run every schema step unless the database is already current
+
+    Returns True when the pass ran.  Call before anything else touches the
+    database, inside an app context.
+    """
+    version = schema_version()
+    if db.session.execute(text("PRAGMA user_version")).scalar() == version:
+        return False
+    db.create_all()
+    ensure_catalog_schema()
+    db.session.execute(text(f"PRAGMA user_version = {version}"))
+    db.session.commit()
+    return True
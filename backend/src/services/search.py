@@ -0,0 +1,167 @@
+"""
+SQLite FTS5 full-text search over the cocktail catalog
+"""
+
+import html
+import re
+
+from sqlalchemy import text
+
+from src.models.user import db
+from src.services.schema import replace_schema_objects
+
+FTS_TABLE = 'cocktail_fts'
+# cocktail id -> rowid of its FTS document
+DOC_TABLE = 'cocktail_fts_doc'
+
+# bm25() column weights: cocktail_id (unindexed), name, ingredients, tags, instructions
+BM25_WEIGHTS = '0.0, 10.0, 5.0, 2.0, 1.0'
+
+# Private-use characters FTS wraps matches in, so the text around them can
+# be escaped before they become <mark> tags
+_MARK_OPEN, _MARK_CLOSE = '\ue000', '\ue001'
+
+_INGREDIENT_NAMES_SQL = (
+    "(SELECT group_concat(json_extract(value, '$.name'), ' ') "
+    "FROM json_each(coalesce({row}.ingredients_json, '[]')))"
+)
+_TAGS_SQL = (
+    "(SELECT group_concat(value, ' ') "
+    "FROM json_each(coalesce({row}.tags_json, '[]')))"
+)
+
+
+def _document_values(row):
+    """SQL expressions for the FTS columns of a cocktail row alias"""
+    return (
+        f"{row}.id, {row}.name, "
+        f"{_INGREDIENT_NAMES_SQL.format(row=row)}, "
+        f"{_TAGS_SQL.format(row=row)}, {row}.instructions"
+    )
+
+
+def _doc_id(cocktail_id):
+    return f"(SELECT doc_id FROM {DOC_TABLE} WHERE cocktail_id = {cocktail_id})"
+
+
+# Queries join the FTS table to cocktail on its cocktail_id column.  The
+# triggers address a cocktail's document by the FTS rowid, which is the
+# cocktail's doc_id in DOC_TABLE: an INTEGER PRIMARY KEY, so unlike
+# cocktail's implicit rowid (its key is a string) a VACUUM never renumbers it.
+SCHEMA_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        cocktail_id UNINDEXED, name, ingredients, tags, instructions,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {DOC_TABLE} (
+        doc_id INTEGER PRIMARY KEY,
+        cocktail_id VARCHAR(50) NOT NULL UNIQUE
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON cocktail BEGIN
+        INSERT INTO {DOC_TABLE}(cocktail_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, cocktail_id, name, ingredients, tags, instructions)
+        SELECT {_doc_id('new.id')}, {_document_values('new')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON cocktail BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_doc_id('old.id')};
+        DELETE FROM {DOC_TABLE} WHERE cocktail_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON cocktail BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_doc_id('old.id')};
+        UPDATE {DOC_TABLE} SET cocktail_id = new.id WHERE cocktail_id = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, cocktail_id, name, ingredients, tags, instructions)
+        SELECT {_doc_id('new.id')}, {_document_values('new')};
+    END
+    """,
+]
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def ensure_search_index():
+    """Create the FTS table and its sync triggers, backfilling existing databases"""
+    replace_schema_objects(SCHEMA_STATEMENTS)
+    has_documents = db.session.execute(text(f"SELECT 1 FROM {DOC_TABLE} LIMIT 1")).first()
+    has_cocktails = db.session.execute(text("SELECT 1 FROM cocktail LIMIT 1")).first()
+    if has_cocktails and not has_documents:
+        # A new database, or one indexed by cocktail rowid before DOC_TABLE existed
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        _populate()
+    db.session.commit()
+
+
+def rebuild_search_index():
+    """Repopulate the FTS table from the cocktail table"""
+    ensure_search_index()
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    db.session.execute(text(f"DELETE FROM {DOC_TABLE}"))
+    _populate()
+    db.session.commit()
+
+
+def _populate():
+    db.session.execute(text(f"INSERT INTO {DOC_TABLE}(cocktail_id) SELECT id FROM cocktail"))
+    db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE}(rowid, cocktail_id, name, ingredients, tags, instructions) "
+        f"SELECT doc.doc_id, {_document_values('cocktail')} "
+        f"FROM cocktail JOIN {DOC_TABLE} doc ON doc.cocktail_id = cocktail.id"
+    ))
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+
+
+def match_expression(search):
+    """Turn free text into an FTS5 query that prefix-matches every word
+
+    Returns None when the input has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(search)
+    if not tokens:
+        return None
+    return ' AND '.join(f'"{token}"*' for token in tokens)
+
+
+def search_matches(match):
+    """Subquery of (cocktail_id, rank) for every cocktail matching ``match``"""
+    return text(
+        f"SELECT cocktail_id, bm25({FTS_TABLE}, {BM25_WEIGHTS}) AS fts_rank "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    ).bindparams(match=match).columns(
+        db.column('cocktail_id', db.String), db.column('fts_rank', db.Float)
+    ).subquery('fts')
+
+
+def _marked_html(value):
+    """Escape catalog text, then turn the FTS markers into <mark> tags"""
+    if value is None:
+        return None
+    return html.escape(value).replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+def search_highlights(match, cocktail_ids):
+    """Return {cocktail_id: {'name': ..., 'snippet': ...}} as escaped HTML with <mark> highlights"""
+    if not cocktail_ids:
+        return {}
+    rows = db.session.execute(
+        text(
+            f"SELECT cocktail_id, "
+            f"highlight({FTS_TABLE}, 1, :open, :close), "
+            f"snippet({FTS_TABLE}, -1, :open, :close, '…', 12) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+            f"AND cocktail_id IN :ids"
+        ).bindparams(db.bindparam('ids', expanding=True)),
+        {'match': match, 'ids': list(cocktail_ids), 'open': _MARK_OPEN, 'close': _MARK_CLOSE}
+    )
+    return {
+        row[0]: {'name': _marked_html(row[1]), 'snippet': _marked_html(row[2])}
+        for row in rows
+    }
@@ -0,0 +1,112 @@
+"""
+Encode cocktail rows straight to JSON bytes
+
+The stored ``ingredients_json``/``tags_json`` text is already valid JSON, so
+it is spliced into the output as-is instead of being decoded by ``to_dict``
+and re-encoded by ``jsonify``.  Scalar fields go through orjson when it is
+installed and the standard library otherwise.
+"""
+
+import json
+
+from flask import Response
+
+from src.models.cocktail import Cocktail
+from src.services.instrumentation import timed_serialization
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Field order of Cocktail.to_dict
+COCKTAIL_FIELDS = (
+    'id', 'name', 'category', 'alcoholic', 'glass', 'instructions', 'image',
+    'ingredients', 'video', 'tags', 'iba', 'date_modified', 'garnish'
+)
+
+# Fields whose column already holds encoded JSON
+RAW_JSON_COLUMNS = {'ingredients': 'ingredients_json', 'tags': 'tags_json'}
+
+
+def dumps(value):
+    """Encode ``value`` to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def parse_fields(value):
+    """Parse a ``fields=id,name,...`` argument
+
+    Returns None (all fields) for an empty value and raises ValueError for
+    unknown names.
+    """
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in COCKTAIL_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}; choose from {', '.join(COCKTAIL_FIELDS)}"
+        )
+    return fields or None
+
+
+def cocktail_columns(fields=None):
+    """Columns to select for ``fields``; ``Cocktail.id`` is always included"""
+    names = fields or COCKTAIL_FIELDS
+    columns = [Cocktail.id]
+    for name in names:
+        if name != 'id':
+            columns.append(getattr(Cocktail, RAW_JSON_COLUMNS.get(name, name)))
+    return columns
+
+
+@timed_serialization
+def encode_cocktail(row, fields=None, extra=None):
+    """Encode one Cocktail (or a row of cocktail_columns) as a JSON object"""
+    names = fields or COCKTAIL_FIELDS
+    scalars = {name: getattr(row, name) for name in names if name not in RAW_JSON_COLUMNS}
+    if extra:
+        scalars.update(extra)
+    encoded = dumps(scalars)
+    raw = [
+        b'"' + name.encode('ascii') + b'":'
+        + (getattr(row, RAW_JSON_COLUMNS[name]) or '[]').encode('utf-8')
+        for name in names if name in RAW_JSON_COLUMNS
+    ]
+    if not raw:
+        return encoded
+    separator = b',' if scalars else b''
+    return encoded[:-1] + separator + b','.join(raw) + b'}'
+
+
+@timed_serialization
+def encode_cocktails(rows, fields=None, extras=None):
+    """Encode rows as a JSON array; ``extras`` maps cocktail id to extra fields"""
+    extras = extras or {}
+    # The undecorated encoder; this call is already being timed
+    encode = encode_cocktail.__wrapped__
+    return b'[' + b','.join(
+        encode(row, fields, extras.get(row.id)) for row in rows
+    ) + b']'
+
+
+@timed_serialization
+def json_response(payload, status=200, **raw_fields):
+    """Build a JSON response from ``payload`` plus already-encoded fields
+
+    ``raw_fields`` values are JSON bytes (e.g. from ``encode_cocktails``)
+    added to the top-level object without being decoded again.
+    """
+    if isinstance(payload, bytes):
+        body = payload
+    else:
+        body = dumps(payload)
+        if raw_fields:
+            spliced = b','.join(
+                b'"' + name.encode('ascii') + b'":' + value for name, value in raw_fields.items()
+            )
+            body = body[:-1] + (b',' if payload else b'') + spliced + b'}'
+    return Response(body, status=status, mimetype='application/json')
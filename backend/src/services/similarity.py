@@ -0,0 +1,187 @@
+"""
+Similar-cocktail lookups over sparse ingredient and tag vectors
+
+Every cocktail is a sparse vector over canonical ingredients and tags.
+Features are weighted by inverse document frequency (sharing vodka says
+less than sharing falernum), tags count ``TAG_WEIGHT`` as much as
+ingredients, and rows are L2-normalized, so the dot product of two rows is
+their cosine similarity.  The matrix is kept twice: by row (CSR) to read a
+cocktail's own features, and by feature (CSC) so one query is a single
+``bincount`` over the postings of the features it has, never a loop over
+the catalog.
+
+The arrays are written as ``.npy`` files under ``<database>.similarity/``,
+one directory per catalog key (the database's epoch and the catalog
+version, so a rebuilt database never maps its predecessor's model), and
+memory-mapped (see ``mapped_store``): the first process to need a version
+builds and saves it (``load_cocktails.py`` does so right after a load), and
+every gunicorn worker then maps the same pages instead of rebuilding.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from src.models.user import db
+from src.models.cocktail import CocktailTag, Tag
+from src.services.catalog_cache import CatalogCache
+from src.services.ingredient_index import get_ingredient_index
+from src.services.mapped_store import load_or_build, store_root
+
+TAG_WEIGHT = 0.5
+SIMILARITY_SUFFIX = '.similarity'
+
+ARRAYS = ('row_offsets', 'row_features', 'row_weights', 'feature_offsets', 'feature_rows',
+          'feature_weights', 'cocktail_ids')
+
+
+class SimilarityModel:
+    """Normalized feature vectors of every catalog cocktail"""
+
+    def __init__(self, arrays, feature_names, ingredient_count):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.feature_names = feature_names
+        self.ingredient_count = ingredient_count
+        self._positions = None
+
+    @classmethod
+    def build(cls):
+        """Build from the ingredient index (canonical ingredients) and the tag links"""
+        index = get_ingredient_index()
+        count = len(index)
+        ingredient_count = len(index.ingredient_names)
+        tag_rows = db.session.execute(
+            db.select(CocktailTag.cocktail_id, Tag.name).join(Tag, Tag.id == CocktailTag.tag_id)
+        ).all()
+        tag_names = sorted({name for _, name in tag_rows})
+        tag_features = {name: ingredient_count + i for i, name in enumerate(tag_names)}
+        positions = {cocktail_id: p for p, cocktail_id in enumerate(index.cocktail_ids)}
+
+        rows = [np.repeat(np.arange(count, dtype=np.int32), index.need)]
+        features = [index.cocktail_ingredients.astype(np.int32)]
+        tag_pairs = [
+            (positions[cocktail_id], tag_features[name])
+            for cocktail_id, name in tag_rows if cocktail_id in positions
+        ]
+        if tag_pairs:
+            pairs = np.asarray(tag_pairs, dtype=np.int32)
+            rows.append(pairs[:, 0])
+            features.append(pairs[:, 1])
+        rows = np.concatenate(rows)
+        features = np.concatenate(features)
+        feature_count = ingredient_count + len(tag_names)
+
+        # IDF weights, tags scaled down, then unit-length rows
+        frequency = np.bincount(features, minlength=feature_count)
+        idf = np.log((1 + count) / (1 + frequency)) + 1
+        idf[ingredient_count:] *= TAG_WEIGHT
+        weights = idf[features]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=count))
+        weights = (weights / np.where(norms > 0, norms, 1)[rows]).astype(np.float32)
+
+        by_row = np.lexsort((features, rows))
+        by_feature = np.argsort(features, kind='stable')
+        arrays = {
+            'row_offsets': _offsets(rows, count),
+            'row_features': features[by_row],
+            'row_weights': weights[by_row],
+            'feature_offsets': _offsets(features, feature_count),
+            'feature_rows': rows[by_feature],
+            'feature_weights': weights[by_feature],
+            'cocktail_ids': np.asarray(index.cocktail_ids, dtype=str),
+        }
+        return cls(arrays, list(index.ingredient_names) + tag_names, ingredient_count)
+
+    def save(self, directory):
+        """Write the arrays and feature names into ``directory`` (created)"""
+        os.makedirs(directory)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'features.json'), 'w', encoding='utf-8') as f:
+            json.dump({'names': self.feature_names, 'ingredients': self.ingredient_count}, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Map a directory written by ``save``"""
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+            for name in ARRAYS
+        }
+        with open(os.path.join(directory, 'features.json'), 'r', encoding='utf-8') as f:
+            features = json.load(f)
+        return cls(arrays, features['names'], features['ingredients'])
+
+    def __len__(self):
+        return len(self.cocktail_ids)
+
+    def position(self, cocktail_id):
+        """Row of ``cocktail_id``, or None"""
+        if self._positions is None:
+            self._positions = {str(c): p for p, c in enumerate(self.cocktail_ids)}
+        return self._positions.get(cocktail_id)
+
+    def features_of(self, position):
+        start, end = self.row_offsets[position], self.row_offsets[position + 1]
+        return self.row_features[start:end], self.row_weights[start:end]
+
+    def scores(self, position):
+        """Cosine similarity of every cocktail to the one at ``position``"""
+        features, weights = self.features_of(position)
+        if not len(features):
+            return np.zeros(len(self), dtype=np.float64)
+        starts = self.feature_offsets[features]
+        lengths = self.feature_offsets[features + 1] - starts
+        # Gather the postings of the query's features in one go
+        flat = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        gather = np.repeat(starts, lengths) + flat
+        contributions = self.feature_weights[gather] * np.repeat(weights, lengths)
+        return np.bincount(self.feature_rows[gather], weights=contributions, minlength=len(self))
+
+    def similar(self, position, k):
+        """The ``k`` most similar cocktails as ``(position, score)``, best first
+
+        The cocktail itself and cocktails sharing nothing are left out; ties
+        keep catalog order.
+        """
+        scores = self.scores(position)
+        scores[position] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            # Keep everything tied with the k-th best, then let the sort pick
+            kth = -np.partition(-scores[candidates], k - 1)[k - 1]
+            candidates = candidates[scores[candidates] >= kth]
+        order = np.lexsort((candidates, -scores[candidates]))[:k]
+        return [(int(p), float(scores[p])) for p in candidates[order]]
+
+    def shared(self, position, other):
+        """(ingredient names, tag names) the two cocktails have in common"""
+        common = np.intersect1d(self.features_of(position)[0], self.features_of(other)[0])
+        names = [self.feature_names[f] for f in common]
+        split = int(np.searchsorted(common, self.ingredient_count))
+        return names[:split], names[split:]
+
+
+def _offsets(keys, count):
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=count), out=offsets[1:])
+    return offsets
+
+
+def similarity_root():
+    """Directory holding the saved models, or None for in-memory databases"""
+    return store_root(SIMILARITY_SUFFIX)
+
+
+_model = CatalogCache(lambda key: load_or_build(SimilarityModel, SIMILARITY_SUFFIX, key))
+
+
+def get_similarity_model():
+    """Return the shared model, mapping or rebuilding it when the catalog key moved"""
+    return _model.get()
+
+
+def invalidate_similarity_model():
+    """Drop the shared model so the next query maps the new version"""
+    _model.invalidate()
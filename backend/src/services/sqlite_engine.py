@@ -0,0 +1,53 @@
+"""
+Per-connection SQLite settings for serving from several workers
+
+WAL lets readers run alongside the single writer, ``busy_timeout`` makes a
+writer wait for the lock instead of failing with "database is locked", and
+``synchronous=NORMAL`` is durable in WAL mode except for the last
+transactions before a power loss.
+"""
+
+import os
+
+from sqlalchemy import event
+
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_SIZE_KB = 16 * 1024
+
+
+def sqlite_settings():
+    """Pragma values, overridable through SQLITE_* environment variables"""
+    return {
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_BUSY_TIMEOUT_MS)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', DEFAULT_MMAP_SIZE)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', DEFAULT_CACHE_SIZE_KB)),
+    }
+
+
+def engine_options(threads):
+    """SQLALCHEMY_ENGINE_OPTIONS for a worker serving ``threads`` requests at once"""
+    return {
+        'pool_size': threads,
+        'max_overflow': threads,
+        'pool_timeout': 10,
+    }
+
+
+def configure_sqlite(engine, **overrides):
+    """Apply the serving pragmas to every new connection of ``engine``"""
+    if engine.dialect.name != 'sqlite':
+        return
+    settings = {**sqlite_settings(), **overrides}
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+            cursor.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+            cursor.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+        finally:
+            cursor.close()
@@ -0,0 +1,189 @@
+"""
+Serve the built frontend from an in-memory manifest
+
+The static folder is scanned once at startup.  Each file is kept in memory
+together with the gzip and brotli variants written next to it (``.gz``,
+``.br``), so a request is a dict lookup: no ``os.path.exists`` or ``stat``
+per hit.  Nothing is compressed at startup: the image writes the variants
+when it is built, with
+
+    python -m src.services.static_assets src/static
+
+(brotli ones need the ``brotli`` package).  A file without variants is
+served uncompressed.
+
+Vite fingerprints everything under ``assets/`` (``index-Buq7d4iD.js``), so
+those files are cached for a year as immutable.  ``index.html`` and other
+unhashed files are revalidated through their ETag.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASHED_ASSET_RE = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.\w+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'application/xml',
+    'image/svg+xml', 'application/manifest+json', 'image/x-icon', 'image/vnd.microsoft.icon'
+)
+MIN_COMPRESS_SIZE = 512
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticAsset:
+    """One file of the build with its precompressed variants"""
+
+    __slots__ = ('path', 'body', 'mimetype', 'etag', 'last_modified', 'immutable', 'variants')
+
+    def __init__(self, path, body, mimetype, last_modified, immutable):
+        self.path = path
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.last_modified = last_modified
+        self.immutable = immutable
+        # encoding -> compressed body
+        self.variants = {}
+
+
+def _is_compressible(path, body):
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    return len(body) >= MIN_COMPRESS_SIZE and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compress(encoding, body):
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(body, quality=11)
+    return None
+
+
+class StaticManifest:
+    """Path -> StaticAsset map for a built frontend directory"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.assets = {}
+        if folder and os.path.isdir(folder):
+            self._scan()
+
+    def _scan(self):
+        variant_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                if name.endswith(variant_suffixes):
+                    continue
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.folder).replace(os.sep, '/')
+                with open(full_path, 'rb') as f:
+                    body = f.read()
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                asset = StaticAsset(
+                    path, body, mimetype, os.path.getmtime(full_path),
+                    immutable=bool(HASHED_ASSET_RE.match(path))
+                )
+                for encoding, suffix in ENCODINGS:
+                    if os.path.exists(full_path + suffix):
+                        with open(full_path + suffix, 'rb') as f:
+                            asset.variants[encoding] = f.read()
+                self.assets[path] = asset
+
+    @staticmethod
+    def is_app_route(path):
+        """Whether ``path`` is a client-side route that index.html should serve
+
+        Paths that look like files (an extension, or under ``assets/``) and
+        API paths are not rewritten, so a stale hashed bundle 404s instead of
+        receiving HTML.
+        """
+        last_segment = path.rsplit('/', 1)[-1]
+        return not path.startswith(('api/', 'assets/')) and '.' not in last_segment
+
+    def resolve(self, path):
+        """Return the asset for ``path``, falling back to index.html for app routes"""
+        asset = self.assets.get(path)
+        if asset is None and self.is_app_route(path):
+            asset = self.assets.get('index.html')
+        return asset
+
+    def response(self, path):
+        """Build the response for ``path``, negotiating the content encoding"""
+        asset = self.resolve(path)
+        if asset is None:
+            if self.is_app_route(path):
+                return "index.html not found", 404
+            return "Not found", 404
+
+        body, etag, encoding = asset.body, asset.etag, None
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                body = asset.variants[candidate]
+                etag = f"{asset.etag}-{candidate}"
+                break
+
+        response = Response(body, mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if asset.variants:
+            response.vary.add('Accept-Encoding')
+        response.set_etag(etag)
+        response.last_modified = asset.last_modified
+        response.headers['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if asset.immutable else REVALIDATE_CACHE_CONTROL
+        )
+        return response.make_conditional(request)
+
+
+def precompress(folder):
+    """Write the ``.gz`` and ``.br`` variants of every compressible file in ``folder``
+
+    Variants that would not be smaller than the file are not written (and
+    stale ones are removed).  Returns the number of variants written.
+    """
+    variant_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    written = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith(variant_suffixes):
+                continue
+            full_path = os.path.join(root, name)
+            with open(full_path, 'rb') as f:
+                body = f.read()
+            if not _is_compressible(name, body):
+                continue
+            for encoding, suffix in ENCODINGS:
+                compressed = _compress(encoding, body)
+                if compressed is None:
+                    continue
+                if len(compressed) < len(body):
+                    with open(full_path + suffix, 'wb') as f:
+                        f.write(compressed)
+                    written += 1
+                elif os.path.exists(full_path + suffix):
+                    os.remove(full_path + suffix)
+    return written
+
+
+if __name__ == '__main__':
+    if brotli is None:
+        print("brotli is not installed; writing gzip variants only", file=sys.stderr)
+    for folder in sys.argv[1:]:
+        print(f"{folder}: {precompress(folder)} compressed variants written")
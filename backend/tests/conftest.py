@@ -0,0 +1,36 @@
+"""
+Shared fixtures for the backend tests
+
+Each app (see ``helpers.create_app``) serves a throwaway SQLite file under
+pytest's temporary directory; the snapshot and similarity directories
+saved beside it are removed with it.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from helpers import create_app  # noqa: E402
+
+from src.models.user import db  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Return a factory of API apps, each over its own empty database"""
+    apps = []
+
+    def factory(name='app.db'):
+        app = create_app(str(tmp_path / name))
+        apps.append(app)
+        return app
+
+    yield factory
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
@@ -0,0 +1,135 @@
+"""
+Apps, catalogs and shelves for the tests
+
+Catalogs are generated from the cocktails in cocktails_database.json,
+renamed and given ingredients drawn from a vocabulary whose popularity
+falls off the way the real catalog's does, so the planner sees realistic
+selectivity.  Everything is seeded and deterministic.
+"""
+
+import json
+import os
+import random
+from collections import Counter
+from itertools import accumulate
+
+from flask import Flask
+
+from src.models.user import db, User
+from src.models.cocktail import Cocktail, UserBarShelf
+from src.routes.user import user_bp
+from src.routes.cocktail import cocktail_bp
+from src.services.schema import prepare_database
+from src.services.canonical import get_canonical_lookup, sync_canonical_ingredients
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_CATALOG = os.path.join(BACKEND_DIR, 'cocktails_database.json')
+
+# Ingredient counts per recipe, roughly as distributed in the real catalog
+INGREDIENT_COUNT_WEIGHTS = {2: 290, 3: 153, 4: 102, 5: 85, 6: 49, 7: 15, 8: 4, 9: 1, 11: 1}
+
+
+def create_app(database_path):
+    """Create an API-only app over the SQLite file ``database_path``"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DATABASE_PATH'] = database_path
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(cocktail_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        prepare_database()
+    return app
+
+
+def _load_source():
+    with open(SOURCE_CATALOG, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ingredient_vocabulary(count, seed=0):
+    """Return ``count`` ingredient names, most common first
+
+    The real catalog's ingredients come first in order of how many recipes
+    use them; variants of those names pad the list out to ``count``.
+    """
+    usage = Counter(ing['name'] for c in _load_source() for ing in c['ingredients'])
+    real_names = [name for name, _ in usage.most_common()]
+    rng = random.Random(seed)
+    names = real_names[:count]
+    while len(names) < count:
+        names.append(f"{rng.choice(real_names)} Variant {len(names)}")
+    return names
+
+
+def generate_cocktails(count, seed=0):
+    """Return ``count`` cocktail dicts in the loader's JSON schema, with ids s0000000, s0000001, ..."""
+    source = _load_source()
+    rng = random.Random(seed)
+    vocabulary = ingredient_vocabulary(max(331, int(count ** 0.5 * 12)), seed)
+    popularity = list(accumulate(1.0 / (rank + 1) ** 0.9 for rank in range(len(vocabulary))))
+    sizes = list(INGREDIENT_COUNT_WEIGHTS)
+    size_weights = list(INGREDIENT_COUNT_WEIGHTS.values())
+
+    cocktails = []
+    for i in range(count):
+        template = source[i % len(source)]
+        size = rng.choices(sizes, size_weights)[0]
+        names = []
+        while len(names) < size:
+            for name in rng.choices(vocabulary, cum_weights=popularity, k=size - len(names)):
+                if name not in names:
+                    names.append(name)
+        cocktail = dict(template)
+        cocktail['id'] = f"s{i:07d}"
+        cocktail['name'] = f"{template['name']} #{i}"
+        cocktail['ingredients'] = [
+            {'name': name, 'measure': f"{rng.randint(1, 4)} oz"} for name in names
+        ]
+        cocktail['date_modified'] = f"20{rng.randint(15, 25):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00"
+        cocktails.append(cocktail)
+    return cocktails
+
+
+def generate_shelf(vocabulary, size, seed=0):
+    """Pick ``size`` names from the most common part of ``vocabulary``"""
+    rng = random.Random(seed)
+    common = vocabulary[:max(size * 3, 30)]
+    return rng.sample(common, min(size, len(common)))
+
+
+def load_catalog(cocktails):
+    """Insert cocktails with a single executemany"""
+    rows = [
+        {
+            'id': c['id'],
+            'name': c['name'],
+            'category': c.get('category'),
+            'alcoholic': c.get('alcoholic'),
+            'glass': c.get('glass'),
+            'instructions': c.get('instructions'),
+            'image': c.get('image'),
+            'ingredients_json': json.dumps(c['ingredients']) if c.get('ingredients') else None,
+            'video': c.get('video'),
+            'tags_json': json.dumps(c['tags']) if c.get('tags') else None,
+            'iba': c.get('iba'),
+            'date_modified': c.get('date_modified'),
+            'garnish': c.get('garnish'),
+        }
+        for c in cocktails
+    ]
+    db.session.execute(Cocktail.__table__.insert(), rows)
+    db.session.commit()
+    sync_canonical_ingredients()
+
+
+def load_shelf(user_id, ingredient_names):
+    """Create a user and stock their bar shelf"""
+    db.session.add(User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com"))
+    lookup = get_canonical_lookup()
+    db.session.add_all(
+        UserBarShelf(user_id=user_id, ingredient_name=name, canonical_id=lookup.resolve(name))
+        for name in ingredient_names
+    )
+    db.session.commit()
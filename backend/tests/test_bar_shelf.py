@@ -0,0 +1,82 @@
+"""
+Batch shelf changes upsert, remove and report the makeable delta in one request
+"""
+
+import pytest
+
+from helpers import load_catalog, load_shelf, generate_cocktails
+
+from src.services.bar_shelf import MAX_SHELF_BATCH
+
+USER_ID = 1
+URL = f'/api/users/{USER_ID}/bar-shelf'
+
+
+@pytest.fixture
+def catalog(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(50)
+        load_catalog(cocktails)
+        load_shelf(USER_ID, [])
+        yield app.test_client(), cocktails
+
+
+def shelf(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {item['ingredient_name']: item['quantity'] for item in response.get_json()['shelf']}
+
+
+def makeable(client):
+    return len(client.get(f'/api/users/{USER_ID}/makeable?fields=id').get_json())
+
+
+def test_batch_adds_updates_and_removes(catalog):
+    client, cocktails = catalog
+    response = client.post(f'{URL}/batch', json={
+        'add': ['Gin', {'ingredient_name': 'Vodka', 'quantity': '1L'}, 'Mint'],
+        'remove': ['Mint'],
+    })
+    assert shelf(response) == {'Gin': '', 'Vodka': '1L'}
+
+    # Re-adding updates the row instead of duplicating it; later entries win
+    response = client.post(f'{URL}/batch', json={
+        'add': [
+            {'ingredient_name': 'Vodka', 'quantity': '50cl'},
+            {'ingredient_name': 'Vodka', 'quantity': '70cl'},
+        ],
+    })
+    assert shelf(response) == {'Gin': '', 'Vodka': '70cl'}
+
+    gin_id = next(item['id'] for item in response.get_json()['shelf'] if item['ingredient_name'] == 'Gin')
+    response = client.post(f'{URL}/batch', json={'remove': [gin_id, 'Not There']})
+    assert shelf(response) == {'Vodka': '70cl'}
+
+
+def test_batch_reports_the_makeable_delta(catalog):
+    client, cocktails = catalog
+    names = sorted({i['name'] for c in cocktails[:5] for i in c['ingredients']})
+    before = makeable(client)
+    response = client.post(f'{URL}/batch', json={'add': names})
+    counts = response.get_json()['makeable']
+    assert counts['before'] == before
+    assert counts['after'] == makeable(client) >= 5
+    assert counts['delta'] == counts['after'] - counts['before']
+
+    response = client.post(f'{URL}/batch', json={'remove': names})
+    assert response.get_json()['makeable'] == {'before': counts['after'], 'after': 0, 'delta': -counts['after']}
+
+
+def test_single_add_is_an_upsert(catalog):
+    client, _ = catalog
+    assert client.post(URL, json={'ingredient_name': 'Gin', 'quantity': '1L'}).status_code == 201
+    response = client.post(URL, json={'ingredient_name': 'Gin', 'quantity': '50cl'})
+    assert response.status_code == 200
+    assert [(i['ingredient_name'], i['quantity']) for i in client.get(URL).get_json()] == [('Gin', '50cl')]
+
+
+def test_oversized_batch_is_rejected(catalog):
+    client, _ = catalog
+    response = client.post(f'{URL}/batch', json={'add': [f"Bottle {i}" for i in range(MAX_SHELF_BATCH + 1)]})
+    assert response.status_code == 400
+    assert client.get(URL).get_json() == []
@@ -0,0 +1,87 @@
+"""
+User-entered ingredient names resolve to the ids recipes are linked by
+"""
+
+import pytest
+
+from helpers import load_catalog, load_shelf, generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.canonical import canonical_key, get_canonical_lookup
+
+SIZE = 20
+
+
+@pytest.fixture
+def client(make_app):
+    app = make_app()
+    with app.app_context():
+        load_catalog(generate_cocktails(SIZE))
+        load_shelf(1, [])
+        yield app.test_client()
+
+
+@pytest.mark.parametrize('name,key', [
+    ('Fresh Lime Juice', 'lime juice'),
+    ('  LIME-juice ', 'lime juice'),
+    ('Grey Goose Vodka', 'vodka'),
+    ('Absolut Citron', 'absolut citron'),
+    ('Bacardi', 'light rum'),
+    ('Crème de Cassis', 'creme de cassis'),
+    ('Club Soda', 'soda water'),
+    ('Angostura Bitters (2 dashes)', 'angostura bitters'),
+    ("Maker's Mark Bourbon", 'bourbon'),
+])
+def test_canonical_key(name, key):
+    assert canonical_key(name) == key
+
+
+def listed_ids(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {c['id'] for c in response.get_json()['cocktails']}
+
+
+def test_ingredient_written_after_the_sync_resolves(client):
+    cocktail = db.session.get(Cocktail, 's0000000')
+    cocktail.ingredients = cocktail.ingredients + [{'name': 'Zzz Bitters', 'measure': '2 dashes'}]
+    db.session.commit()
+
+    assert listed_ids(client.get('/api/cocktails?ingredient=zzz bitters')) == {'s0000000'}
+
+    for ingredient in db.session.get(Cocktail, 's0000000').ingredients:
+        response = client.post('/api/users/1/bar-shelf', json={'ingredient_name': ingredient['name']})
+        assert response.status_code < 400, response.get_data(as_text=True)
+    makeable = client.get('/api/users/1/makeable').get_json()
+    assert 's0000000' in {c['id'] for c in makeable}
+
+
+def test_spellings_match_across_shelf_and_recipes(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        cocktails[0]['ingredients'] = [
+            {'name': 'Vodka', 'measure': '2 oz'}, {'name': 'Fresh Lime Juice', 'measure': '1 oz'}
+        ]
+        cocktails[1]['ingredients'] = [
+            {'name': 'Lime juice', 'measure': '1 oz'}, {'name': 'Bacardi', 'measure': '2 oz'}
+        ]
+        load_catalog(cocktails)
+        # Saved before any recipe used it; resolved by name when read
+        load_shelf(1, ['Grey Goose Vodka', 'lime juice', 'Kumquat Cordial'])
+        client = app.test_client()
+
+        lookup = get_canonical_lookup()
+        assert lookup.resolve('Fresh lime juice') == lookup.resolve('LIME JUICE') is not None
+        assert lookup.resolve('Kumquat Cordial') is None
+        assert {'s0000000', 's0000001'} <= listed_ids(client.get('/api/cocktails?ingredient=Lime Juice'))
+
+        makeable = {c['id'] for c in client.get('/api/users/1/makeable').get_json()}
+        assert 's0000000' in makeable and 's0000001' not in makeable
+        client.post('/api/users/1/bar-shelf', json={'ingredient_name': 'light rum'})
+        assert 's0000001' in {c['id'] for c in client.get('/api/users/1/makeable').get_json()}
+
+        cocktail = db.session.get(Cocktail, 's0000002')
+        cocktail.ingredients = [{'name': 'Kumquat Cordial', 'measure': '1 oz'}]
+        db.session.commit()
+        assert 's0000002' in {c['id'] for c in client.get('/api/users/1/makeable').get_json()}
@@ -0,0 +1,123 @@
+"""
+Structures derived from the catalog must not outlive the database they came from
+
+A database rebuilt at the same path, with as many writes as the one it
+replaced, reaches the same catalog version; only the epoch tells them apart.
+"""
+
+import os
+
+from flask import current_app
+
+from helpers import load_catalog, generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.catalog_cache import CatalogCache
+from src.services.catalog_snapshot import get_catalog_snapshot, snapshot_root
+from src.services.catalog_version import get_catalog_key
+from src.services.similarity import get_similarity_model, similarity_root
+
+SIZE = 50
+
+
+def rebuild(make_app, edit, inspect):
+    """Replace the database at app.db, keeping its saved directories
+
+    ``edit`` changes the generated cocktails before they are loaded;
+    returns the catalog key and what ``inspect(cocktails)`` returned.
+    """
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        edit(cocktails)
+        load_catalog(cocktails)
+        key = get_catalog_key()
+        result = inspect(cocktails)
+        database = app.config['DATABASE_PATH']
+        db.session.remove()
+        db.engine.dispose()
+    for path in (database, database + '-wal', database + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    return key, result
+
+
+def renamed(name):
+    def edit(cocktails):
+        cocktails[0]['name'] = name
+    return edit
+
+
+def first_encoded(cocktails):
+    snapshot = get_catalog_snapshot()
+    return snapshot.encode(snapshot.position(cocktails[0]['id'])), snapshot_root()
+
+
+def test_rebuilt_database_gets_a_new_epoch(make_app):
+    first_key, _ = rebuild(make_app, renamed('Margarita'), first_encoded)
+    second_key, _ = rebuild(make_app, renamed('Paloma'), first_encoded)
+    assert first_key[1] == second_key[1]
+    assert first_key[0] != second_key[0]
+
+
+def test_snapshot_follows_the_rebuilt_database(make_app):
+    _, (encoded, root) = rebuild(make_app, renamed('Margarita'), first_encoded)
+    assert b'"Margarita"' in encoded
+    _, (encoded, root) = rebuild(make_app, renamed('Paloma'), first_encoded)
+    assert b'"Paloma"' in encoded
+    # Only the current database's snapshot is kept
+    assert len(os.listdir(root)) == 1
+
+
+def test_similarity_model_follows_the_rebuilt_database(make_app):
+    def twin(cocktails):
+        cocktails[0]['ingredients'] = cocktails[1]['ingredients']
+        cocktails[0]['tags'] = cocktails[1].get('tags')
+
+    def nearest(cocktails):
+        model = get_similarity_model()
+        (position, score), = model.similar(model.position(cocktails[0]['id']), 1)
+        return model.cocktail_ids[position], score, similarity_root()
+
+    _, (nearest_id, score, _) = rebuild(make_app, lambda cocktails: None, nearest)
+    assert score < 0.999
+    _, (nearest_id, score, root) = rebuild(make_app, twin, nearest)
+    assert nearest_id == 's0000001'
+    assert score > 0.999
+    assert len(os.listdir(root)) == 1
+
+
+def test_cached_response_follows_the_rebuilt_database(make_app):
+    def fetch(etag=None):
+        def inspect(cocktails):
+            client = current_app.test_client()
+            headers = {'If-None-Match': etag} if etag else {}
+            return client.get(f"/api/cocktails/{cocktails[0]['id']}", headers=headers)
+        return inspect
+
+    _, first = rebuild(make_app, renamed('Margarita'), fetch())
+    assert first.get_json()['name'] == 'Margarita'
+    _, second = rebuild(make_app, renamed('Paloma'), fetch(first.headers['ETag']))
+    assert second.status_code == 200
+    assert second.get_json()['name'] == 'Paloma'
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_catalog_cache_rebuilds_when_the_key_moves(make_app):
+    app = make_app()
+    with app.app_context():
+        load_catalog(generate_cocktails(SIZE))
+        builds = []
+        cache = CatalogCache(lambda key: builds.append(key) or len(builds))
+        assert cache.get() == cache.get() == 1
+        # Another process's write: only the version moves, nothing is notified
+        db.session.execute(db.update(Cocktail).where(Cocktail.id == 's0000000').values(name='Paloma'))
+        db.session.commit()
+        assert cache.get() == 2
+        # This process's ORM write drops the value through on_catalog_change
+        db.session.get(Cocktail, 's0000001').name = 'Margarita'
+        db.session.commit()
+        assert cache._cached is None
+        assert cache.get() == 3
+        assert builds[-1] == get_catalog_key()
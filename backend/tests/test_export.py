@@ -0,0 +1,77 @@
+"""
+NDJSON exports stream every row once, in order, optionally gzipped
+"""
+
+import gzip
+import json
+
+import pytest
+
+from helpers import load_catalog, load_shelf, generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import UserFavorite
+from src.services import export
+
+SIZE = 45
+
+
+@pytest.fixture
+def catalog(make_app, monkeypatch):
+    # Several chunks even for a small catalog
+    monkeypatch.setattr(export, 'EXPORT_BATCH_SIZE', 10)
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        load_catalog(cocktails)
+        yield app.test_client(), cocktails
+
+
+def lines(body):
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+def in_export_order(cocktails):
+    return [c['id'] for c in sorted(cocktails, key=lambda c: (c['date_modified'], c['id']))]
+
+
+def test_catalog_export(catalog):
+    client, cocktails = catalog
+    response = client.get('/api/cocktails/export')
+    assert response.mimetype == 'application/x-ndjson'
+    exported = lines(response.get_data())
+    assert [c['id'] for c in exported] == in_export_order(cocktails)
+    assert exported[0]['ingredients'] == next(c for c in cocktails if c['id'] == exported[0]['id'])['ingredients']
+
+    since = '2020-06-01'
+    response = client.get(f'/api/cocktails/export?since={since}&fields=id,date_modified')
+    exported = lines(response.get_data())
+    assert [c['id'] for c in exported] == in_export_order(c for c in cocktails if c['date_modified'] >= since)
+    assert all(set(c) == {'id', 'date_modified'} for c in exported)
+
+    assert client.get('/api/cocktails/export?since=yesterday').status_code == 400
+
+
+def test_catalog_export_gzip(catalog):
+    client, cocktails = catalog
+    response = client.get('/api/cocktails/export?fields=id', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert [c['id'] for c in lines(gzip.decompress(response.get_data()))] == in_export_order(cocktails)
+
+
+def test_user_export(catalog):
+    client, cocktails = catalog
+    load_shelf(1, ['Vodka', 'Gin'])
+    db.session.add(UserFavorite(user_id=1, cocktail_id=cocktails[0]['id']))
+    db.session.commit()
+    client.post('/api/users/1/cocktails', json={'name': 'House Sour'})
+
+    exported = lines(client.get('/api/users/1/export').get_data())
+    assert [(line['type'], line.get('ingredient_name') or line.get('cocktail_id') or line.get('name'))
+            for line in exported[1:]] == [
+        ('bar_shelf', 'Gin'), ('bar_shelf', 'Vodka'),
+        ('favorite', cocktails[0]['id']),
+        ('cocktail', 'House Sour'),
+    ]
+    assert exported[0]['type'] == 'user' and exported[0]['id'] == 1
+    assert client.get('/api/users/99/export').status_code == 404
@@ -0,0 +1,83 @@
+"""
+Facet counts agree with counting the matching cocktails one by one
+"""
+
+from collections import Counter
+
+import pytest
+
+from helpers import load_catalog, generate_cocktails
+
+from src.services.canonical import get_canonical_lookup
+from src.services.response_cache import response_cache
+
+SIZE = 150
+FACETS = ('category', 'alcoholic', 'glass', 'ingredient')
+
+
+@pytest.fixture
+def catalog(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        load_catalog(cocktails)
+        yield app.test_client(), cocktails
+
+
+def expected_counts(cocktails, filters, within=None):
+    """Per-facet value counts, each facet under every filter but its own"""
+    lookup = get_canonical_lookup()
+
+    def values(cocktail, facet):
+        if facet == 'ingredient':
+            return {lookup.resolve(i['name']) for i in cocktail['ingredients']}
+        return {cocktail[facet]} if cocktail[facet] else set()
+
+    counts = {}
+    for facet in FACETS:
+        matching = [
+            c for c in cocktails
+            if (within is None or c['id'] in within)
+            and all(key in values(c, f) for f, key in filters.items() if f != facet)
+        ]
+        counts[facet] = Counter(value for c in matching for value in values(c, facet))
+    return counts
+
+
+def returned_counts(body):
+    lookup = get_canonical_lookup()
+    counts = dict(body['facets'])
+    counts['ingredient'] = {lookup.resolve(label): n for label, n in counts['ingredient'].items()}
+    for facet in FACETS:
+        assert list(counts[facet].values()) == sorted(counts[facet].values(), reverse=True)
+    return {facet: Counter(values) for facet, values in counts.items()}
+
+
+def test_facets_without_search(catalog):
+    client, cocktails = catalog
+    category, glass = cocktails[0]['category'], cocktails[0]['glass']
+    body = client.get(f'/api/cocktails?facets={",".join(FACETS)}&category={category}&glass={glass}').get_json()
+    assert returned_counts(body) == expected_counts(cocktails, {'category': category, 'glass': glass})
+
+    ingredient = cocktails[0]['ingredients'][0]['name']
+    canonical_id = get_canonical_lookup().resolve(ingredient)
+    body = client.get(f'/api/cocktails?facets={",".join(FACETS)}&ingredient={ingredient}').get_json()
+    expected = expected_counts(cocktails, {'ingredient': canonical_id})
+    assert returned_counts(body) == expected
+    assert body['total'] == expected['ingredient'][canonical_id]
+
+
+def test_facets_within_search(catalog):
+    client, cocktails = catalog
+    response_cache.clear()
+    body = client.get('/api/cocktails?search=juice&per_page=100&fields=id').get_json()
+    assert body['total'] < 100
+    matched = {c['id'] for c in body['cocktails']}
+    alcoholic = cocktails[0]['alcoholic']
+    body = client.get(f'/api/cocktails?search=juice&facets={",".join(FACETS)}&alcoholic={alcoholic}').get_json()
+    assert returned_counts(body) == expected_counts(cocktails, {'alcoholic': alcoholic}, within=matched)
+
+
+def test_unknown_facet_is_rejected(catalog):
+    client, _ = catalog
+    assert client.get('/api/cocktails?facets=colour').status_code == 400
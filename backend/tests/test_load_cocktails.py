@@ -0,0 +1,70 @@
+"""
+The loader streams a JSON catalog into the cocktail table
+"""
+
+import json
+
+from sqlalchemy import text
+
+from helpers import generate_cocktails
+
+from load_cocktails import iter_json_array, load_cocktails
+from src.models.user import db
+from src.models.cocktail import Cocktail
+
+SIZE = 30
+
+
+def write_catalog(path, cocktails):
+    path.write_text(json.dumps(cocktails), encoding='utf-8')
+    return str(path)
+
+
+def test_bulk_load_settings_do_not_outlive_the_load(make_app, tmp_path):
+    app = make_app()
+    with app.app_context():
+        summary = load_cocktails(write_catalog(tmp_path / 'catalog.json', generate_cocktails(SIZE)))
+        assert summary['inserted'] == SIZE
+        # Every pooled connection is back to the durable default
+        connections = [db.engine.connect() for _ in range(3)]
+        try:
+            for connection in connections:
+                assert connection.execute(text("PRAGMA synchronous")).scalar() != 0
+        finally:
+            for connection in connections:
+                connection.close()
+
+
+def test_streaming_parse_matches_json_load(tmp_path):
+    cocktails = generate_cocktails(SIZE)
+    cocktails[0]['name'] = 'Tricky ], {"name": "x"} [ \\ Sour'
+    path = write_catalog(tmp_path / 'catalog.json', cocktails)
+    # Chunks far smaller than one record force every refill path
+    assert list(iter_json_array(path, chunk_size=16)) == cocktails
+
+
+def test_load_modes(make_app, tmp_path):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        path = tmp_path / 'catalog.json'
+        summary = load_cocktails(write_catalog(path, cocktails + [cocktails[0], {'name': 'No id'}]))
+        assert (summary['inserted'], summary['skipped']) == (SIZE, 2)
+
+        assert load_cocktails(write_catalog(path, cocktails))['unchanged'] == SIZE
+
+        edited = [dict(c) for c in cocktails[1:]]
+        edited[0]['name'] = 'Renamed'
+        edited[0]['date_modified'] = '2030-01-01 12:00:00'
+        summary = load_cocktails(write_catalog(path, edited), mode='upsert')
+        assert (summary['updated'], summary['deleted']) == (1, 0)
+        assert db.session.get(Cocktail, edited[0]['id']).name == 'Renamed'
+        assert db.session.get(Cocktail, cocktails[0]['id']) is not None
+
+        summary = load_cocktails(str(path), mode='sync')
+        assert (summary['unchanged'], summary['deleted']) == (SIZE - 1, 1)
+        assert db.session.get(Cocktail, cocktails[0]['id']) is None
+
+        summary = load_cocktails(write_catalog(path, cocktails[:5]), mode='replace')
+        assert summary['inserted'] == 5
+        assert db.session.query(Cocktail).count() == 5
@@ -0,0 +1,69 @@
+"""
+Shelf matching over the ingredient index agrees with checking every recipe
+"""
+
+import pytest
+
+from helpers import load_catalog, load_shelf, generate_cocktails, ingredient_vocabulary, generate_shelf
+
+from src.services.canonical import get_canonical_lookup
+
+SIZE = 300
+USER_ID = 1
+
+
+@pytest.fixture
+def catalog(make_app):
+    """(client, cocktails, shelf names) over a seeded catalog"""
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        load_catalog(cocktails)
+        shelf = generate_shelf(ingredient_vocabulary(331), 25, seed=3)
+        load_shelf(USER_ID, shelf)
+        yield app.test_client(), cocktails, shelf
+
+
+def missing_counts(cocktails, shelf):
+    """{cocktail id: ingredients the shelf lacks}, recipe by recipe"""
+    lookup = get_canonical_lookup()
+    owned = {lookup.resolve(name) for name in shelf}
+    return {
+        c['id']: len({lookup.resolve(i['name']) for i in c['ingredients']} - owned)
+        for c in cocktails
+    }
+
+
+def test_makeable_matches_every_recipe(catalog):
+    client, cocktails, shelf = catalog
+    expected = {c for c, missing in missing_counts(cocktails, shelf).items() if missing == 0}
+    assert expected
+    response = client.get(f'/api/users/{USER_ID}/makeable?fields=id')
+    assert {c['id'] for c in response.get_json()} == expected
+
+
+def test_makeable_follows_the_shelf(catalog):
+    client, cocktails, shelf = catalog
+    target = next(c for c, missing in missing_counts(cocktails, shelf).items() if missing == 1)
+    recipe = next(c for c in cocktails if c['id'] == target)
+    for ingredient in recipe['ingredients']:
+        client.post(f'/api/users/{USER_ID}/bar-shelf', json={'ingredient_name': ingredient['name']})
+    response = client.get(f'/api/users/{USER_ID}/makeable?fields=id')
+    assert target in {c['id'] for c in response.get_json()}
+
+
+def test_almost_makeable_ranks_by_missing_count(catalog):
+    client, cocktails, shelf = catalog
+    expected = {c: missing for c, missing in missing_counts(cocktails, shelf).items() if 1 <= missing <= 2}
+    body = client.get(f'/api/users/{USER_ID}/almost-makeable?max_missing=2&limit=200&fields=id').get_json()
+    assert body['total'] == len(expected)
+    ranked = body['cocktails']
+    assert {c['id']: c['missing_count'] for c in ranked} == expected
+    assert [c['missing_count'] for c in ranked] == sorted(c['missing_count'] for c in ranked)
+    for cocktail in ranked:
+        assert len(cocktail['missing_ingredients']) == cocktail['missing_count']
+        assert not set(cocktail['missing_ingredients']) & set(shelf)
+    # Each suggested bottle completes that many one-away cocktails
+    one_away = [c for c in ranked if c['missing_count'] == 1]
+    for unlock in body['unlocks']:
+        assert unlock['cocktails'] == sum(c['missing_ingredients'] == [unlock['ingredient']] for c in one_away)
@@ -0,0 +1,71 @@
+"""
+House menus are validated, reloaded when their file changes and served ahead of user cocktails
+"""
+
+import json
+import os
+
+import pytest
+
+from src.services import menus
+from src.services.menus import MenuFile, get_menu, validate_menu
+
+MENU = [
+    {'id': 'm1', 'name': 'Spiced Pear Sour', 'ingredients': [{'name': 'Pear Brandy', 'measure': '2 oz'}]},
+    {'id': 'm2', 'name': 'Cider Toddy', 'tags': ['Hot']},
+]
+
+
+@pytest.mark.parametrize('items', [
+    {'id': 'm1'},
+    [{'name': 'No id'}],
+    [{'id': 'm1', 'name': 'A'}, {'id': 'm1', 'name': 'B'}],
+    [{'id': 'm1', 'name': 'A', 'glass': 3}],
+    [{'id': 'm1', 'name': 'A', 'ingredients': ['Gin']}],
+    [{'id': 'm1', 'name': 'A', 'tags': 'Hot'}],
+])
+def test_invalid_menus_are_rejected(items):
+    with pytest.raises(ValueError):
+        validate_menu(items)
+
+
+def write(path, items, mtime):
+    path.write_text(json.dumps(items), encoding='utf-8')
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_menu_file_reloads_on_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(menus, 'RELOAD_CHECK_SECONDS', 0)
+    path = tmp_path / 'menu.json'
+    write(path, MENU, 1_000_000_000)
+    menu_file = MenuFile('test', str(path))
+    first = menu_file.get()
+    assert (first.version, [item['id'] for item in first.items]) == (1, ['m1', 'm2'])
+    assert menu_file.get() is first
+
+    write(path, MENU[:1], 2_000_000_000)
+    second = menu_file.get()
+    assert (second.version, len(second.items)) == (2, 1)
+    assert second.etag != first.etag
+
+    # A bad edit keeps the last good menu
+    write(path, [{'id': 'm1'}], 3_000_000_000)
+    assert menu_file.get() is second
+
+
+def test_user_menu_is_house_menu_then_own_cocktails(make_app):
+    app = make_app()
+    client = app.test_client()
+    with app.app_context():
+        house = [item['id'] for item in get_menu().items]
+        response = client.get('/api/users/1/cocktails')
+        assert [item['id'] for item in response.get_json()] == house
+        etag = response.headers['ETag']
+        assert client.get('/api/users/1/cocktails', headers={'If-None-Match': etag}).status_code == 304
+
+        created = client.post('/api/users/1/cocktails', json={'name': 'House Sour'}).get_json()
+        response = client.get('/api/users/1/cocktails', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert [item['id'] for item in response.get_json()] == house + [created['id']]
+        # Other users still see only the house menu
+        assert client.get('/api/users/2/cocktails').headers['ETag'] == etag
@@ -0,0 +1,90 @@
+"""
+Cursor pages cover a list exactly once, in order, even while it changes
+"""
+
+import pytest
+
+from helpers import load_catalog, generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.response_cache import response_cache
+
+SIZE = 60
+PER_PAGE = 7
+
+
+@pytest.fixture
+def catalog(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        load_catalog(cocktails)
+        yield app.test_client(), cocktails
+
+
+def walk(client, query, on_page=None):
+    """Every id the cursor pages of ``/api/cocktails?{query}`` return, in order"""
+    ids = []
+    cursor = ''
+    while cursor is not None:
+        response_cache.clear()
+        body = client.get(f'/api/cocktails?{query}&per_page={PER_PAGE}&fields=id&cursor={cursor}').get_json()
+        assert len(body['cocktails']) <= PER_PAGE
+        ids.extend(c['id'] for c in body['cocktails'])
+        cursor = body['next_cursor']
+        if on_page:
+            on_page()
+    return ids
+
+
+def by_name(cocktails):
+    return [c['id'] for c in sorted(cocktails, key=lambda c: (c['name'], c['id']))]
+
+
+def test_cursor_walks_the_list_in_order(catalog):
+    client, cocktails = catalog
+    assert walk(client, '') == by_name(cocktails)
+    category = cocktails[0]['category']
+    assert walk(client, f'category={category}') == by_name(c for c in cocktails if c['category'] == category)
+
+
+def test_cursor_walks_search_results_once(catalog):
+    client, cocktails = catalog
+    ids = walk(client, 'search=juice')
+    response_cache.clear()
+    ranked = client.get('/api/cocktails?search=juice&per_page=100&fields=id').get_json()['cocktails']
+    assert ids == [c['id'] for c in ranked]
+    assert len(ids) > PER_PAGE
+    assert len(set(ids)) == len(ids)
+
+
+def test_cursor_is_stable_while_rows_are_inserted(catalog):
+    client, cocktails = catalog
+    inserted = []
+
+    def insert_first_in_order():
+        cocktail_id = f"new{len(inserted)}"
+        db.session.add(Cocktail(id=cocktail_id, name='  first'))
+        db.session.commit()
+        inserted.append(cocktail_id)
+
+    # Rows added before the cursor are not seen; nothing is repeated or skipped
+    assert walk(client, '', on_page=insert_first_in_order) == by_name(cocktails)
+
+
+def test_page_numbers_and_count_modes(catalog):
+    client, cocktails = catalog
+    pages = []
+    for page in range(1, SIZE // PER_PAGE + 2):
+        body = client.get(f'/api/cocktails?page={page}&per_page={PER_PAGE}&fields=id').get_json()
+        assert body['total'] == SIZE and body['total_exact']
+        pages.extend(c['id'] for c in body['cocktails'])
+    assert pages == by_name(cocktails)
+
+    body = client.get('/api/cocktails?count=none').get_json()
+    assert body['total'] is None
+    body = client.get('/api/cocktails?search=juice&count=estimate').get_json()
+    assert body['total'] == len(walk(client, 'search=juice'))
+    assert client.get('/api/cocktails?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/cocktails?count=roughly').status_code == 400
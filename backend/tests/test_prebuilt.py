@@ -0,0 +1,33 @@
+"""
+Seeding a database replaces the directories derived from whatever was there before
+"""
+
+import os
+
+from helpers import load_catalog, generate_cocktails
+
+from src.models.user import db
+from src.services.catalog_snapshot import get_catalog_snapshot
+from src.services.prebuilt import DERIVED_SUFFIXES, seed_database
+from src.services.similarity import get_similarity_model
+
+
+def test_seed_replaces_derived_directories(make_app, tmp_path):
+    app = make_app('seed.db')
+    with app.app_context():
+        load_catalog(generate_cocktails(50))
+        get_catalog_snapshot()
+        get_similarity_model()
+        db.session.remove()
+        db.engine.dispose()
+    seed = str(tmp_path / 'seed.db')
+    database = str(tmp_path / 'data' / 'app.db')
+    for suffix in DERIVED_SUFFIXES:
+        os.makedirs(os.path.join(database + suffix, 'left-behind-v1'))
+
+    assert seed_database(database, seed)
+    for suffix in DERIVED_SUFFIXES:
+        assert sorted(os.listdir(database + suffix)) == sorted(os.listdir(seed + suffix))
+
+    # An existing database is left alone
+    assert not seed_database(database, seed)
@@ -0,0 +1,165 @@
+"""
+Fail when any API route's SQL falls back to a full table scan
+
+Each route is requested once to warm the in-memory caches (the ingredient
+index, random pool and lookups scan their tables by design when they are
+rebuilt), then again, past the response cache, while every statement is
+recorded.  Each recorded statement is run through ``EXPLAIN QUERY PLAN``
+with its own parameters; a ``SCAN <table>`` step fails the route unless it
+lists that table as an expected scan.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from helpers import create_app, load_catalog, load_shelf, generate_cocktails, ingredient_vocabulary, generate_shelf
+
+from src.models.user import db
+from src.models.cocktail import Cocktail, UserFavorite, UserCocktail
+from src.services.response_cache import response_cache
+
+SIZE = 5000
+USER_ID = 1
+# Other users' shelves, so ANALYZE sees user_id as selective the way it is in production
+OTHER_USERS = 200
+
+# (method, url, json body, tables the route is allowed to scan)
+ROUTES = [
+    # The unfiltered list walks ix_cocktail_name_id and its count covers it
+    ('GET', '/api/cocktails', None, {'cocktail'}),
+    ('GET', '/api/cocktails?category={category}', None, set()),
+    ('GET', '/api/cocktails?alcoholic={alcoholic}', None, set()),
+    ('GET', '/api/cocktails?glass={glass}', None, set()),
+    ('GET', '/api/cocktails?category={category}&alcoholic={alcoholic}', None, set()),
+    ('GET', '/api/cocktails?glass={glass}&cursor=', None, set()),
+    ('GET', '/api/cocktails?ingredient=Vodka', None, set()),
+    ('GET', '/api/cocktails?search=lime', None, set()),
+    ('GET', '/api/cocktails?search=lime&facets=category,glass,ingredient', None, set()),
+    ('GET', '/api/cocktails/{cocktail_id}', None, set()),
+    ('GET', '/api/cocktails/{cocktail_id}/similar', None, set()),
+    ('GET', '/api/cocktails/random?n=5', None, set()),
+    # The export walks ix_cocktail_date_modified in order
+    ('GET', '/api/cocktails/export', None, {'cocktail'}),
+    ('GET', '/api/cocktails/export?since=2024-06-01', None, set()),
+    ('GET', '/api/cocktails/featured', None, set()),
+    # The substring match runs over the ingredient dictionary, not the catalog
+    ('GET', '/api/cocktails/seasonal', None, {'ingredient'}),
+    ('GET', '/api/metadata', None, set()),
+    ('GET', '/api/users/{user_id}', None, set()),
+    ('GET', '/api/users/{user_id}/bar-shelf', None, set()),
+    ('POST', '/api/users/{user_id}/bar-shelf', {'ingredient_name': 'Gin', 'quantity': '1L'}, set()),
+    ('POST', '/api/users/{user_id}/bar-shelf/batch', {'add': ['Rum', 'Mint'], 'remove': ['Gin']}, set()),
+    ('GET', '/api/users/{user_id}/cocktails', None, set()),
+    ('GET', '/api/users/{user_id}/favorites', None, set()),
+    ('POST', '/api/users/{user_id}/favorites', {'cocktail_id': '{cocktail_id}'}, set()),
+    ('POST', '/api/users/{user_id}/favorites/batch', {'add': ['{cocktail_id}'], 'remove': ['gone']}, set()),
+    ('GET', '/api/users/{user_id}/export', None, set()),
+    ('GET', '/api/users/{user_id}/makeable', None, set()),
+    ('GET', '/api/users/{user_id}/almost-makeable', None, set()),
+    ('GET', '/api/users/{user_id}/shopping-list', None, set()),
+    ('GET', '/api/users/{user_id}/shopping-list/optimize?scope=favorites', None, set()),
+]
+
+
+class StatementRecorder:
+    """Collect (statement, parameters) pairs while ``recording`` is set"""
+
+    def __init__(self, engine):
+        self.recording = False
+        self.statements = []
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.recording:
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.append((statement, parameters))
+
+
+def fill(value, params):
+    """Substitute the URL parameters into a JSON body"""
+    if isinstance(value, str):
+        return value.format(**params)
+    if isinstance(value, list):
+        return [fill(item, params) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, params) for key, item in value.items()}
+    return value
+
+
+def full_scans(connection, statement, parameters):
+    """Tables ``statement`` reads with a SCAN step, with the plan text"""
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')):
+        return set(), []
+    plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    details = [row[-1] for row in plan]
+    scanned = set()
+    for detail in details:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == 'SCAN' and words[1] not in ('CONSTANT', 'TABLE'):
+            # "SCAN t USING COVERING INDEX ..." still reads every entry
+            if 'VIRTUAL' not in words:
+                scanned.add(words[1])
+    return scanned, details
+
+
+def seed(size):
+    """Load a catalog, shelves, favorites and a user cocktail; return URL parameters"""
+    load_catalog(generate_cocktails(size))
+    vocabulary = ingredient_vocabulary(331)
+    for user_id in range(USER_ID, USER_ID + OTHER_USERS + 1):
+        load_shelf(user_id, generate_shelf(vocabulary, 25, seed=user_id))
+    cocktail_ids = db.session.execute(db.select(Cocktail.id).limit(20)).scalars().all()
+    db.session.add_all(UserFavorite(user_id=USER_ID, cocktail_id=c) for c in cocktail_ids)
+    db.session.add(UserCocktail(user_id=USER_ID, name='House Sour'))
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    first = db.session.get(Cocktail, cocktail_ids[0])
+    return {
+        'user_id': USER_ID,
+        'cocktail_id': first.id,
+        'category': first.category,
+        'alcoholic': first.alcoholic,
+        'glass': first.glass,
+    }
+
+
+@pytest.fixture(scope='module')
+def seeded(tmp_path_factory):
+    """(app, URL parameters, recorder) over one seeded catalog for every route"""
+    app = create_app(str(tmp_path_factory.mktemp('plans') / 'app.db'))
+    with app.app_context():
+        params = seed(SIZE)
+        yield app, params, StatementRecorder(db.engine)
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('method,url,body,allowed', ROUTES, ids=[f"{m} {u}" for m, u, _, _ in ROUTES])
+def test_route_uses_indexes(seeded, method, url, body, allowed):
+    app, params, recorder = seeded
+    url = url.format(**params)
+    body = fill(body, params)
+    client = app.test_client()
+    client.open(url, method=method, json=body)
+    # Record the SQL the route runs, not a response-cache hit
+    response_cache.clear()
+    recorder.statements = []
+    recorder.recording = True
+    try:
+        response = client.open(url, method=method, json=body)
+        # Streamed responses run their queries as the body is read
+        response.get_data()
+    finally:
+        recorder.recording = False
+    assert response.status_code < 400, response.get_data(as_text=True)
+
+    problems = []
+    with db.engine.connect() as connection:
+        for statement, parameters in recorder.statements:
+            scanned, details = full_scans(connection, statement, parameters)
+            if scanned - allowed:
+                problems.append(' '.join(statement.split())[:200] + '\n  ' + '\n  '.join(details))
+    assert not problems, 'unexpected full scans:\n' + '\n'.join(problems)
@@ -0,0 +1,63 @@
+"""
+Random picks are distinct, honour the filters and follow catalog writes
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from helpers import load_catalog, generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.random_picker import RandomPool
+
+SIZE = 40
+
+
+@pytest.fixture
+def catalog(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        load_catalog(cocktails)
+        yield app.test_client(), cocktails
+
+
+def picked(client, query):
+    return [c['id'] for c in client.get(f'/api/cocktails/random?fields=id&{query}').get_json()['cocktails']]
+
+
+def test_picks_are_distinct_and_filtered(catalog):
+    client, cocktails = catalog
+    ids = picked(client, 'n=10')
+    assert len(ids) == len(set(ids)) == 10
+
+    category, alcoholic = cocktails[0]['category'], cocktails[0]['alcoholic']
+    matching = {c['id'] for c in cocktails if c['category'] == category and c['alcoholic'] == alcoholic}
+    ids = picked(client, f'n=50&category={category}&alcoholic={alcoholic}')
+    assert set(ids) == matching
+
+    assert picked(client, 'n=5&category=Nothing') == []
+    assert client.get('/api/cocktails/random?category=Nothing').status_code == 404
+    assert client.get('/api/cocktails/random').get_json()['id'] in {c['id'] for c in cocktails}
+
+
+def test_picks_follow_writes(catalog):
+    client, cocktails = catalog
+    db.session.delete(db.session.get(Cocktail, cocktails[0]['id']))
+    db.session.add(Cocktail(id='fresh', name='Fresh Arrival'))
+    db.session.commit()
+    ids = set(picked(client, 'n=50'))
+    assert cocktails[0]['id'] not in ids
+    assert 'fresh' in ids
+
+
+def test_every_cocktail_can_be_picked():
+    pool = RandomPool([(f"c{i}", 'Cocktail' if i % 2 else 'Shot', 'Alcoholic') for i in range(20)])
+    rng = random.Random(5)
+    counts = Counter(cocktail_id for _ in range(2000) for cocktail_id in pool.pick(1, rng=rng))
+    assert set(counts) == set(pool.ids)
+    assert min(counts.values()) > 2000 / 20 / 2
+    assert set(pool.pick(20, 'Shot', rng=rng)) == {f"c{i}" for i in range(0, 20, 2)}
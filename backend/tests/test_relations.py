@@ -0,0 +1,72 @@
+"""
+The ingredient and tag link tables follow the JSON columns through every write
+"""
+
+from helpers import load_catalog, load_shelf, generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import (
+    Cocktail, CocktailIngredient, CocktailTag, Ingredient, Tag, UserCocktailIngredient
+)
+
+SIZE = 30
+
+
+def linked(cocktail_id):
+    """(ingredient name keys in recipe order, tag name keys) from the link tables
+
+    Names are shared by key, so each keeps the spelling first loaded.
+    """
+    ingredients = db.session.execute(
+        db.select(Ingredient.name).join(CocktailIngredient, CocktailIngredient.ingredient_id == Ingredient.id)
+        .where(CocktailIngredient.cocktail_id == cocktail_id).order_by(CocktailIngredient.position)
+    ).scalars().all()
+    tags = db.session.execute(
+        db.select(Tag.name).join(CocktailTag, CocktailTag.tag_id == Tag.id)
+        .where(CocktailTag.cocktail_id == cocktail_id)
+    ).scalars().all()
+    return [name.lower() for name in ingredients], sorted(name.lower() for name in tags)
+
+
+def test_link_rows_follow_the_catalog(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        load_catalog(cocktails)
+        for cocktail in cocktails:
+            assert linked(cocktail['id']) == (
+                [i['name'].lower() for i in cocktail['ingredients']],
+                sorted(tag.lower() for tag in cocktail.get('tags') or [])
+            )
+
+        edited = db.session.get(Cocktail, 's0000001')
+        edited.ingredients = [{'name': 'Gin', 'measure': '2 oz'}, {'name': 'Tonic Water', 'measure': '4 oz'}]
+        edited.tags = ['Signature', 'Highball']
+        db.session.delete(db.session.get(Cocktail, 's0000002'))
+        db.session.commit()
+        assert linked('s0000001') == (['gin', 'tonic water'], ['highball', 'signature'])
+        assert linked('s0000002') == ([], [])
+
+        client = app.test_client()
+        featured = client.get('/api/cocktails/featured?fields=id').get_json()
+        assert 's0000001' in {c['id'] for c in featured}
+        filtered = client.get('/api/cocktails?ingredient=tonic water&fields=id').get_json()['cocktails']
+        assert 's0000001' in {c['id'] for c in filtered}
+
+
+def test_user_cocktails_get_link_rows(make_app):
+    app = make_app()
+    with app.app_context():
+        load_catalog(generate_cocktails(SIZE))
+        load_shelf(1, [])
+        response = app.test_client().post('/api/users/1/cocktails', json={
+            'name': 'House Sour',
+            'ingredients': [{'name': 'Whiskey', 'measure': '2 oz'}, {'name': 'Lemon Juice', 'measure': '1 oz'}],
+        })
+        assert response.status_code == 201
+        rows = db.session.execute(
+            db.select(Ingredient.name).join(UserCocktailIngredient, UserCocktailIngredient.ingredient_id == Ingredient.id)
+            .where(UserCocktailIngredient.user_cocktail_id == response.get_json()['id'])
+            .order_by(UserCocktailIngredient.position)
+        ).scalars().all()
+        assert [name.lower() for name in rows] == ['whiskey', 'lemon juice']
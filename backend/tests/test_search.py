@@ -0,0 +1,72 @@
+"""
+Search follows cocktail writes, including after a VACUUM renumbers cocktail rowids
+"""
+
+from helpers import load_catalog, generate_cocktails
+
+from src.models.user import db
+from src.models.cocktail import Cocktail
+from src.services.response_cache import response_cache
+from src.services.schema import prepare_database
+from src.services.search import FTS_TABLE, rebuild_search_index
+
+
+def search(client, words):
+    response_cache.clear()
+    return [c['id'] for c in client.get(f'/api/cocktails?search={words}&per_page=100').get_json()['cocktails']]
+
+
+def renumber_rowids():
+    """Move every cocktail to a new rowid without firing triggers, as VACUUM may
+
+    (cocktail's key is a string, so its rowid is not an alias SQLite keeps.)
+    """
+    triggers = db.session.execute(db.text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'cocktail'"
+    )).scalars().all()
+    for name in triggers:
+        db.session.execute(db.text(f"DROP TRIGGER {name}"))
+    db.session.execute(db.text("UPDATE cocktail SET rowid = rowid + 1000"))
+    # The schema pass puts the triggers back
+    db.session.execute(db.text("PRAGMA user_version = 0"))
+    db.session.commit()
+    prepare_database()
+
+
+def test_search_survives_renumbered_rowids(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(30)
+        cocktails[10]['name'] = 'Zanzibar Fizz'
+        cocktails[20]['name'] = 'Quetzal Sour'
+        load_catalog(cocktails)
+        for cocktail in cocktails[:5]:
+            db.session.delete(db.session.get(Cocktail, cocktail['id']))
+        db.session.commit()
+        renumber_rowids()
+        client = app.test_client()
+        assert search(client, 'zanzibar') == [cocktails[10]['id']]
+
+        db.session.get(Cocktail, cocktails[10]['id']).name = 'Mombasa Fizz'
+        db.session.delete(db.session.get(Cocktail, cocktails[20]['id']))
+        db.session.commit()
+        assert search(client, 'zanzibar') == []
+        assert search(client, 'mombasa') == [cocktails[10]['id']]
+        assert search(client, 'quetzal') == []
+        documents = db.session.execute(db.text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        assert documents == len(cocktails) - 6
+
+        rebuild_search_index()
+        assert search(client, 'mombasa') == [cocktails[10]['id']]
+
+
+def test_highlights_escape_catalog_text(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(10)
+        cocktails[3]['name'] = 'Zanzibar <img src=x onerror=alert(1)> & Co'
+        load_catalog(cocktails)
+        response = app.test_client().get('/api/cocktails?search=zanzibar')
+        highlights = response.get_json()['cocktails'][0]['highlights']
+        assert highlights['name'] == '<mark>Zanzibar</mark> &lt;img src=x onerror=alert(1)&gt; &amp; Co'
+        assert '<img' not in highlights['snippet']
@@ -0,0 +1,61 @@
+"""
+Spliced JSON encodes cocktails exactly as ``to_dict`` + ``jsonify`` would
+"""
+
+import json
+
+from helpers import load_catalog, generate_cocktails
+
+from src.models.cocktail import Cocktail
+from src.services.serialization import encode_cocktail, encode_cocktails, json_response
+
+SIZE = 20
+
+
+def make_cocktail(**overrides):
+    values = {
+        'id': 'c1', 'name': 'Gimlet "Classic"', 'category': 'Cocktail', 'alcoholic': 'Alcoholic',
+        'glass': 'Coupe', 'instructions': 'Shake — then strain.', 'iba': None,
+    }
+    values.update(overrides)
+    cocktail = Cocktail(**values)
+    cocktail.ingredients = [{'name': 'Gin', 'measure': '2 oz'}, {'name': 'Lime juice', 'measure': None}]
+    cocktail.tags = ['Sour']
+    return cocktail
+
+
+def test_encoded_cocktail_matches_to_dict(make_app):
+    with make_app().app_context():
+        cocktail = make_cocktail()
+        assert json.loads(encode_cocktail(cocktail)) == cocktail.to_dict()
+        bare = make_cocktail(id='c2')
+        bare.ingredients, bare.tags = None, None
+        assert json.loads(encode_cocktail(bare)) == bare.to_dict()
+
+        assert json.loads(encode_cocktail(cocktail, ('id', 'tags'))) == {'id': 'c1', 'tags': ['Sour']}
+        assert json.loads(encode_cocktail(cocktail, ('tags',), {'score': 0.5})) == {'score': 0.5, 'tags': ['Sour']}
+        encoded = encode_cocktails([cocktail, bare], ('id',), {'c2': {'rank': 1}})
+        assert json.loads(encoded) == [{'id': 'c1'}, {'id': 'c2', 'rank': 1}]
+
+
+def test_raw_fields_are_spliced_into_the_payload(make_app):
+    with make_app().app_context():
+        response = json_response({'total': 2}, cocktails=b'[1,2]')
+        assert json.loads(response.get_data()) == {'total': 2, 'cocktails': [1, 2]}
+        response = json_response({}, cocktails=b'[]')
+        assert json.loads(response.get_data()) == {'cocktails': []}
+
+
+def test_routes_return_to_dict_shapes(make_app):
+    app = make_app()
+    with app.app_context():
+        load_catalog(generate_cocktails(SIZE))
+        client = app.test_client()
+        for cocktail in Cocktail.query.limit(5):
+            assert client.get(f'/api/cocktails/{cocktail.id}').get_json() == cocktail.to_dict()
+        listed = client.get('/api/cocktails?fields=id,name,ingredients').get_json()['cocktails']
+        expected = {c.id: c.to_dict() for c in Cocktail.query}
+        for cocktail in listed:
+            assert set(cocktail) == {'id', 'name', 'ingredients'}
+            assert cocktail['ingredients'] == expected[cocktail['id']]['ingredients']
+        assert client.get('/api/cocktails?fields=id,colour').status_code == 400
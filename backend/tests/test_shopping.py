@@ -0,0 +1,62 @@
+"""
+Check the greedy shopping planner against brute force on small random catalogs
+"""
+
+import random
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from src.services.ingredient_index import IngredientIndex
+from src.services.shopping import plan_purchases, unlocked_by
+
+TRIALS = 200
+BUDGETS = [1, 2, 3]
+
+
+def brute_force(index, shelf, budget, positions=None):
+    """Best unlock count over every ``budget``-subset of useful ingredients"""
+    missing = index.missing_counts(shelf)
+    scope = np.arange(len(index)) if positions is None else np.asarray(positions)
+    candidates = scope[(missing[scope] >= 1) & (missing[scope] <= budget)]
+    _, useful = index.missing_ingredients(candidates, shelf)
+    useful = sorted(set(useful.tolist()))
+    best = 0
+    for size in range(1, min(budget, len(useful)) + 1):
+        for combo in combinations(useful, size):
+            best = max(best, len(unlocked_by(index, shelf, combo, positions)))
+    return best
+
+
+def random_catalog(rng, cocktails, vocabulary):
+    names = [f"ingredient {i}" for i in range(vocabulary)]
+    lists = [rng.sample(names, rng.randint(1, 4)) for _ in range(cocktails)]
+    return IngredientIndex([f"c{i}" for i in range(cocktails)], lists), names
+
+
+def trials():
+    """(index, shelf, positions) of every trial; a third are scoped to a subset"""
+    rng = random.Random(7)
+    for _ in range(TRIALS):
+        index, names = random_catalog(rng, rng.randint(5, 40), rng.randint(6, 14))
+        shelf = {name.lower() for name in rng.sample(names, rng.randint(0, len(names) // 2))}
+        positions = None
+        if rng.random() < 0.3:
+            positions = sorted(rng.sample(range(len(index)), rng.randint(1, len(index))))
+        yield index, shelf, positions
+
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_plan_matches_brute_force(budget):
+    """The plan's own unlock count must be right, never beat brute force, and be optimal for budget 1"""
+    for index, shelf, positions in trials():
+        plan = plan_purchases(index, shelf, budget, positions)
+        assert len(plan.ingredients) <= budget
+        assert sorted(plan.unlocked.tolist()) == \
+            sorted(unlocked_by(index, shelf, plan.ingredients, positions).tolist())
+        assert sum(plan.gains) == len(plan.unlocked)
+        best = brute_force(index, shelf, budget, positions)
+        assert len(plan.unlocked) <= best
+        if budget == 1:
+            assert len(plan.unlocked) == best
@@ -0,0 +1,65 @@
+"""
+Similar cocktails are ranked by cosine similarity of their feature vectors
+"""
+
+import numpy as np
+import pytest
+
+from helpers import load_catalog, generate_cocktails
+
+from src.services.canonical import get_canonical_lookup
+from src.services.similarity import get_similarity_model
+
+SIZE = 120
+K = 8
+
+
+@pytest.fixture
+def catalog(make_app):
+    app = make_app()
+    with app.app_context():
+        cocktails = generate_cocktails(SIZE)
+        load_catalog(cocktails)
+        yield app.test_client(), cocktails
+
+
+def dense(model):
+    """The model's rows as a dense (cocktails x features) matrix"""
+    matrix = np.zeros((len(model), len(model.feature_names)))
+    for position in range(len(model)):
+        features, weights = model.features_of(position)
+        matrix[position, features] = weights
+    return matrix
+
+
+def test_scores_match_dense_cosine(catalog):
+    model = get_similarity_model()
+    matrix = dense(model)
+    norms = np.linalg.norm(matrix, axis=1)
+    assert np.allclose(norms[norms > 0], 1.0)
+    for position in range(0, len(model), 7):
+        expected = matrix @ matrix[position]
+        assert np.allclose(model.scores(position), expected)
+        expected[position] = 0
+        ranked = [p for p in np.lexsort((np.arange(len(model)), -expected)) if expected[p] > 0][:K]
+        assert [p for p, _ in model.similar(position, K)] == ranked
+
+
+def test_similar_route(catalog):
+    client, cocktails = catalog
+    lookup = get_canonical_lookup()
+    features = {
+        c['id']: {lookup.resolve(i['name']) for i in c['ingredients']} | {t.lower() for t in c.get('tags') or []}
+        for c in cocktails
+    }
+    for cocktail in cocktails[:10]:
+        body = client.get(f"/api/cocktails/{cocktail['id']}/similar?k={K}&fields=id").get_json()
+        similar = body['cocktails']
+        assert len(similar) <= K
+        assert cocktail['id'] not in {c['id'] for c in similar}
+        scores = [c['similarity'] for c in similar]
+        assert scores == sorted(scores, reverse=True)
+        for other in similar:
+            assert other['shared_ingredients'] or other['shared_tags']
+            assert features[cocktail['id']] & features[other['id']]
+    assert client.get('/api/cocktails/missing/similar').status_code == 404
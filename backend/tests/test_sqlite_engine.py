@@ -0,0 +1,68 @@
+"""
+Serving settings: pooled SQLite connections in WAL mode that wait for the write lock
+"""
+
+import os
+import runpy
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from src.services.sqlite_engine import configure_sqlite, engine_options
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_engine(path, **overrides):
+    engine = create_engine(f"sqlite:///{path}", **engine_options(2))
+    configure_sqlite(engine, **overrides)
+    return engine
+
+
+def test_connections_get_the_serving_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLITE_CACHE_SIZE_KB', '2048')
+    engine = make_engine(tmp_path / 'app.db')
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -2048
+    engine.dispose()
+
+
+def test_writers_wait_for_the_lock(tmp_path):
+    engine = make_engine(tmp_path / 'app.db', busy_timeout=5000)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE hits (n INTEGER)"))
+    locked = threading.Event()
+
+    def hold_lock():
+        with engine.connect() as connection:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            connection.execute(text("INSERT INTO hits VALUES (1)"))
+            locked.set()
+            time.sleep(0.3)
+            connection.exec_driver_sql("COMMIT")
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait()
+    with engine.begin() as connection:
+        # Readers are not blocked by the writer in WAL mode
+        assert connection.execute(text("SELECT count(*) FROM hits")).scalar() == 0
+        connection.execute(text("INSERT INTO hits VALUES (2)"))
+    holder.join()
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM hits")).scalar() == 2
+    engine.dispose()
+
+
+def test_gunicorn_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    monkeypatch.setenv('WEB_THREADS', '6')
+    monkeypatch.setenv('PORT', '8080')
+    settings = runpy.run_path(os.path.join(BACKEND_DIR, 'gunicorn.conf.py'))
+    assert (settings['workers'], settings['threads'], settings['bind']) == (3, 6, '0.0.0.0:8080')
+    assert settings['worker_class'] == 'gthread'
+    assert settings['preload_app']
@@ -0,0 +1,36 @@
+"""
+The frontend's compressed variants are written at build time and only read at startup
+"""
+
+import gzip
+
+from flask import Flask
+
+from src.services.static_assets import StaticManifest, precompress
+
+SCRIPT = b'console.log("tavern");\n' * 200
+
+
+def build(folder):
+    (folder / 'assets').mkdir()
+    (folder / 'assets' / 'index-Buq7d4iD.js').write_bytes(SCRIPT)
+    (folder / 'index.html').write_bytes(b'<!doctype html><div id="root"></div>')
+
+
+def test_manifest_does_not_compress(tmp_path):
+    build(tmp_path)
+    manifest = StaticManifest(str(tmp_path))
+    assert manifest.assets['assets/index-Buq7d4iD.js'].variants == {}
+    assert not (tmp_path / 'assets' / 'index-Buq7d4iD.js.gz').exists()
+
+
+def test_precompressed_variants_are_served(tmp_path):
+    build(tmp_path)
+    assert precompress(str(tmp_path)) >= 1
+    # index.html is under MIN_COMPRESS_SIZE
+    assert not (tmp_path / 'index.html.gz').exists()
+    manifest = StaticManifest(str(tmp_path))
+    with Flask(__name__).test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = manifest.response('assets/index-Buq7d4iD.js')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == SCRIPT
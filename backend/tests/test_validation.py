@@ -0,0 +1,63 @@
+"""
+Malformed query arguments and bodies get a 400 with an error, never a 500
+"""
+
+import pytest
+
+from helpers import load_catalog, load_shelf, generate_cocktails
+
+USER_ID = 1
+
+BAD_REQUESTS = [
+    ('GET', '/api/cocktails?page=two', None),
+    ('GET', '/api/cocktails?per_page=lots', None),
+    ('GET', '/api/cocktails/s0000001/similar?k=1.5', None),
+    ('GET', '/api/cocktails/random?n=abc', None),
+    ('GET', '/api/users/1/almost-makeable?max_missing=x', None),
+    ('GET', '/api/users/1/almost-makeable?limit=', None),
+    ('GET', '/api/users/1/shopping-list/optimize?budget=three', None),
+    ('GET', '/api/users/1/shopping-list/optimize?limit=%20', None),
+    ('POST', '/api/users/1/favorites', ['s0000001']),
+    ('POST', '/api/users/1/favorites', {'cocktail_id': 7}),
+    ('POST', '/api/users/1/favorites/batch', ['s0000001']),
+    ('POST', '/api/users/1/favorites/batch', {'add': [1, 2]}),
+    ('POST', '/api/users/1/bar-shelf', {'ingredient_name': 'Gin', 'quantity': {'a': 1}}),
+    ('POST', '/api/users/1/bar-shelf', {'ingredient_name': 'Gin', 'quantity': True}),
+    ('POST', '/api/users/1/bar-shelf/batch', {'add': [{'ingredient_name': 'Gin', 'quantity': {'a': 1}}]}),
+    ('POST', '/api/users/1/bar-shelf/batch', {'add': [{'ingredient_name': 'Gin', 'quantity': [1]}]}),
+    ('POST', '/api/users/1/bar-shelf', ['Gin']),
+    ('POST', '/api/users/1/bar-shelf', None),
+    ('POST', '/api/users/1/cocktails', ['House Sour']),
+    ('POST', '/api/users/1/cocktails', None),
+]
+
+
+@pytest.fixture
+def client(make_app):
+    app = make_app()
+    with app.app_context():
+        load_catalog(generate_cocktails(20))
+        load_shelf(USER_ID, ['Vodka', 'Lime Juice'])
+    return app.test_client()
+
+
+@pytest.mark.parametrize('method,url,body', BAD_REQUESTS)
+def test_bad_input_is_a_400(client, method, url, body):
+    response = client.open(url, method=method, json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error']
+
+
+def test_numeric_arguments_are_still_clamped(client):
+    response = client.get('/api/cocktails/random?n=0')
+    assert response.status_code == 200
+    assert len(response.get_json()['cocktails']) == 1
+
+
+def test_numeric_quantity_is_stored_as_text(client):
+    response = client.post('/api/users/1/bar-shelf', json={'ingredient_name': 'Gin', 'quantity': 1.5})
+    assert response.status_code == 201
+    assert response.get_json()['quantity'] == '1.5'
+    response = client.post('/api/users/1/bar-shelf/batch', json={'add': [{'ingredient_name': 'Rum', 'quantity': 2}]})
+    assert response.status_code == 200
+    assert {i['ingredient_name']: i['quantity'] for i in response.get_json()['shelf']}['Rum'] == '2'
@@ -15,6 +15,8 @@ function App() {
   const [cocktails, setCocktails] = useState([]);
   const [loading, setLoading] = useState(false);
   const [metadata, setMetadata] = useState({ categories: [], glasses: [], ingredients: [] });
+  // Matches per category for the current search, from the list response
+  const [categoryCounts, setCategoryCounts] = useState(null);
 
   // Fetch cocktails from API
   const fetchCocktails = async (params = {}) => {
@@ -22,15 +24,18 @@ function App() {
     try {
       const queryParams = new URLSearchParams({
         per_page: 50,
+        facets: 'category',
         ...params
       });
       
       const response = await fetch(`/api/cocktails?${queryParams}`);
       const data = await response.json();
       setCocktails(data.cocktails || []);
+      setCategoryCounts(data.facets ? data.facets.category : null);
     } catch (error) {
       console.error('Error fetching cocktails:', error);
       setCocktails([]);
+      setCategoryCounts(null);
     } finally {
       setLoading(false);
     }
@@ -102,7 +107,7 @@ function App() {
       // Fetch Fall 2025 Main Menu cocktails
       fetchMyCocktails();
     } else if (view === 'favorite-cocktails') {
-      // Fetch empty favorites
+      // Fetch favorites
       fetchFavoriteCocktails();
     }
   };
@@ -122,7 +127,7 @@ function App() {
     }
   };
 
-  // Fetch Favorite Cocktails (empty)
+  // Fetch Favorite Cocktails
   const fetchFavoriteCocktails = async () => {
     setLoading(true);
     try {
@@ -203,6 +208,7 @@ function App() {
             searchQuery={searchQuery}
             selectedCategory={selectedCategory}
             categories={metadata.categories}
+            categoryCounts={categoryCounts}
             onSearch={handleSearch}
             onCategoryChange={handleCategoryChange}
             onCocktailSelect={handleCocktailSelect}
@@ -12,6 +12,7 @@ const MainContent = ({
   searchQuery,
   selectedCategory,
   categories,
+  categoryCounts,
   onSearch,
   onCategoryChange,
   onCocktailSelect
@@ -76,6 +77,7 @@ const MainContent = ({
                 {categories.map((category) => (
                   <SelectItem key={category} value={category}>
                     {category}
+                    {categoryCounts && ` (${categoryCounts[category] || 0})`}
                   </SelectItem>
                 ))}
               </SelectContent>